@@ -0,0 +1,93 @@
+import collections
+import queue
+import threading
+from typing import Hashable, Iterable, Optional
+
+import chess
+
+
+class AnalysisWorker:
+    """
+    Runs engine analysis on a background thread. Only the most recently
+    submitted position is kept, so clicking through moves quickly never
+    builds up a backlog of searches. Background positions (e.g. the rest
+    of a loaded game) are analyzed only while nothing else is waiting.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.results: "queue.Queue[tuple[int, chess.Board, dict]]" = queue.Queue()
+        self.background_results: "queue.Queue[tuple[Hashable, chess.Board, dict]]" = queue.Queue()
+        self.generation = 0
+        self._pending: Optional[tuple[int, chess.Board]] = None
+        self._background: collections.deque = collections.deque()
+        self._condition = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, board: chess.Board) -> int:
+        """Queue ``board`` for analysis, replacing any request not yet started."""
+        with self._condition:
+            self.generation += 1
+            self._pending = (self.generation, board.copy())
+            self._condition.notify()
+            return self.generation
+
+    def submit_background(self, jobs: Iterable[tuple[Hashable, chess.Board]]) -> None:
+        """Queue ``(key, board)`` pairs to analyze when the worker is idle."""
+        jobs = [(key, board.copy()) for key, board in jobs]
+        with self._condition:
+            self._background.extend(jobs)
+            self._condition.notify()
+
+    def clear_background(self) -> None:
+        with self._condition:
+            self._background.clear()
+
+    def poll(self) -> Optional[tuple[chess.Board, dict]]:
+        """Return the newest finished result, dropping stale ones."""
+        latest = None
+        while True:
+            try:
+                generation, board, info = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self.generation:
+                latest = (board, info)
+        return latest
+
+    def poll_background(self) -> list[tuple[Hashable, chess.Board, dict]]:
+        finished = []
+        while True:
+            try:
+                finished.append(self.background_results.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def stop(self, timeout: float = 1.0) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._running and self._pending is None and not self._background:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                if self._pending is not None:
+                    key, board = self._pending
+                    self._pending = None
+                    output = self.results
+                else:
+                    key, board = self._background.popleft()
+                    output = self.background_results
+
+            try:
+                info = self.engine.analyze(board)
+            except Exception as error:
+                info = {"score": None, "pv": None, "error": str(error)}
+            output.put((key, board, info))
@@ -1,30 +1,106 @@
 import os
+import queue
+import threading
+from typing import Optional
+
 import pygame as pg
 import chess
 import chess.pgn
 import tkinter as tk
 from tkinter import filedialog
 
-from engine import ChessEngine
+from analysis_worker import AnalysisWorker
+try:
+    from batch_eval import triage_order
+except ImportError:  # numpy is optional
+    triage_order = None
+from engine import open_engine
+from eval_store import EvalStore
+from ply_table import PlyTable
+from position_index import PositionIndex
 from core.common_functions import expand_fen_row
 import core.common_resources as cr
 
 
-class PygameAnalyzer:
+class EvalTimeline:
+    """
+    Evaluation of every ply of the game. The curve is drawn into a cached
+    surface that is only re-rasterized when new points arrive or the panel
+    size changes; the current-ply marker is drawn on top each frame.
+    """
+
+    clamp = 500  # centipawns at the top/bottom edge
+    background = (40, 40, 50)
+    white_fill = (220, 220, 220)
+    line_color = (120, 120, 140)
+    marker_color = (200, 200, 100)
+
     def __init__(self):
+        self.rect = pg.Rect(0, 0, 0, 0)
+        self.surface: Optional[pg.Surface] = None
+        self.dirty = True
+
+    def invalidate(self) -> None:
+        self.dirty = True
+
+    def x_for(self, ply: int, last_ply: int) -> float:
+        if last_ply == 0:
+            return 0
+        return (self.rect.w - 1) * ply / last_ply
+
+    def y_for(self, score: int) -> float:
+        score = max(-self.clamp, min(self.clamp, score))
+        return (self.rect.h - 1) * (0.5 - score / (2 * self.clamp))
+
+    def ply_at(self, pos: tuple[int, int], last_ply: int) -> Optional[int]:
+        if not self.rect.collidepoint(pos) or self.rect.w <= 1:
+            return None
+        return round((pos[0] - self.rect.x) / (self.rect.w - 1) * last_ply)
+
+    def rasterize(self, plies: PlyTable) -> None:
+        self.surface = pg.Surface(self.rect.size)
+        self.surface.fill(self.background)
+        mid = self.y_for(0)
+        points = []
+        for ply in range(len(plies)):
+            score = plies.white_score(ply)
+            if score is not None:
+                points.append((self.x_for(ply, plies.last_ply), self.y_for(score)))
+
+        # White advantage is filled from the bottom edge up to the curve
+        if len(points) > 1:
+            polygon = [(points[0][0], self.rect.h)] + points + [(points[-1][0], self.rect.h)]
+            pg.draw.polygon(self.surface, self.white_fill, polygon)
+        pg.draw.line(self.surface, self.line_color, (0, mid), (self.rect.w, mid))
+        self.dirty = False
+
+    def draw(self, surface: pg.Surface, plies: PlyTable, current_ply: int) -> None:
+        if self.dirty or self.surface is None or self.surface.get_size() != self.rect.size:
+            self.rasterize(plies)
+        surface.blit(self.surface, self.rect)
+        x = self.rect.x + self.x_for(current_ply, plies.last_ply)
+        pg.draw.line(surface, self.marker_color, (x, self.rect.y), (x, self.rect.bottom - 1), 2)
+
+
+class PygameAnalyzer:
+    def __init__(self, engine_profile: str = "analysis-deep"):
         pg.display.set_caption("Chess Analyzer")
         self.font = pg.font.Font("assets/fonts/english/lazy.ttf", 20)
 
-        self.engine = None
-        if os.path.exists(cr.StockfishPath) and os.access(cr.StockfishPath, os.X_OK):
-            self.engine = ChessEngine(cr.StockfishPath)
+        self.engine = open_engine(cr.StockfishPath, engine_profile, store=EvalStore())
+        self.worker = AnalysisWorker(self.engine)
 
         self.board = chess.Board()
-        self.moves: list[chess.Move] = []
-        self.move_index = 0
+        self.plies = PlyTable()
+        self.ply = 0
         self.analysis_text = ""
         self.selected_square: chess.Square | None = None
         self.eval_value = 0.0
+        self.timeline = EvalTimeline()
+        self.explorer: Optional[PositionIndex] = None
+        self.explorer_text = ""
+        self.explorer_building = False
+        self.explorer_ready: "queue.Queue[PositionIndex | str]" = queue.Queue()
 
         # board visuals copied from Game
         self.board_rect = pg.FRect(*cr.boards_json_dict["classic_board"]["board_rect"])
@@ -90,23 +166,77 @@ class PygameAnalyzer:
         with open(path, "r", encoding="utf-8") as fh:
             game = chess.pgn.read_game(fh)
         if game:
-            self.board = game.board()
-            self.moves = list(game.mainline_moves())
-            self.move_index = 0
+            self.plies = PlyTable.from_game(game)
+        self.plies_changed()
+        self.show_ply(0)
+
+    def plies_changed(self) -> None:
+        self.timeline.invalidate()
+        if self.worker is None:
+            return
+        # Fill the timeline from the background while the user browses,
+        # starting where the material changes most when numpy is available
+        self.worker.clear_background()
+        boards = [self.plies.board_at(ply) for ply in range(len(self.plies))]
+        order = triage_order(boards) if triage_order is not None else range(len(boards))
+        self.worker.submit_background(
+            (ply, boards[ply]) for ply in order if self.plies[ply].analysis is None
+        )
+
+    def show_ply(self, ply: int) -> None:
+        self.ply = ply
+        self.board = self.plies.board_at(ply)
+        self.selected_square = None
         self.update_pieces_map()
         self.analyze_position()
+        self.update_explorer()
+
+    def jump_to_ply(self, ply: int) -> None:
+        ply = self.plies.clamp(ply)
+        if ply != self.ply:
+            self.show_ply(ply)
 
     def analyze_position(self) -> None:
-        if not self.engine:
-            self.analysis_text = "Engine not found"
-            self.eval_value = 0.0
+        entry = self.plies[self.ply]
+        if entry.analysis is None:
+            self.analysis_text = "Analyzing..."
+            self.worker.submit(self.board)
+            return
+        self.apply_analysis(entry.analysis)
+
+    def poll_analysis(self) -> None:
+        if self.worker is None:
+            return
+        result = self.worker.poll()
+        if result is not None:
+            board, info = result
+            entry = self.plies[self.ply]
+            if board.fen() == entry.fen:
+                self.store_analysis(self.ply, info)
+                self.apply_analysis(info)
+
+        for ply, board, info in self.worker.poll_background():
+            if ply <= self.plies.last_ply and self.plies[ply].fen == board.fen():
+                self.store_analysis(ply, info)
+
+    def store_analysis(self, ply: int, info: dict) -> None:
+        entry = self.plies[ply]
+        if entry.analysis is None and not info.get("error"):
+            entry.analysis = info
+            self.timeline.invalidate()
+
+    def apply_analysis(self, info: dict) -> None:
+        if info.get("error"):
+            self.analysis_text = f"Engine error: {info['error']}"
+            self.eval_value = 0.5
             return
-        info = self.engine.analyze(self.board)
         score = info["score"]
         self.analysis_text = f"Score: {score}"
         if info.get("pv"):
             self.analysis_text += f"  Best: {info['pv'][0]}"
-        if isinstance(score, int):
+        if score is None:
+            val = 0
+        elif isinstance(score, int):
             val = score / 100
         else:
             val = score.relative.score()
@@ -116,19 +246,73 @@ class PygameAnalyzer:
             val = -1
         self.eval_value = (val + 1) / 2
 
+    def open_explorer(self, pgn_path: str) -> None:
+        """Index a PGN collection on a background thread; large ones take a while."""
+        if self.explorer_building:
+            return
+        self.explorer_building = True
+        self.explorer_text = "Indexing..."
+
+        def build() -> None:
+            try:
+                self.explorer_ready.put(PositionIndex.open_for(pgn_path))
+            except Exception as error:
+                self.explorer_ready.put(f"Index failed: {error}")
+
+        threading.Thread(target=build, daemon=True).start()
+
+    def poll_explorer(self) -> None:
+        try:
+            result = self.explorer_ready.get_nowait()
+        except queue.Empty:
+            return
+        self.explorer_building = False
+        if isinstance(result, str):
+            self.explorer_text = result
+            return
+        if self.explorer is not None:
+            self.explorer.close()
+        self.explorer = result
+        self.update_explorer()
+
+    def update_explorer(self) -> None:
+        if self.explorer is None:
+            return
+        stats = self.explorer.stats(self.board)
+        if not stats:
+            self.explorer_text = "Explorer: no games"
+            return
+        total = sum(stat.games for stat in stats)
+        lines = [f"Explorer: {total} games"]
+        for stat in stats[:5]:
+            lines.append(f"{stat.san:6} {stat.games:6}  {stat.score(self.board.turn):.0%}")
+        self.explorer_text = "\n".join(lines)
+
     def next_move(self) -> None:
-        if self.move_index < len(self.moves):
-            self.board.push(self.moves[self.move_index])
-            self.move_index += 1
-            self.update_pieces_map()
-            self.analyze_position()
+        self.jump_to_ply(self.ply + 1)
 
     def prev_move(self) -> None:
-        if self.move_index > 0:
-            self.move_index -= 1
-            self.board.pop()
-            self.update_pieces_map()
-            self.analyze_position()
+        self.jump_to_ply(self.ply - 1)
+
+    @property
+    def scrub_rect(self) -> pg.Rect:
+        panel_x = self.board_rect.right + 20
+        return pg.Rect(panel_x + 30, self.board_rect.bottom - 40, cr.screen.get_width() - panel_x - 50, 12)
+
+    def handle_timeline(self, pos: tuple[int, int]) -> bool:
+        ply = self.timeline.ply_at(pos, self.plies.last_ply)
+        if ply is None:
+            return False
+        self.jump_to_ply(ply)
+        return True
+
+    def handle_scrub(self, pos: tuple[int, int]) -> bool:
+        rect = self.scrub_rect
+        if not rect.inflate(0, 16).collidepoint(pos):
+            return False
+        fraction = (pos[0] - rect.x) / max(1, rect.w)
+        self.jump_to_ply(round(fraction * self.plies.last_ply))
+        return True
 
     def handle_click(self, pos: tuple[int, int]) -> None:
         for uci, rect in self.board_map.items():
@@ -140,10 +324,9 @@ class PygameAnalyzer:
                 else:
                     move = chess.Move(self.selected_square, square)
                     if move in self.board.legal_moves:
-                        self.board.push(move)
-                        self.selected_square = None
-                        self.update_pieces_map()
-                        self.analyze_position()
+                        ply = self.plies.play(self.ply, move)
+                        self.plies_changed()
+                        self.show_ply(ply)
                     else:
                         self.selected_square = None
                 break
@@ -165,8 +348,11 @@ class PygameAnalyzer:
         panel_x = self.board_rect.right + 20
         instructions = [
             "Arrows: navigate",
+            "Home/End: first/last",
             "L: load",
+            "X: opening explorer",
             "R: reset",
+            "F9: profile",
         ]
         y_instr = 10
         for line in instructions:
@@ -187,28 +373,50 @@ class PygameAnalyzer:
             cr.screen.blit(surf, (x, y))
             y += surf.get_height() + 5
 
-        moves_text = " ".join(m.uci() for m in list(self.board.move_stack)[-8:])
+        moves_text = " ".join(self.plies.sans[max(0, self.ply - 8):self.ply])
         if moves_text:
             moves_surf = self.font.render(moves_text, True, (255, 255, 255))
             cr.screen.blit(moves_surf, (x, y))
+            y += moves_surf.get_height() + 15
+
+        for line in self.explorer_text.split("\n") if self.explorer_text else ():
+            surf = self.font.render(line, True, (200, 200, 160))
+            cr.screen.blit(surf, (x, y))
+            y += surf.get_height() + 3
+
+        # Scrub bar: click or drag to land on any ply
+        scrub = self.scrub_rect
+        self.timeline.rect = pg.Rect(scrub.x, scrub.y - 150, scrub.w, 110)
+        self.timeline.draw(cr.screen, self.plies, self.ply)
+        pg.draw.rect(cr.screen, (90, 90, 110), scrub)
+        if self.plies.last_ply:
+            knob_x = scrub.x + scrub.w * self.ply / self.plies.last_ply
+            pg.draw.rect(cr.screen, (200, 200, 100), (knob_x - 3, scrub.y - 4, 6, scrub.h + 8))
+        ply_surf = self.font.render(f"Ply {self.ply}/{self.plies.last_ply}", True, (255, 255, 255))
+        cr.screen.blit(ply_surf, (scrub.x, scrub.y - ply_surf.get_height() - 6))
 
     def run(self) -> None:
         clock = pg.time.Clock()
         running = True
         while running:
+            pressed_keys = set()
             for event in pg.event.get():
                 if event.type == pg.QUIT:
                     running = False
                 elif event.type == pg.KEYDOWN:
+                    pressed_keys.add(event.key)
                     if event.key == pg.K_RIGHT:
                         self.next_move()
                     elif event.key == pg.K_LEFT:
                         self.prev_move()
+                    elif event.key == pg.K_HOME:
+                        self.jump_to_ply(0)
+                    elif event.key == pg.K_END:
+                        self.jump_to_ply(self.plies.last_ply)
                     elif event.key == pg.K_r:
-                        self.board.reset()
-                        self.move_index = 0
-                        self.update_pieces_map()
-                        self.analyze_position()
+                        self.plies = PlyTable()
+                        self.plies_changed()
+                        self.show_ply(0)
                     elif event.key == pg.K_l:
                         tk_root = tk.Tk()
                         tk_root.withdraw()
@@ -216,17 +424,35 @@ class PygameAnalyzer:
                         tk_root.destroy()
                         if path:
                             self.load_pgn(path)
+                    elif event.key == pg.K_x and not self.explorer_building:
+                        tk_root = tk.Tk()
+                        tk_root.withdraw()
+                        path = filedialog.askopenfilename(filetypes=[("PGN", "*.pgn")])
+                        tk_root.destroy()
+                        if path:
+                            self.open_explorer(path)
                 elif event.type == pg.MOUSEBUTTONDOWN and event.button == 1:
-                    self.handle_click(event.pos)
+                    if not self.handle_scrub(event.pos) and not self.handle_timeline(event.pos):
+                        self.handle_click(event.pos)
+                elif event.type == pg.MOUSEMOTION and event.buttons[0]:
+                    self.handle_scrub(event.pos)
+            cr.profiler.check(pressed_keys)
+            self.poll_analysis()
+            self.poll_explorer()
             cr.screen.fill((0, 0, 0))
             self.draw_board()
             self.draw_ui()
+            cr.profiler.draw(cr.screen)
             pg.display.flip()
             clock.tick(30)
 
+        if self.worker:
+            self.worker.stop()
         if self.engine:
             self.engine.quit()
+        if self.explorer is not None:
+            self.explorer.close()
 
-def run_analyzer() -> None:
-    analyzer = PygameAnalyzer()
+def run_analyzer(engine_profile: str = "analysis-deep") -> None:
+    analyzer = PygameAnalyzer(engine_profile)
     analyzer.run()
@@ -0,0 +1,99 @@
+"""
+Static evaluation of many positions at once with NumPy, for sorting or
+skipping work before any engine time is spent. Boards become 12x64 piece
+planes; material, piece-square tables and an x-ray mobility estimate are
+then matrix products over the whole batch.
+
+Needs numpy, which only the batch tools use; callers import this module
+lazily and carry on without it.
+"""
+from typing import Iterable
+
+import chess
+import numpy as np
+
+from fallback_engine import PIECE_VALUES, PST
+
+PIECE_TYPES = [chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING]
+COLORS = [chess.WHITE, chess.BLACK]  # planes 0-5 are White's, 6-11 Black's
+MOBILITY_WEIGHTS = {chess.KNIGHT: 4, chess.BISHOP: 3, chess.ROOK: 2, chess.QUEEN: 1}
+
+_BITS = np.arange(64, dtype=np.uint64)
+
+
+def _weights() -> np.ndarray:
+    """Material + piece-square value of every piece on every square, (12, 64)."""
+    weights = np.zeros((12, 64), dtype=np.float32)
+    for index, piece_type in enumerate(PIECE_TYPES):
+        table = np.array(PST[piece_type], dtype=np.float32)
+        white = table[np.arange(64) ^ 56]  # tables are written rank 8 first
+        weights[index] = PIECE_VALUES[piece_type] + white
+        weights[index + 6] = -(PIECE_VALUES[piece_type] + table)
+    return weights
+
+
+def _attack_tables() -> dict[int, np.ndarray]:
+    """Squares each piece type attacks on an empty board, (64, 64) per type."""
+    tables = {}
+    for piece_type in MOBILITY_WEIGHTS:
+        table = np.zeros((64, 64), dtype=np.float32)
+        for square in chess.SQUARES:
+            board = chess.Board(None)
+            board.set_piece_at(square, chess.Piece(piece_type, chess.WHITE))
+            for target in board.attacks(square):
+                table[square, target] = 1
+        tables[piece_type] = table
+    return tables
+
+
+WEIGHTS = _weights()
+ATTACKS = _attack_tables()
+
+
+def to_planes(boards: Iterable[chess.Board]) -> np.ndarray:
+    """Piece occupancy of every board as a (n, 12, 64) uint8 array."""
+    masks = np.array(
+        [[board.pieces_mask(piece_type, color) for color in COLORS for piece_type in PIECE_TYPES]
+         for board in boards],
+        dtype=np.uint64,
+    ).reshape(-1, 12)
+    return ((masks[:, :, None] >> _BITS) & np.uint64(1)).astype(np.uint8)
+
+
+def evaluate_planes(planes: np.ndarray) -> np.ndarray:
+    """Scores in centipawns from White's point of view, one per position."""
+    # float32 so the products run through BLAS; every value is a small integer
+    planes = planes.astype(np.float32)
+    score = planes.reshape(len(planes), -1) @ WEIGHTS.reshape(-1)
+
+    white_free = 1 - planes[:, :6].sum(axis=1)
+    black_free = 1 - planes[:, 6:].sum(axis=1)
+    for index, piece_type in enumerate(PIECE_TYPES):
+        weight = MOBILITY_WEIGHTS.get(piece_type)
+        if weight is None:
+            continue
+        # Attacked squares not taken by own pieces, ignoring blockers in between
+        white_reach = ((planes[:, index] @ ATTACKS[piece_type]) * white_free).sum(axis=1)
+        black_reach = ((planes[:, index + 6] @ ATTACKS[piece_type]) * black_free).sum(axis=1)
+        score += weight * (white_reach - black_reach)
+    return np.rint(score).astype(np.int32)
+
+
+def evaluate_boards(boards: Iterable[chess.Board]) -> np.ndarray:
+    """Static scores in centipawns from White's point of view, as an int32 array."""
+    boards = list(boards)
+    if not boards:
+        return np.zeros(0, dtype=np.int32)
+    return evaluate_planes(to_planes(boards))
+
+
+def triage_order(boards: Iterable[chess.Board]) -> list[int]:
+    """
+    Indices of a game's positions, those right after the biggest static
+    swings first: that is where engine time is most likely to matter.
+    """
+    scores = evaluate_boards(boards)
+    if len(scores) == 0:
+        return []
+    swings = np.abs(np.diff(scores, prepend=scores[0]))
+    return np.argsort(-swings, kind="stable").tolist()
@@ -37,13 +37,10 @@ boards_json_dict = {
 # empty so the rest of the code can iterate over it without failing.
 ui_dict = {}
 
-import os
+from engine_locator import find_stockfish
 
-StockfishPath = os.path.join(
-    os.path.dirname(os.path.dirname(__file__)),
-    "stockfish",
-    "stockfish-windows-x86-64-avx2.exe",
-)
+# None when no binary was found; engine.open_engine then uses the built-in engine
+StockfishPath = find_stockfish()
 
 
 
@@ -1,6 +1,8 @@
 import pygame as pg
 from core.event_holder import EventHolder
+from core.profiler import Profiler
 from core.assets import pieces_sprite_dict,boards_sprite_dict,boards_json_dict,ui_dict,StockfishPath
 
 event_holder:EventHolder
 screen:pg.Surface
+profiler:Profiler = Profiler()  # idle until F9 or main.py --profile-for
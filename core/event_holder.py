@@ -1,17 +1,32 @@
+import time
+from typing import NamedTuple
+
 import pygame as pg
 from pygame.locals import *
 from pygame.rect import FRect
 from pygame.math import Vector2
 
+
+class Frame(NamedTuple) :
+    time: float
+    events: list
+    mouse_pos: tuple
+    mouse_buttons: tuple
+    focused: bool
+
+
+USED_EVENTS = [QUIT, KEYDOWN, KEYUP, MOUSEMOTION, MOUSEBUTTONDOWN, MOUSEBUTTONUP, MOUSEWHEEL, WINDOWENTER, VIDEORESIZE]
+
+
 class EventHolder :
     """
     This class holds the fetched events, and converts them into a 
     more digestigble format, so it's easily processed
     """
     def __init__( self ) :
-        self.pressed_keys = []
-        self.released_keys = []
-        self.held_keys = []
+        self.pressed_keys = set()
+        self.released_keys = set()
+        self.held_keys = set()
 
         self.mouse_moved = False
         self.mouse_pos = Vector2(0, 0)
@@ -19,6 +34,9 @@ class EventHolder :
         self.mouse_released_keys = [False, False, False]
         self.mouse_held_keys = [False, False, False]
         self.mouse_focus = False
+        self.mouse_wheel = 0  # wheel steps this frame, positive away from the user
+        self._mouse_rect = None
+        self.window_resized = None
 
         self.should_quit = False
         self.determined_fps = 60
@@ -26,40 +44,85 @@ class EventHolder :
 
     @property
     def mouse_rect( self ) -> FRect:
-        return FRect(self.mouse_pos.x - 1, self.mouse_pos.y - 1,2,2)
+        """ Shared between callers and rebuilt only when the mouse moves; don't mutate it """
+        if self._mouse_rect is None :
+            self._mouse_rect = FRect(self.mouse_pos.x - 1, self.mouse_pos.y - 1,2,2)
+        return self._mouse_rect
+
+    @staticmethod
+    def restrict_event_queue() :
+        """ Keep SDL from queueing event types nobody reads """
+        pg.event.set_blocked(None)
+        pg.event.set_allowed(USED_EVENTS)
+
+    def read_frame( self ) -> Frame:
+        """ Snapshot of everything get_events consumes for one frame """
+        return Frame(
+            time.perf_counter(),
+            pg.event.get(),
+            pg.mouse.get_pos(),
+            tuple(pg.mouse.get_pressed()),
+            bool(pg.mouse.get_focused()),
+        )
 
     def get_events( self ) :
+        self.process_frame(self.read_frame())
+
+    def process_frame( self, frame: Frame ) :
         self.pressed_keys.clear()
         self.released_keys.clear()
         self.mouse_pressed_keys = [False, False, False]
         self.mouse_released_keys = [False, False, False]
-        self.mouse_focus = pg.mouse.get_focused()
+        self.mouse_focus = frame.focused
         self.mouse_moved = False
+        self.mouse_wheel = 0
+        self.window_resized = None
+        mouse_seen = False
 
-        for i in pg.event.get() :
-            if i.type == WINDOWENTER or MOUSEMOTION :
-                self.mouse_pos = Vector2(pg.mouse.get_pos())
+        for i in frame.events :
+            kind = i.type
+            if kind == MOUSEMOTION :
+                # Motion is coalesced: only where the mouse ended up matters
+                self.mouse_moved = True
+                mouse_seen = True
 
-            if i.type == QUIT or i.type == KEYDOWN and i.key == K_ESCAPE:
-                self.should_quit = True
+            elif kind == KEYDOWN :
+                if i.key == K_ESCAPE :
+                    self.should_quit = True
+                self.pressed_keys.add(i.key)
+                self.held_keys.add(i.key)
 
-            if i.type == MOUSEMOTION :
-                self.mouse_moved = True
+            elif kind == KEYUP :
+                self.released_keys.add(i.key)
+                self.held_keys.discard(i.key)
+
+            elif kind == MOUSEBUTTONDOWN :
+                self.mouse_pressed_keys = list(frame.mouse_buttons)
+                self.mouse_held_keys = list(frame.mouse_buttons)
+                mouse_seen = True
 
-            if i.type == KEYDOWN :
-                self.pressed_keys.append(i.key)
-                if i.key not in self.held_keys :
-                    self.held_keys.append(i.key)
+            elif kind == MOUSEBUTTONUP :
+                self.mouse_released_keys = list(frame.mouse_buttons)
+                self.mouse_held_keys = list(frame.mouse_buttons)
+                mouse_seen = True
 
-            if i.type == KEYUP :
-                self.released_keys.append(i.key)
-                if i.key in self.held_keys :
-                    self.held_keys.remove(i.key)
+            elif kind == MOUSEWHEEL :
+                self.mouse_wheel += -i.y if getattr(i, "flipped", False) else i.y
+
+            elif kind == WINDOWENTER :
+                mouse_seen = True
+
+            elif kind == VIDEORESIZE :
+                # Only the final size of a drag matters
+                self.window_resized = (i.w, i.h)
+
+            elif kind == QUIT :
+                self.should_quit = True
 
-            if i.type == MOUSEBUTTONDOWN :
-                self.mouse_pressed_keys = list(pg.mouse.get_pressed())
-                self.mouse_held_keys = list(pg.mouse.get_pressed())
+        if mouse_seen :
+            self.set_mouse_pos(frame.mouse_pos)
 
-            if i.type == MOUSEBUTTONUP :
-                self.mouse_released_keys = list(pg.mouse.get_pressed())
-                self.mouse_held_keys = list(pg.mouse.get_pressed())
+    def set_mouse_pos( self, pos ) :
+        if pos != self.mouse_pos :
+            self.mouse_pos = Vector2(pos)
+            self._mouse_rect = None
@@ -1,7 +1,6 @@
+import logging
 import os
-import json
 import time
-from dataclasses import dataclass
 from typing import Optional
 
 import pygame as pg
@@ -9,60 +8,41 @@ from pygame.locals import *
 from pygame.rect import FRect
 from pygame import Surface
 import chess
-import chess.pgn
-import stockfish
 from core.common_functions import *
+from core.game_core import GameCore, GameState
+from core.history_panel import HistoryPanel
+from core.layout import Layout
 import core.common_resources as cr
+from engine import open_engine
+from engine_profiles import PROFILES
+from difficulty import DEFAULT_DIFFICULTY, TIERS, get_difficulty
+from time_manager import TimeManager
+from engine_scheduler import EngineScheduler
 
+log = logging.getLogger(__name__)
 
-@dataclass
-class GameState:
-    fen: str
-    white_clock: float
-    black_clock: float
-    bot: bool
-    moves: list
 
-    def save(self, path: str = "saved_game.json") -> None:
-        with open(path, "w", encoding="utf-8") as fh:
-            json.dump(self.__dict__, fh)
+class Game(GameCore):
 
-    @classmethod
-    def load(cls, path: str = "saved_game.json") -> "GameState":
-        with open(path, "r", encoding="utf-8") as fh:
-            data = json.load(fh)
-        return cls(**data)
+    def __init__(self, ai_color: str = "black", timed_play: bool = False, ai_active: bool = False, time_limit: Optional[int] = None,
+                 engine_profile: str = "bot-blitz", difficulty: str = DEFAULT_DIFFICULTY, increment: float = 0.0):
 
-
-class Game:
-
-    def __init__(self, ai_color: str = "black", timed_play: bool = False, ai_active: bool = False, time_limit: Optional[int] = None):
-
-        self.moves_sequence = []
-        self.timed_play = timed_play
-        self.ai_color = ai_color
-        self.last_move_time = time.time()
-        self.white_clock = 0.0
-        self.black_clock = 0.0
-        self.time_limit = time_limit
-        self.game_start_time = time.time()
+        super().__init__(ai_color=ai_color, timed_play=timed_play, time_limit=time_limit, increment=increment)
         self.history_open = False
-        self.outcome_message: Optional[str] = None
-        if os.path.exists(cr.StockfishPath):
-            self.engine = stockfish.Stockfish(cr.StockfishPath)
-        else:
-            print(f"Engine was not found. {cr.StockfishPath} does not exist.")
-            self.engine = None
-        self.board = chess.Board()
-        self.board_map = {}  # A map that contains every coord and their co-responding rectangle
+        self.engine = open_engine(cr.StockfishPath, engine_profile)
+        # Bot moves and live evaluation share the engine; bot moves go first
+        self.scheduler = EngineScheduler(self.engine)
+        self.difficulty = get_difficulty(difficulty)
+        self.time_manager = TimeManager()
+        self.pending_bot_move = None
+        self.pending_evaluation = None
+        self.evaluation = None
         self.pieces_map = {}
 
-        self.board_rect = FRect(cr.boards_json_dict['classic_board']['board_rect'])
         self.board_sprite = cr.boards_sprite_dict['classic_board']
-        self.resize_board()
-        self.create_board_tiles()
+        self.bottom_panel_speed = 3
+        self.relayout()
 
-        self.resize_pieces()
         self.selected_piece = None
         self.selected_piece_valid_moves = []
         self.checkers_list = []
@@ -74,21 +54,12 @@ class Game:
         self.promotion_panel_pieces = 'QRBN'
         self.onhold_promotion = None
         self.hovered_promotion_sections = None
-        self.promotion_panel = FRect(0, 0, self.board_rect.w / 2, self.board_rect.h / 8)
-        self.promotion_panel.center = cr.screen.get_rect().center
-        self.promotion_panel_sections = [FRect(self.promotion_panel), FRect(self.promotion_panel),
-            FRect(self.promotion_panel), FRect(self.promotion_panel), ]
-
-        self.adjust_promotion_panel()
-        self.ai_is_active = ai_active and self.engine is not None
+        self.ai_is_active = ai_active
         self.return_to_menu = False
 
-        self.bottom_panel = FRect(0, 0, cr.screen.get_width(), cr.screen.get_height())
-        self.bottom_panel_speed = 3
-        self.adjust_bottom_panel()
-        self.resize_ui_elements()
         self.footer_buttons = ["save", "load", "history", "menu"]
         self.font = pg.font.Font("assets/fonts/english/lazy.ttf", 20)
+        self.history = HistoryPanel(self.font)
 
         self.highlight_color = [150, 200, 150]
         self.move_color = [150, 150, 200]
@@ -96,61 +67,45 @@ class Game:
         self.check_color = [250, 20, 20]
 
 
-    def adjust_bottom_panel( self ) :
-        self.bottom_panel.h = cr.screen.get_height() * 0.05
-        self.bottom_panel.y = cr.screen.get_width()
-
-
-    def adjust_promotion_panel( self ) :
-        w = self.board_rect.w / 8
-        self.promotion_panel_sections[0].w = w
-        self.promotion_panel_sections[1].x += w
-        self.promotion_panel_sections[1].w = w
-        self.promotion_panel_sections[2].x += w * 2
-        self.promotion_panel_sections[2].w = w
-        self.promotion_panel_sections[3].x += w * 3
-        self.promotion_panel_sections[3].w = w
-
-
-    def resize_ui_elements( self ) :
-        for name in cr.ui_dict :
-            sprite = cr.ui_dict[name]
-            sprite.transform_by_height(self.bottom_panel.h * 0.8)
-
-
-    def resize_board(self) -> None:
-        board_size = cr.screen.get_height()
-        self.board_sprite.transform(board_size, board_size)
-
-        m = self.board_sprite.get_diff()[0]
-        self.board_rect.x *= m
-        self.board_rect.y *= m
-        self.board_rect.w *= m
-        self.board_rect.h *= m
-        self.board_rect.w += 1
-        self.board_rect.h += 1
+    def relayout( self ) :
+        """ Recompute every rectangle and scaled surface from the current window size """
+        surface = pg.display.get_surface()
+        if surface is not None :
+            cr.screen = surface
+        self.layout = Layout(
+            cr.screen.get_size(),
+            cr.boards_json_dict['classic_board']['board_rect'],
+            self.board_sprite.raw_surface.get_size(),
+        )
+        self.board_rect = self.layout.board_rect
+        self.board_map = self.layout.board_map  # A map that contains every coord and their co-responding rectangle
+        self.promotion_panel = self.layout.promotion_panel
+        self.promotion_panel_sections = self.layout.promotion_panel_sections
+        self.bottom_panel = self.layout.bottom_panel
 
+        # Scaled copies come from each sprite's size-keyed cache, and the
+        # shared sprites themselves are left untouched
+        self.board_surface = self.board_sprite.scaled(self.layout.board_size, self.layout.board_size)
+        self.piece_surfaces = self.scale_pieces(self.layout.tile_h)
+        self.ui_surfaces = {
+            name: sprite.scaled_by_height(self.bottom_panel.h * 0.8)
+            for name, sprite in cr.ui_dict.items()
+        }
 
-    def create_board_tiles( self ) :
-        w = self.board_rect.w / 8
-        h = self.board_rect.h / 8
 
-        letters = 'abcdefgh'
-        digits = '12345678'
+    def scale_pieces( self, h ) :
+        tallest = max(sprite.raw_surface.get_height() for sprite in cr.pieces_sprite_dict.values())
+        rel = h / tallest
 
-        for x, letter in zip(range(8), letters) :
-            for y, digit in zip(range(8), digits[: :-1]) :
-                rect = FRect(x * w, y * h, w, h)
-                rect.x += self.board_rect.x
-                rect.y += self.board_rect.y
-                uci = letter + digit
-                self.board_map[uci] = rect
+        return {
+            name: sprite.scaled_by_rel(rel, rel)
+            for name, sprite in cr.pieces_sprite_dict.items()
+        }
 
 
     def update_pieces_map( self ) :
         fen = self.board.board_fen()
-        if self.engine is not None:
-            self.engine.set_position(self.moves_sequence)
+        self.request_evaluation()
         new_fen = [expand_fen_row(i) for i in fen.split('/')]
 
         pieces = {}
@@ -164,24 +119,6 @@ class Game:
         self.fill_checkers_list()
 
 
-    def resize_pieces( self ) :
-        tallest_piece = cr.pieces_sprite_dict["r"]
-
-        h = self.board_rect.h / 8
-
-        for name in cr.pieces_sprite_dict :
-            sprite = cr.pieces_sprite_dict[name]
-            if sprite.raw_surface.get_height() > tallest_piece.raw_surface.get_height() :
-                tallest_piece = sprite
-
-        tallest_piece.transform_by_height(h)
-        rel = tallest_piece.get_diff()
-
-        for name in cr.pieces_sprite_dict :
-            sprite = cr.pieces_sprite_dict[name]
-            sprite.transform_by_rel(rel[0], rel[1])
-
-
     def check_pieces_moving( self ) :
         if cr.event_holder.mouse_pressed_keys[2] :
             self.selected_piece = None
@@ -278,7 +215,21 @@ class Game:
         return False
 
 
+    def check_history_scroll(self) -> None:
+        keys = cr.event_holder.pressed_keys
+        rows = -cr.event_holder.mouse_wheel * 3
+        rows += (pg.K_DOWN in keys) - (pg.K_UP in keys)
+        rows += self.history.visible_rows * ((pg.K_PAGEDOWN in keys) - (pg.K_PAGEUP in keys))
+        if rows:
+            self.history.scroll_by(rows)
+
     def check_events(self) -> None:
+        if cr.event_holder.window_resized:
+            self.relayout()
+
+        if self.history_open:
+            self.check_history_scroll()
+
         if self.outcome_message:
             self.check_outcome_buttons()
             return
@@ -288,10 +239,11 @@ class Game:
         if self.promotion_panel_open:
             self.check_promotion_panel()
         else:
-            if self.turn == self.ai_color and self.ai_is_active:
-                if self.engine is not None and self.ai_make_move():
+            bot_turn = self.turn == self.ai_color and self.ai_is_active
+            if bot_turn:
+                if self.scheduler is not None and self.ai_make_move():
                     self.update_pieces_map()
-            if not self.check_bottom_panel():
+            if not self.check_bottom_panel() and not bot_turn:
                 self.check_pieces_moving()
 
 
@@ -299,10 +251,11 @@ class Game:
         for uci in self.pieces_map :
             piece_name = self.pieces_map[uci]
             rect = self.board_map[uci]
-            piece_rect = cr.pieces_sprite_dict[piece_name].transformed_surface.get_rect()
+            surface = self.piece_surfaces[piece_name]
+            piece_rect = surface.get_rect()
             piece_rect.center = rect.center
 
-            cr.screen.blit(cr.pieces_sprite_dict[piece_name].transformed_surface, piece_rect)
+            cr.screen.blit(surface, piece_rect)
 
 
     def render_valid_moves( self ) :
@@ -352,7 +305,7 @@ class Game:
             if self.turn == 'black' :
                 name = name.lower()
 
-            surface = cr.pieces_sprite_dict[name].transformed_surface
+            surface = self.piece_surfaces[name]
             surface_rect = surface.get_rect()
             rect = self.promotion_panel_sections[index]
             surface_rect.center = rect.center
@@ -385,10 +338,14 @@ class Game:
             time_text = self.font.render(
                 f"Time: {int(time.time() - self.game_start_time)}s", True, (255, 255, 255)
             )
-        max_w = max(moves.get_width(), time_text.get_width())
+        lines = [moves, time_text]
+        score = self.get_evaluation()
+        if score is not None:
+            lines.append(self.font.render(f"Eval: {score / 100:+.2f}", True, (255, 255, 255)))
+        max_w = max(line.get_width() for line in lines)
         x = cr.screen.get_width() - max_w - 10
-        cr.screen.blit(moves, (x, 20))
-        cr.screen.blit(time_text, (x, 40))
+        for index, line in enumerate(lines):
+            cr.screen.blit(line, (x, 20 + index * 20))
 
     def render_history(self) -> None:
         rect = FRect(
@@ -397,11 +354,7 @@ class Game:
             self.board_rect.w / 2,
             self.board_rect.h / 2,
         )
-        pg.draw.rect(cr.screen, (200, 200, 220), rect)
-        moves_text = " ".join(self.moves_sequence)
-        # History panel text should also be visible against its dark background
-        txt = self.font.render(moves_text, True, (255, 255, 255))
-        cr.screen.blit(txt, rect.topleft)
+        self.history.draw(cr.screen, rect)
 
     def render_outcome(self) -> None:
         rect = cr.screen.get_rect().inflate(-100, -100)
@@ -418,7 +371,7 @@ class Game:
 
     def render( self ) :
         cr.screen.fill((0, 0, 0))
-        cr.screen.blit(self.board_sprite.transformed_surface, [0, 0])
+        cr.screen.blit(self.board_surface, [0, 0])
         self.render_checkers()
         self.render_valid_moves()
         self.render_pieces()
@@ -442,17 +395,28 @@ class Game:
 
         for i in range(x):
             try:
-                self.board.pop()
-                if len(self.moves_sequence):
-                    self.moves_sequence.pop(-1)
+                self.undo_move()
                 self.update_pieces_map()
             except IndexError:
                 ...
 
+    def move( self, uci ) :
+        before = self.board.copy(stack=False)
+        if not super().move(uci) :
+            return False
+        self.history.push(before.san(self.board.peek()))
+        return True
+
+    def undo_move(self) -> chess.Move:
+        move = super().undo_move()
+        self.history.pop()
+        return move
+
     def reset( self ):
         self.selected_piece = None
         self.moves_sequence.clear()
-        self.board.reset()
+        self.set_board(chess.Board())
+        self.history.set_moves([])
         self.update_pieces_map()
 
     def trigger_ai( self ):
@@ -478,23 +442,15 @@ class Game:
             state = GameState.load()
         except FileNotFoundError:
             return
-        self.board = chess.Board(state.fen)
+        self.set_board(chess.Board(state.fen))
         self.moves_sequence = state.moves
+        self.history.set_moves(self.moves_sequence)
         self.white_clock = state.white_clock
         self.black_clock = state.black_clock
         self.ai_is_active = state.bot
         self.update_pieces_map()
 
 
-    @property
-    def turn( self ) :
-        result = 'black'
-        if self.board.turn :
-            result = 'white'
-
-        return result
-
-
     @property
     def footer_rects(self):
         w = self.bottom_panel.w / len(self.footer_buttons)
@@ -511,45 +467,68 @@ class Game:
         return rects
 
     def ai_make_move( self ):
-        move = self.engine.get_best_move()
-        return self.move(move)
-
-    def move( self, uci ) :
-        if self.is_legal(uci) :
-            now = time.time()
-            if self.timed_play:
-                diff = now - self.last_move_time
-                if self.turn == "white":
-                    self.white_clock += diff
-                else:
-                    self.black_clock += diff
-            self.board.push_uci(uci)
-            self.moves_sequence.append(uci)
-            self.last_move_time = now
-            self.check_game_over()
-            return True
-
-        return False
-
-
-    def is_legal( self, uci ) :
-        if self.is_promotion(uci) :
-            uci += 'q'
+        """ Ask the scheduler for a bot move, and play it once the engine replied """
+        fen = self.board.fen()
+        if self.pending_bot_move is None or self.pending_bot_move[0] != fen:
+            difficulty = self.difficulty
+            limit = difficulty.limit()
+            timeout = difficulty.max_latency
+            if self.remaining_time(self.ai_color) is not None:
+                limit = self.time_manager.limit(
+                    self.board.turn, self.remaining_time("white"), self.remaining_time("black"),
+                    self.increment, difficulty.nodes,
+                )
+                # The clock may shorten the tier's reply time, never lengthen it
+                timeout = min(timeout, max(0.01, self.remaining_time(self.ai_color) - self.time_manager.move_overhead))
+            future = self.scheduler.submit_move(self.board, limit, timeout=timeout, options=difficulty.options())
+            self.pending_bot_move = (fen, future)
+            return False
 
-        return chess.Move.from_uci(uci) in self.board.legal_moves
+        future = self.pending_bot_move[1]
+        if not future.done():
+            return False
 
-    def get_current_clocks(self) -> tuple[float, float]:
-        """Return the current white and black times including the ongoing move."""
-        white = self.white_clock
-        black = self.black_clock
+        self.pending_bot_move = None
+        try:
+            move = future.result()
+        except Exception as error:
+            log.warning("Bot move failed: %s", error)
+            return False
+        if move is None:
+            return False
         if self.timed_play:
-            diff = time.time() - self.last_move_time
-            if self.turn == "white":
-                white += diff
-            else:
-                black += diff
-        return white, black
+            self.time_manager.record(time.time() - self.last_move_time)
+        return self.move(move.uci())
 
+    def request_evaluation( self ):
+        if self.scheduler is None:
+            return
+        fen = self.board.fen()
+        if self.pending_evaluation is not None:
+            if self.pending_evaluation[0] == fen:
+                return
+            self.pending_evaluation[1].cancel()
+        self.evaluation = None
+        self.pending_evaluation = (fen, self.scheduler.submit_analysis(self.board))
+
+    def get_evaluation( self ) -> Optional[int]:
+        """ Latest evaluation of the current position in centipawns, from White's side """
+        if self.evaluation is None and self.pending_evaluation is not None:
+            fen, future = self.pending_evaluation
+            if future.done() and not future.cancelled() and fen == self.board.fen():
+                if future.exception() is None:
+                    score = future.result()["score"]
+                    if score is not None:
+                        self.evaluation = score if self.board.turn else -score
+        return self.evaluation
+
+    def close( self ):
+        if self.time_manager.used:
+            log.info("Bot time per move: %s", self.time_manager.metrics())
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        if self.engine is not None:
+            self.engine.quit()
 
     def fill_selected_piece_valid_moves( self ) :
         self.selected_piece_valid_moves.clear()
@@ -593,32 +572,6 @@ class Game:
         return result
 
 
-    def is_promotion( self, uci ) :
-        # Check if move is a pawn promotion
-        piece = self.pieces_map[uci[:2]]
-        destination = uci[3 :]
-
-        return (piece == 'P' and destination =='8') or (piece=='p' and destination=='1')
-
-    def check_game_over(self) -> None:
-        if self.board.is_game_over():
-            result = self.board.result()
-            if result == "1-0":
-                self.outcome_message = "White wins"
-            elif result == "0-1":
-                self.outcome_message = "Black wins"
-            else:
-                self.outcome_message = "Draw"
-
-    def check_time_loss(self) -> None:
-        if not self.timed_play or self.time_limit is None:
-            return
-        w, b = self.get_current_clocks()
-        if w >= self.time_limit:
-            self.outcome_message = "Black wins on time"
-        elif b >= self.time_limit:
-            self.outcome_message = "White wins on time"
-
     def get_outcome_button_rects(self) -> list[tuple[FRect, str]]:
         rect = cr.screen.get_rect().inflate(-100, -100)
         btn_w = rect.w / 3 - 10
@@ -640,43 +593,41 @@ class Game:
                 elif name == "Save":
                     self.save_pgn()
 
-    def save_pgn(self, path: str = "saved_game.pgn") -> None:
-        game = chess.pgn.Game()
-        node = game
-        board = chess.Board()
-        for move in self.moves_sequence:
-            mv = chess.Move.from_uci(move)
-            node = node.add_variation(mv)
-            board.push(mv)
-        result = board.result()
-        game.headers["Result"] = result
-        with open(path, "w", encoding="utf-8") as fh:
-            print(game, file=fh, end="\n")
-
 
 class MenuState:
     """Simple start menu."""
 
-    def __init__(self):
+    def __init__(self, engine_profile: Optional[str] = None, difficulty: str = DEFAULT_DIFFICULTY):
         self.font = pg.font.Font("assets/fonts/english/lazy.ttf", 30)
         self.options = [
             "Play vs Bot",
             "Play vs Human",
             "Play on time",
             "Analyze Game",
+            "Bot",
+            "Engine",
             "Exit",
         ]
+        self.difficulty = difficulty
+        # None lets each mode use its own default profile
+        self.engine_profile = engine_profile
+        self.profile_options = [None, *PROFILES]
         self.color_options = ["White", "Black"]
-        self.time_options = [("1m", 60), ("3m", 180), ("10m", 600), ("1h", 3600)]
+        # (label, clock in seconds, increment per move in seconds)
+        self.time_options = [("1m", 60, 0), ("3m", 180, 0), ("3+2", 180, 2), ("10m", 600, 0), ("10+5", 600, 5),
+                             ("1h", 3600, 0)]
 
-    def run(self) -> Optional[tuple[str, Optional[str], Optional[int]]]:
+    def run(self) -> Optional[tuple[str, Optional[str], Optional[int], float]]:
+        """(mode, colour, time limit, increment), or None once the window is closed."""
         choosing_color = False
         choosing_time = False
         time_limit: Optional[int] = None
+        increment = 0.0
         while not cr.event_holder.should_quit:
             cr.event_holder.get_events()
             if cr.event_holder.should_quit:
                 return None
+            cr.profiler.check(cr.event_holder.pressed_keys)
             click = cr.event_holder.mouse_pressed_keys[0]
             cr.screen.fill((30, 30, 30))
             rects = []
@@ -684,26 +635,38 @@ class MenuState:
                 items = [t[0] for t in self.time_options]
             elif choosing_color:
                 items = self.color_options
+                if time_limit is not None:
+                    items = items + ["Two players"]
             else:
                 items = self.options
             for i, text in enumerate(items):
-                surf = self.font.render(text, True, (255, 255, 255))
+                label = text
+                if text == "Bot":
+                    label = f"Bot: {self.difficulty}"
+                elif text == "Engine":
+                    label = f"Engine: {self.engine_profile or 'auto'}"
+                surf = self.font.render(label, True, (255, 255, 255))
                 r = surf.get_rect(
                     center=(cr.screen.get_width() / 2, cr.screen.get_height() / 2 + i * 50)
                 )
                 rects.append((r, text))
                 cr.screen.blit(surf, r)
+            cr.profiler.draw(cr.screen)
             pg.display.update()
             if click:
                 for r, text in rects:
                     if r.collidepoint(cr.event_holder.mouse_pos):
                         if choosing_time:
-                            for label, seconds in self.time_options:
+                            for label, seconds, extra in self.time_options:
                                 if label == text:
-                                    time_limit = seconds
-                                    return ("human", None, time_limit)
+                                    time_limit, increment = seconds, extra
+                                    choosing_time = False
+                                    choosing_color = True
+                            break
                         elif choosing_color:
-                            return ("bot", text.lower(), None)
+                            if text == "Two players":
+                                return ("human", None, time_limit, increment)
+                            return ("bot", text.lower(), time_limit, increment)
                         if text == "Exit":
                             cr.event_holder.should_quit = True
                             return None
@@ -711,11 +674,19 @@ class MenuState:
                             choosing_color = True
                             break
                         if text == "Play vs Human":
-                            return ("human", None, None)
+                            return ("human", None, None, 0.0)
                         if text == "Play on time":
                             choosing_time = True
                             break
                         if text == "Analyze Game":
-                            return ("analyzer", None, None)
+                            return ("analyzer", None, None, 0.0)
+                        if text == "Bot":
+                            tiers = list(TIERS)
+                            self.difficulty = tiers[(tiers.index(self.difficulty) + 1) % len(tiers)]
+                            break
+                        if text == "Engine":
+                            index = self.profile_options.index(self.engine_profile)
+                            self.engine_profile = self.profile_options[(index + 1) % len(self.profile_options)]
+                            break
                 
         return None
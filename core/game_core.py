@@ -0,0 +1,170 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import chess
+import chess.pgn
+
+from core.outcome_tracker import OutcomeTracker
+from game_archive import ArchiveWriter
+
+GAMES_ARCHIVE = "saved_games.lca"
+
+
+@dataclass
+class GameState:
+    fen: str
+    white_clock: float
+    black_clock: float
+    bot: bool
+    moves: list
+
+    def save(self, path: str = "saved_game.json") -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.__dict__, fh)
+
+    @classmethod
+    def load(cls, path: str = "saved_game.json") -> "GameState":
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        return cls(**data)
+
+
+class GameCore:
+    """
+    Move, clock and outcome rules of a game without any window or engine,
+    so the same logic drives the pygame client and headless sessions.
+    """
+
+    def __init__(self, ai_color: str = "black", timed_play: bool = False, time_limit: Optional[int] = None,
+                 increment: float = 0.0):
+        self.moves_sequence = []
+        self.timed_play = timed_play
+        self.ai_color = ai_color
+        self.last_move_time = time.time()
+        self.white_clock = 0.0
+        self.black_clock = 0.0
+        self.time_limit = time_limit
+        self.increment = increment  # seconds given back to a player's clock after each move
+        self.game_start_time = time.time()
+        self.outcome_message: Optional[str] = None
+        self.board = chess.Board()
+        self.outcome_tracker = OutcomeTracker(self.board)
+
+    @property
+    def turn( self ) :
+        result = 'black'
+        if self.board.turn :
+            result = 'white'
+
+        return result
+
+    def move( self, uci ) :
+        if self.is_legal(uci) :
+            move = self.board.parse_uci(uci)
+            now = time.time()
+            if self.timed_play:
+                diff = now - self.last_move_time - self.increment
+                if self.turn == "white":
+                    self.white_clock += diff
+                else:
+                    self.black_clock += diff
+            self.outcome_tracker.push(move)
+            self.moves_sequence.append(uci)
+            self.last_move_time = now
+            self.check_game_over()
+            return True
+
+        return False
+
+    def is_legal( self, uci ) :
+        if self.is_promotion(uci) :
+            uci += 'q'
+
+        return self.outcome_tracker.is_legal(chess.Move.from_uci(uci))
+
+    def undo_move(self) -> chess.Move:
+        """Take back the last move; IndexError when there is none."""
+        move = self.outcome_tracker.pop()
+        if self.moves_sequence:
+            self.moves_sequence.pop()
+        return move
+
+    def set_board(self, board: chess.Board) -> None:
+        """Replace the board, e.g. after loading or resetting a game."""
+        self.board = board
+        self.outcome_tracker.reset(board)
+
+    def is_promotion( self, uci ) :
+        # Check if move is a pawn promotion
+        piece = self.board.piece_at(chess.parse_square(uci[:2]))
+        destination = uci[3 :]
+
+        return piece is not None and piece.piece_type == chess.PAWN and (
+            (piece.color == chess.WHITE and destination == '8')
+            or (piece.color == chess.BLACK and destination == '1'))
+
+    def get_current_clocks(self) -> tuple[float, float]:
+        """Return the current white and black times including the ongoing move."""
+        white = self.white_clock
+        black = self.black_clock
+        if self.timed_play:
+            diff = time.time() - self.last_move_time
+            if self.turn == "white":
+                white += diff
+            else:
+                black += diff
+        return white, black
+
+    def remaining_time(self, color: str) -> Optional[float]:
+        """Seconds left on `color`'s clock in a timed game, None otherwise."""
+        if not self.timed_play or self.time_limit is None:
+            return None
+        white, black = self.get_current_clocks()
+        return max(0.0, self.time_limit - (white if color == "white" else black))
+
+    def check_game_over(self) -> None:
+        outcome = self.outcome_tracker.outcome()
+        if outcome is not None:
+            result = outcome.result()
+            if result == "1-0":
+                self.outcome_message = "White wins"
+            elif result == "0-1":
+                self.outcome_message = "Black wins"
+            else:
+                self.outcome_message = "Draw"
+
+    def check_time_loss(self) -> None:
+        if not self.timed_play or self.time_limit is None:
+            return
+        w, b = self.get_current_clocks()
+        if w >= self.time_limit:
+            self.outcome_message = "Black wins on time"
+        elif b >= self.time_limit:
+            self.outcome_message = "White wins on time"
+
+    def pgn_game(self) -> chess.pgn.Game:
+        game = chess.pgn.Game()
+        node = game
+        board = chess.Board()
+        for move in self.moves_sequence:
+            mv = chess.Move.from_uci(move)
+            node = node.add_variation(mv)
+            board.push(mv)
+        result = board.result()
+        if self.outcome_message == "White wins on time":
+            result = "1-0"
+        elif self.outcome_message == "Black wins on time":
+            result = "0-1"
+        game.headers["Result"] = result
+        return game
+
+    def save_pgn(self, path: str = "saved_game.pgn", archive: Optional[str] = GAMES_ARCHIVE) -> None:
+        """Write the game as PGN and append it to the compact game archive."""
+        game = self.pgn_game()
+        with open(path, "w", encoding="utf-8") as fh:
+            print(game, file=fh, end="\n")
+        if archive is not None:
+            with ArchiveWriter(archive) as writer:
+                writer.write(game)
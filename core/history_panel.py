@@ -0,0 +1,115 @@
+from typing import Optional
+
+import chess
+import pygame as pg
+
+
+class HistoryPanel:
+    """
+    Moves of the game as numbered SAN rows ("12. Nf3 Nc6"), scrollable.
+    Each row is rendered to its own surface the first time it is shown and
+    kept; a frame only blits the rows inside the panel. Playing or taking
+    back a move touches the last row alone.
+    """
+
+    background = (200, 200, 220)
+    text_color = (40, 40, 60)
+    number_color = (110, 110, 140)
+    padding = 6
+
+    def __init__(self, font: pg.font.Font):
+        self.font = font
+        self.row_height = font.get_linesize()
+        self.sans: list[str] = []
+        self.rows: list[Optional[pg.Surface]] = []  # None until the row is drawn
+        self.scroll = 0  # first visible row
+        self.follow = True  # keep the newest move in view
+        self.visible_rows = 1
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def push(self, san: str) -> None:
+        self.sans.append(san)
+        if len(self.sans) % 2 == 1:
+            self.rows.append(None)
+        else:
+            self.rows[-1] = None  # Black's move joins White's row
+        if self.follow:
+            self.scroll_to_end()
+
+    def pop(self) -> None:
+        if not self.sans:
+            return
+        self.sans.pop()
+        if len(self.sans) % 2 == 0:
+            self.rows.pop()
+        else:
+            self.rows[-1] = None
+        self.scroll = min(self.scroll, self.max_scroll)
+
+    def set_moves(self, moves: list[str], board: Optional[chess.Board] = None) -> None:
+        """Replace the whole history with `moves` in UCI, played from `board`."""
+        board = board.copy() if board is not None else chess.Board()
+        self.sans.clear()
+        self.rows.clear()
+        for uci in moves:
+            move = chess.Move.from_uci(uci)
+            if not board.is_legal(move):
+                break
+            self.sans.append(board.san(move))
+            board.push(move)
+        self.rows = [None] * ((len(self.sans) + 1) // 2)
+        self.follow = True
+        self.scroll_to_end()
+
+    def row_text(self, index: int) -> tuple[str, str]:
+        return f"{index + 1}.", " ".join(self.sans[2 * index:2 * index + 2])
+
+    def render_row(self, index: int) -> pg.Surface:
+        surface = self.rows[index]
+        if surface is None:
+            number, moves = self.row_text(index)
+            number_surface = self.font.render(number, True, self.number_color)
+            moves_surface = self.font.render(moves, True, self.text_color)
+            width = self.font.size("999.")[0] + self.padding
+            surface = pg.Surface((width + moves_surface.get_width(), self.row_height), pg.SRCALPHA)
+            surface.blit(number_surface, (0, 0))
+            surface.blit(moves_surface, (width, 0))
+            self.rows[index] = surface
+        return surface
+
+    @property
+    def max_scroll(self) -> int:
+        return max(0, len(self.rows) - self.visible_rows)
+
+    def scroll_by(self, rows: int) -> None:
+        self.scroll = max(0, min(self.max_scroll, self.scroll + rows))
+        self.follow = self.scroll == self.max_scroll
+
+    def scroll_to_end(self) -> None:
+        self.scroll = self.max_scroll
+
+    def draw(self, surface: pg.Surface, rect: pg.FRect) -> None:
+        pg.draw.rect(surface, self.background, rect)
+        visible = max(1, int((rect.h - 2 * self.padding) // self.row_height))
+        if visible != self.visible_rows:
+            self.visible_rows = visible
+            if self.follow:
+                self.scroll_to_end()
+            self.scroll = min(self.scroll, self.max_scroll)
+
+        previous_clip = surface.get_clip()
+        surface.set_clip(rect)
+        y = rect.y + self.padding
+        for index in range(self.scroll, min(len(self.rows), self.scroll + visible)):
+            surface.blit(self.render_row(index), (rect.x + self.padding, y))
+            y += self.row_height
+        surface.set_clip(previous_clip)
+
+        if self.max_scroll:
+            # Scroll bar: where the visible rows sit in the whole history
+            track = rect.h - 2 * self.padding
+            thumb_h = max(8, track * visible / len(self.rows))
+            thumb_y = rect.y + self.padding + (track - thumb_h) * self.scroll / self.max_scroll
+            pg.draw.rect(surface, self.number_color, (rect.right - 6, thumb_y, 3, thumb_h))
@@ -0,0 +1,167 @@
+import gzip
+import struct
+import time
+
+import pygame as pg
+from pygame.locals import *
+
+from core.event_holder import EventHolder, Frame
+
+MAGIC = b"LCREC1"
+FRAME = struct.Struct("<dhhBBH")  # time, mouse x, mouse y, buttons, focused, event count
+EVENT = struct.Struct("<Hihh")  # type, key/button/buttons/wheel flipped, x or width, y or height
+
+
+def _clamp( value ) :
+    return max(-32768, min(32767, int(value)))
+
+
+def _buttons_mask( buttons ) :
+    mask = 0
+    for index, pressed in enumerate(buttons) :
+        if pressed :
+            mask |= 1 << index
+    return mask
+
+
+def _mask_buttons( mask, count = 3 ) :
+    return tuple(bool(mask & (1 << index)) for index in range(count))
+
+
+def encode_event( event ) -> bytes:
+    code, x, y = 0, 0, 0
+    if event.type in (KEYDOWN, KEYUP) :
+        code = event.key
+    elif event.type in (MOUSEBUTTONDOWN, MOUSEBUTTONUP) :
+        code = event.button
+        x, y = event.pos
+    elif event.type == MOUSEMOTION :
+        code = _buttons_mask(event.buttons)
+        x, y = event.pos
+    elif event.type == MOUSEWHEEL :
+        code = int(getattr(event, "flipped", False))
+        x, y = event.x, event.y
+    elif event.type in (VIDEORESIZE, WINDOWSIZECHANGED) :
+        x, y = event.w, event.h
+    return EVENT.pack(event.type, code, _clamp(x), _clamp(y))
+
+
+def decode_event( event_type, code, x, y ) :
+    if event_type in (KEYDOWN, KEYUP) :
+        return pg.event.Event(event_type, key=code, mod=0, unicode="", scancode=0)
+    if event_type in (MOUSEBUTTONDOWN, MOUSEBUTTONUP) :
+        return pg.event.Event(event_type, button=code, pos=(x, y))
+    if event_type == MOUSEMOTION :
+        return pg.event.Event(event_type, pos=(x, y), rel=(0, 0), buttons=_mask_buttons(code))
+    if event_type == MOUSEWHEEL :
+        return pg.event.Event(event_type, x=x, y=y, flipped=bool(code), precise_x=float(x), precise_y=float(y))
+    if event_type == VIDEORESIZE :
+        return pg.event.Event(event_type, w=x, h=y, size=(x, y))
+    if event_type == WINDOWSIZECHANGED :
+        return pg.event.Event(event_type, x=x, y=y, w=x, h=y)
+    return pg.event.Event(event_type)
+
+
+class InputRecorder(EventHolder) :
+    """
+    An EventHolder that also writes every frame it reads (events, mouse
+    position, buttons and a timestamp) to a gzip-compressed binary file.
+    """
+
+    def __init__( self, path ) :
+        super().__init__()
+        self.file = gzip.open(path, "wb")
+        self.file.write(MAGIC)
+        self.start = time.perf_counter()
+
+    def read_frame( self ) -> Frame:
+        frame = super().read_frame()
+        self.write_frame(frame)
+        return frame
+
+    def write_frame( self, frame: Frame ) :
+        self.file.write(FRAME.pack(
+            frame.time - self.start,
+            _clamp(frame.mouse_pos[0]),
+            _clamp(frame.mouse_pos[1]),
+            _buttons_mask(frame.mouse_buttons),
+            frame.focused,
+            len(frame.events),
+        ))
+        for event in frame.events :
+            self.file.write(encode_event(event))
+
+    def close( self ) :
+        self.file.close()
+
+    def __enter__( self ) :
+        return self
+
+    def __exit__( self, *exc ) :
+        self.close()
+
+
+def load_frames( path ) -> list[Frame]:
+    with gzip.open(path, "rb") as fh :
+        data = fh.read()
+    if not data.startswith(MAGIC) :
+        raise ValueError(f"{path} is not an input recording")
+
+    frames = []
+    offset = len(MAGIC)
+    while offset < len(data) :
+        t, x, y, mask, focused, count = FRAME.unpack_from(data, offset)
+        offset += FRAME.size
+        events = []
+        for _ in range(count) :
+            events.append(decode_event(*EVENT.unpack_from(data, offset)))
+            offset += EVENT.size
+        frames.append(Frame(t, events, (x, y), _mask_buttons(mask), bool(focused)))
+    return frames
+
+
+class ReplayEventHolder(EventHolder) :
+    """
+    Feeds a recording back through the normal EventHolder processing and
+    measures how long the program took between consecutive frames. Asks
+    the program to quit once the recording is exhausted.
+    """
+
+    def __init__( self, path ) :
+        super().__init__()
+        self.frames = load_frames(path)
+        self.index = 0
+        self.frame_times = []
+        self.started = None
+        self.last_frame = None
+
+    def read_frame( self ) -> Frame:
+        now = time.perf_counter()
+        if self.started is None :
+            self.started = now
+        else :
+            self.frame_times.append(now - self.last_frame)
+        self.last_frame = now
+
+        if self.index >= len(self.frames) :
+            self.should_quit = True
+            return Frame(now, [], tuple(self.mouse_pos), tuple(self.mouse_held_keys), self.mouse_focus)
+
+        frame = self.frames[self.index]
+        self.index += 1
+        return frame
+
+    def report( self ) -> dict:
+        times = sorted(self.frame_times)
+        if not times :
+            return {"frames": 0}
+        recorded = self.frames[-1].time - self.frames[0].time if self.frames else 0.0
+        return {
+            "frames": len(times),
+            "total_s": sum(times),
+            "recorded_s": recorded,
+            "mean_ms": 1000 * sum(times) / len(times),
+            "p50_ms": 1000 * times[len(times) // 2],
+            "p95_ms": 1000 * times[min(len(times) - 1, int(len(times) * 0.95))],
+            "max_ms": 1000 * times[-1],
+        }
@@ -0,0 +1,45 @@
+from pygame.rect import FRect
+
+
+class Layout :
+    """
+    Geometry of the game screen computed from the window size alone. Every
+    rectangle the game draws or hit-tests comes from here, so a resize only
+    needs a new Layout.
+    """
+
+    def __init__( self, screen_size, board_json_rect, board_raw_size ) :
+        w, h = screen_size
+        self.screen_rect = FRect(0, 0, w, h)
+
+        # The board image is square and as large as the window allows
+        self.board_size = max(8, min(w, h))
+        m = self.board_size / board_raw_size[0]
+        x, y, bw, bh = board_json_rect
+        self.board_rect = FRect(x * m, y * m, bw * m + 1, bh * m + 1)
+
+        self.tile_w = self.board_rect.w / 8
+        self.tile_h = self.board_rect.h / 8
+        self.board_map = {}
+        for col, letter in enumerate('abcdefgh') :
+            for row, digit in enumerate('87654321') :
+                self.board_map[letter + digit] = FRect(
+                    self.board_rect.x + col * self.tile_w,
+                    self.board_rect.y + row * self.tile_h,
+                    self.tile_w,
+                    self.tile_h,
+                )
+
+        self.promotion_panel = FRect(0, 0, self.board_rect.w / 2, self.board_rect.h / 8)
+        self.promotion_panel.center = self.screen_rect.center
+        self.promotion_panel_sections = [
+            FRect(self.promotion_panel.x + i * self.tile_w, self.promotion_panel.y, self.tile_w, self.promotion_panel.h)
+            for i in range(4)
+        ]
+
+        # The footer starts just below the window and slides in on hover
+        self.bottom_panel = FRect(0, h, w, h * 0.05)
+
+    @property
+    def size( self ) :
+        return int(self.screen_rect.w), int(self.screen_rect.h)
@@ -0,0 +1,90 @@
+from collections import Counter
+from typing import Optional
+
+import chess
+import chess.polyglot
+
+
+class OutcomeTracker:
+    """
+    Follows a board move by move and answers board.outcome() without
+    replaying the move stack: positions are counted by key on push/pop,
+    and whether the current position has any legal move is worked out at
+    most once, shared by legality checks and mate/stalemate detection.
+    """
+
+    @staticmethod
+    def _key(board: chess.Board) -> int:
+        # Pieces, side to move, castling rights and en passant, like a repetition check
+        return chess.polyglot.zobrist_hash(board)
+
+    def __init__(self, board: chess.Board):
+        self.reset(board)
+
+    def reset(self, board: chess.Board) -> None:
+        self.board = board
+        self._legal_moves: Optional[set[chess.Move]] = None
+        self._has_legal_moves: Optional[bool] = None
+        # One replay of whatever history the board already has
+        replay = board.root()
+        self.keys = [self._key(replay)]
+        for move in board.move_stack:
+            replay.push(move)
+            self.keys.append(self._key(replay))
+        self.counts = Counter(self.keys)
+
+    def push(self, move: chess.Move) -> None:
+        self.board.push(move)
+        key = self._key(self.board)
+        self.keys.append(key)
+        self.counts[key] += 1
+        self._legal_moves = None
+        self._has_legal_moves = None
+
+    def pop(self) -> chess.Move:
+        move = self.board.pop()  # IndexError on an empty stack, like the board
+        key = self.keys.pop()
+        self.counts[key] -= 1
+        if not self.counts[key]:
+            del self.counts[key]
+        self._legal_moves = None
+        self._has_legal_moves = None
+        return move
+
+    @property
+    def legal_moves(self) -> set[chess.Move]:
+        """All legal moves of the current position, generated once."""
+        if self._legal_moves is None:
+            self._legal_moves = set(self.board.legal_moves)
+            self._has_legal_moves = bool(self._legal_moves)
+        return self._legal_moves
+
+    def is_legal(self, move: chess.Move) -> bool:
+        return move in self.legal_moves
+
+    def has_legal_moves(self) -> bool:
+        if self._has_legal_moves is None:
+            self._has_legal_moves = any(self.board.generate_legal_moves())
+        return self._has_legal_moves
+
+    def repetitions(self) -> int:
+        """How often the current position has occurred, this time included."""
+        return self.counts[self.keys[-1]]
+
+    def can_claim_threefold(self) -> bool:
+        return self.repetitions() >= 3
+
+    def outcome(self) -> Optional[chess.Outcome]:
+        """Same result as board.outcome() (no draw claims), in constant time."""
+        board = self.board
+        if not self.has_legal_moves() and board.is_check():
+            return chess.Outcome(chess.Termination.CHECKMATE, not board.turn)
+        if board.is_insufficient_material():
+            return chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+        if not self.has_legal_moves():
+            return chess.Outcome(chess.Termination.STALEMATE, None)
+        if board.halfmove_clock >= 150:
+            return chess.Outcome(chess.Termination.SEVENTYFIVE_MOVES, None)
+        if self.repetitions() >= 5:
+            return chess.Outcome(chess.Termination.FIVEFOLD_REPETITION, None)
+        return None
@@ -0,0 +1,119 @@
+import cProfile
+import logging
+import os
+import time
+import tracemalloc
+from typing import Optional
+
+import pygame as pg
+
+log = logging.getLogger(__name__)
+
+
+class Profiler:
+    """
+    CPU (cProfile) and memory (tracemalloc) recording of the main loop,
+    toggled with a hotkey or started from the command line. A recording
+    ends when the key is pressed again or its time window runs out, and
+    leaves two timestamped files: the pstats dump and a report of the top
+    allocation sites. Only the thread that started it is CPU-profiled.
+    """
+
+    hotkey = pg.K_F9
+    top_allocations = 25
+    indicator_color = (220, 40, 40)
+
+    def __init__(self, output_dir: str = "profiles", window: Optional[float] = 10.0):
+        self.output_dir = output_dir
+        self.window = window  # seconds a recording lasts; None until stopped by hand
+        self.profile: Optional[cProfile.Profile] = None
+        self.started = 0.0
+        self.deadline: Optional[float] = None
+        self.last_files: tuple[str, str] = ("", "")
+        self.recordings = 0
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._owns_tracemalloc = False
+        self._font: Optional[pg.font.Font] = None
+
+    @property
+    def recording(self) -> bool:
+        return self.profile is not None
+
+    def start(self, window: Optional[float] = None) -> None:
+        if self.recording:
+            return
+        window = window if window is not None else self.window
+        self.started = time.perf_counter()
+        self.deadline = self.started + window if window else None
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start(10)
+        self._baseline = tracemalloc.take_snapshot()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        log.info("Profiling started (%s)", f"{window:g}s" if window else "until stopped")
+
+    def stop(self) -> tuple[str, str]:
+        """Finish the recording; returns the pstats and allocation report paths."""
+        if not self.recording:
+            return self.last_files
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Milliseconds and a per-run counter keep quick successive recordings apart
+        now = time.time()
+        self.recordings += 1
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}-{self.recordings}"
+        stats_path = os.path.join(self.output_dir, f"lazychess-{stamp}.pstats")
+        memory_path = os.path.join(self.output_dir, f"lazychess-{stamp}-memory.txt")
+        self.profile.dump_stats(stats_path)
+        self.write_allocations(memory_path, snapshot)
+
+        self.profile = None
+        self._baseline = None
+        self.last_files = (stats_path, memory_path)
+        log.info("Profile written to %s and %s", stats_path, memory_path)
+        return self.last_files
+
+    def write_allocations(self, path: str, snapshot: tracemalloc.Snapshot) -> None:
+        ignored = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+        snapshot = snapshot.filter_traces(ignored)
+        baseline = self._baseline.filter_traces(ignored)
+        with open(path, "w", encoding="utf-8") as fh:
+            print(f"Recorded {time.perf_counter() - self.started:.1f}s", file=fh)
+            print(f"\nTop {self.top_allocations} allocation sites (live at the end):", file=fh)
+            for stat in snapshot.statistics("lineno")[:self.top_allocations]:
+                print(f"  {stat}", file=fh)
+            print(f"\nTop {self.top_allocations} growth during the recording:", file=fh)
+            for stat in snapshot.compare_to(baseline, "lineno")[:self.top_allocations]:
+                print(f"  {stat}", file=fh)
+
+    def toggle(self) -> None:
+        if self.recording:
+            self.stop()
+        else:
+            self.start()
+
+    def check(self, pressed_keys) -> None:
+        """Call once a frame with the keys pressed in it."""
+        if self.hotkey in pressed_keys:
+            self.toggle()
+        elif self.recording and self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stop()
+
+    def draw(self, surface: pg.Surface) -> None:
+        """Small "REC" marker in the top-left corner while recording."""
+        if not self.recording:
+            return
+        if self._font is None:
+            self._font = pg.font.Font("assets/fonts/english/lazy.ttf", 16)
+        pg.draw.circle(surface, self.indicator_color, (14, 14), 6)
+        text = self._font.render(f"REC {time.perf_counter() - self.started:.0f}s", True, self.indicator_color)
+        surface.blit(text, (24, 14 - text.get_height() // 2))
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import pygame as pg
 
 class Sprite:
@@ -5,11 +7,16 @@ class Sprite:
      this class is usefull when you have an original image that is 
      continuously being transformed. it holds both the new Surface, and the 
      original Surface.
+     scaled copies are kept in a small LRU cache keyed by size, so going back
+     to a recent size (e.g. while the window is being resized) costs nothing.
     """
-    
+
+    cache_size = 8
+
     def __init__(self,path:str):
         self.raw_surface  = pg.image.load(path)
         self.transformed_surface = self.raw_surface.copy()
+        self.scaled_cache = OrderedDict()
 
     def get_diff( self ):
         a = self.raw_surface.get_size()
@@ -17,19 +24,32 @@ class Sprite:
 
         return [b[0]/a[0],b[1]/a[1]]
 
+    def scaled( self,new_w,new_h ) -> pg.Surface:
+        size = (max(1, int(new_w)), max(1, int(new_h)))
+        surface = self.scaled_cache.get(size)
+        if surface is None:
+            surface = pg.transform.scale(self.raw_surface,size)
+            self.scaled_cache[size] = surface
+            if len(self.scaled_cache) > self.cache_size:
+                self.scaled_cache.popitem(last=False)
+        else:
+            self.scaled_cache.move_to_end(size)
 
-    def transform( self,new_w,new_h ):
-        self.transformed_surface = pg.transform.scale(self.raw_surface,(new_w,new_h))
+        return surface
 
-    def transform_by_height( self,new_h ):
+    def scaled_by_height( self,new_h ) -> pg.Surface:
         current_h = self.raw_surface.get_height()
-        new_w = self.raw_surface.get_width() * (new_h / current_h)
+        return self.scaled(self.raw_surface.get_width() * (new_h / current_h),new_h)
 
-        self.transformed_surface = pg.transform.scale(self.raw_surface,(new_w,new_h))
+    def scaled_by_rel( self,rel_x,rel_y ) -> pg.Surface:
+        w,h = self.raw_surface.get_size()
+        return self.scaled(w * rel_x,h * rel_y)
 
-    def transform_by_rel( self,rel_x,rel_y ):
-        new_w,new_h = self.raw_surface.get_size()
-        new_w *= rel_x
-        new_h *= rel_y
+    def transform( self,new_w,new_h ):
+        self.transformed_surface = self.scaled(new_w,new_h)
 
-        self.transformed_surface = pg.transform.scale(self.raw_surface,(new_w,new_h))
+    def transform_by_height( self,new_h ):
+        self.transformed_surface = self.scaled_by_height(new_h)
+
+    def transform_by_rel( self,rel_x,rel_y ):
+        self.transformed_surface = self.scaled_by_rel(rel_x,rel_y)
@@ -0,0 +1,177 @@
+"""
+PNG diagrams of chess positions, drawn headless with the game's own board
+and piece sprites. Many positions are rendered in parallel worker
+processes, and every image is stored under a hash of what it shows, so a
+position that was drawn once is never drawn again.
+
+    python diagram_renderer.py saved_game.pgn              # every position
+    python diagram_renderer.py saved_game.pgn --critical   # mistakes only, after a review
+"""
+import argparse
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Iterable, Optional
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import chess
+import pygame as pg
+
+import core.common_resources as cr
+from core import assets
+from core.layout import Layout
+
+DEFAULT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "diagrams")
+DEFAULT_SIZE = 384  # three times the board image, so the pixel art stays sharp
+RENDER_VERSION = 1  # bump when the drawing changes, so old cache entries are not reused
+HIGHLIGHT_COLOR = (150, 200, 150, 140)
+PARALLEL_THRESHOLD = 8  # fewer missing diagrams than this are drawn in-process
+
+
+def _asset_digest() -> str:
+    """Hash of the sprites, so new artwork invalidates the cache too."""
+    digest = hashlib.sha1()
+    for folder in (assets.pieces_root, assets.boards_root):
+        for name in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, name), "rb") as fh:
+                digest.update(name.encode() + fh.read())
+    return digest.hexdigest()[:12]
+
+
+def render_diagram(board_fen: str, size: int = DEFAULT_SIZE, flipped: bool = False,
+                   highlight: Optional[str] = None) -> pg.Surface:
+    """
+    One position as a surface. `board_fen` is the piece placement part of a
+    FEN; `highlight` is a move in UCI whose squares are tinted.
+    """
+    board_sprite = cr.boards_sprite_dict["classic_board"]
+    layout = Layout((size, size), cr.boards_json_dict["classic_board"]["board_rect"],
+                    board_sprite.raw_surface.get_size())
+    surface = pg.Surface((size, size), pg.SRCALPHA)
+    surface.blit(board_sprite.scaled(layout.board_size, layout.board_size), (0, 0))
+
+    def tile(square: chess.Square) -> pg.FRect:
+        return layout.board_map[chess.square_name(63 - square if flipped else square)]
+
+    if highlight:
+        move = chess.Move.from_uci(highlight)
+        tint = pg.Surface((int(layout.tile_w), int(layout.tile_h)), pg.SRCALPHA)
+        tint.fill(HIGHLIGHT_COLOR)
+        for square in (move.from_square, move.to_square):
+            surface.blit(tint, tile(square).topleft)
+
+    tallest = max(sprite.raw_surface.get_height() for sprite in cr.pieces_sprite_dict.values())
+    scale = layout.tile_h / tallest
+    for square, piece in chess.BaseBoard(board_fen).piece_map().items():
+        image = cr.pieces_sprite_dict[piece.symbol()].scaled_by_rel(scale, scale)
+        rect = image.get_rect()
+        rect.center = tile(square).center
+        surface.blit(image, rect)
+    return surface
+
+
+def _render_to_file(job: tuple) -> str:
+    path, board_fen, size, flipped, highlight = job
+    surface = render_diagram(board_fen, size, flipped, highlight)
+    # Written under a temporary name first, so a reader never sees half a PNG
+    temporary = f"{path}.{os.getpid()}.png"
+    pg.image.save(surface, temporary)
+    os.replace(temporary, path)
+    return path
+
+
+def _init_worker() -> None:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pg.init()
+
+
+class DiagramRenderer:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE, size: int = DEFAULT_SIZE, workers: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.workers = workers or os.cpu_count() or 1
+        self.assets = _asset_digest()
+        self.rendered = 0  # diagrams drawn by the last render_many call
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, fen: str, flipped: bool = False, highlight: Optional[str] = None) -> str:
+        """Cache file of a diagram, named by the hash of everything that shows in it."""
+        board_fen = fen.split()[0]
+        key = f"{RENDER_VERSION}|{self.assets}|{self.size}|{board_fen}|{int(flipped)}|{highlight or ''}"
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".png")
+
+    def render(self, fen: str, flipped: bool = False, highlight: Optional[str] = None) -> str:
+        return self.render_many([fen], flipped, [highlight])[0]
+
+    def render_many(self, fens: Iterable[str], flipped: bool = False,
+                    highlights: Optional[Iterable[Optional[str]]] = None) -> list[str]:
+        """PNG paths for `fens`, in order; only diagrams missing from the cache are drawn."""
+        fens = list(fens)
+        highlights = list(highlights) if highlights is not None else [None] * len(fens)
+        paths, jobs = [], {}
+        for fen, highlight in zip(fens, highlights):
+            path = self.path_for(fen, flipped, highlight)
+            paths.append(path)
+            if path not in jobs and not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                jobs[path] = (path, fen.split()[0], self.size, flipped, highlight)
+
+        self.rendered = len(jobs)
+        if len(jobs) < PARALLEL_THRESHOLD or self.workers == 1:
+            for job in jobs.values():
+                _render_to_file(job)
+        else:
+            # spawn: a forked child would inherit the parent's SDL state
+            with ProcessPoolExecutor(min(self.workers, len(jobs)), get_context("spawn"), _init_worker) as pool:
+                list(pool.map(_render_to_file, jobs.values(), chunksize=max(1, len(jobs) // (4 * self.workers))))
+        return paths
+
+
+def game_positions(plies) -> tuple[list[str], list[Optional[str]]]:
+    """FEN of every position of a PlyTable, each with the move that led to it."""
+    fens = [plies[ply].fen for ply in range(len(plies))]
+    moves = [None] + [plies[ply].move.uci() for ply in range(1, len(plies))]
+    return fens, moves
+
+
+if __name__ == "__main__":
+    import chess.pgn
+
+    from ply_table import PlyTable
+
+    parser = argparse.ArgumentParser(description="Render position diagrams of a game as PNG files.")
+    parser.add_argument("pgn")
+    parser.add_argument("--critical", action="store_true", help="review the game and only draw its mistakes")
+    parser.add_argument("--budget", type=float, default=10.0, help="engine seconds for the review")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE)
+    parser.add_argument("--flip", action="store_true", help="Black at the bottom")
+    parser.add_argument("--cache", default=DEFAULT_CACHE)
+    args = parser.parse_args()
+
+    with open(args.pgn) as fh:
+        game = chess.pgn.read_game(fh)
+    plies = PlyTable.from_game(game)
+    fens, moves = game_positions(plies)
+    if args.critical:
+        from engine import open_engine
+        from engine_locator import find_stockfish
+        from eval_store import EvalStore
+        from game_review import GameReviewer
+
+        engine = open_engine(find_stockfish(), "analysis-deep", store=EvalStore())
+        try:
+            result = GameReviewer(engine, args.budget).review(plies)
+        finally:
+            engine.quit()
+        critical = [review.ply for review in result.moves if review.nag is not None]
+        fens = [fens[ply] for ply in critical]
+        moves = [moves[ply] for ply in critical]
+
+    pg.init()
+    renderer = DiagramRenderer(args.cache, args.size)
+    for fen, path in zip(fens, renderer.render_many(fens, args.flip, moves)):
+        print(f"{path}  {fen}")
+    print(f"{renderer.rendered} drawn, {len(fens) - renderer.rendered} from the cache")
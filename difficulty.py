@@ -0,0 +1,50 @@
+"""
+Bot difficulty tiers. Each tier weakens the engine through Skill Level and
+UCI_Elo and caps every search by nodes and time, so the bot never takes
+longer than the tier's max_latency to reply, on the clock or not.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import chess.engine
+
+DEFAULT_DIFFICULTY = "club"
+
+
+@dataclass(frozen=True)
+class Difficulty:
+    name: str
+    skill_level: int  # Stockfish "Skill Level", 0..20
+    elo: Optional[int]  # UCI_Elo, or None to play without UCI_LimitStrength
+    nodes: Optional[int]
+    movetime: float  # seconds
+    max_latency: float  # seconds the bot may take, including waiting for the engine
+
+    def options(self) -> dict:
+        options = {"Skill Level": self.skill_level}
+        if self.elo is not None:
+            options["UCI_LimitStrength"] = True
+            options["UCI_Elo"] = self.elo
+        return options
+
+    def limit(self) -> chess.engine.Limit:
+        """Search limit for one move of an untimed game; timed games use TimeManager."""
+        return chess.engine.Limit(time=min(self.movetime, self.max_latency), nodes=self.nodes)
+
+
+TIERS = {
+    tier.name: tier
+    for tier in (
+        Difficulty("beginner", 0, None, 20_000, 0.05, 0.3),
+        Difficulty("casual", 5, 1500, 100_000, 0.1, 0.5),
+        Difficulty("club", 10, 1900, 400_000, 0.3, 1.0),
+        Difficulty("expert", 15, 2400, 1_500_000, 0.8, 2.0),
+        Difficulty("max", 20, None, None, 1.5, 3.0),
+    )
+}
+
+
+def get_difficulty(name: str) -> Difficulty:
+    if name not in TIERS:
+        raise ValueError(f"Unknown difficulty {name!r}, expected one of {', '.join(TIERS)}")
+    return TIERS[name]
@@ -1,15 +1,164 @@
+import collections
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
 import chess.engine
 
+from engine_profiles import options_for
+from engine_supervisor import SupervisedEngine
+from eval_store import CachedEngine, EvalStore
+from fallback_engine import FallbackEngine
+
+log = logging.getLogger(__name__)
+
+
 class ChessEngine:
-    def __init__(self, stockfish_path: str):
+    # What the default 0.1 s search reaches on a fast machine, until searches here have shown otherwise
+    default_cache_depth = 12
+
+    def __init__(self, stockfish_path: str, profile: Optional[str] = None, instances: int = 1):
         self.engine = chess.engine.SimpleEngine.popen_uci(stockfish_path)
+        self._lock = threading.Lock()
+        self._analysis = None
+        self._stop_requested = False  # stop() came before the analysis was opened
+        self._stopped = False  # the running analysis was cut short
+        self._default_depths: collections.deque = collections.deque(maxlen=16)
+        self.profile = profile
+        self.options = options_for(profile, instances) if profile else {}
+        # MultiPV is managed by python-chess and passed with each analysis instead
+        self.multipv = self.options.get("MultiPV", 1)
+        self.engine.configure({
+            name: value for name, value in self.options.items()
+            if name != "MultiPV" and name in self.engine.options
+        })
+        self.searches = 0
+        self.nodes = 0
+        self.search_time = 0.0
+        log.info("Started %s with profile %s: %s", stockfish_path, profile, self.options)
+
+    def analyze(self, board: chess.Board, limit: Optional[chess.engine.Limit] = None) -> dict:
+        """
+        Score and PV of the best line; with MultiPV > 1 also every line under
+        "lines". A search cut short by stop() is marked "stopped".
+        """
+        started = time.perf_counter()
+        multipv = self.multipv if self.multipv > 1 else None
+        with self._lock:
+            # A stop left over from a search that had already ended is not meant for this one
+            self._stop_requested = self._stopped = False
+        with self.engine.analysis(board, limit or chess.engine.Limit(time=0.1), multipv=multipv) as analysis:
+            with self._lock:
+                self._analysis = analysis
+                if self._stop_requested:
+                    self._stop_requested = False
+                    self._stopped = True
+                    analysis.stop()
+            try:
+                analysis.wait()
+            finally:
+                with self._lock:
+                    self._analysis = None
+                    stopped = self._stopped
+            lines = analysis.multipv
+        self._record(started, lines[0])
+
+        result = self._line(lines[0])
+        if multipv:
+            result["lines"] = [self._line(info) for info in lines]
+        if stopped:
+            result["stopped"] = True
+        elif limit is None and result["depth"]:
+            self._default_depths.append(result["depth"])
+        return result
+
+    @property
+    def cache_depth(self) -> int:
+        """Depth stored evaluations need to stand in for a default search: the shallowest recent one."""
+        return min(self._default_depths, default=self.default_cache_depth)
+
+    def best_move(self, board: chess.Board, limit: Optional[chess.engine.Limit] = None,
+                  options: Optional[dict] = None) -> Optional[chess.Move]:
+        """`options` (e.g. Skill Level) apply to this search only."""
+        started = time.perf_counter()
+        with self._lock:
+            self._stop_requested = False
+        options = {name: value for name, value in (options or {}).items() if name in self.engine.options}
+        result = self.engine.play(
+            board, limit or chess.engine.Limit(time=0.1), info=chess.engine.INFO_BASIC, options=options,
+        )
+        self._record(started, result.info)
+        return result.move
+
+    def stop(self) -> bool:
+        """
+        Cut the running analysis short; it returns what it has found so far.
+        Called just before the analysis starts, it stops that one as it opens.
+        """
+        with self._lock:
+            if self._analysis is None:
+                self._stop_requested = True
+            else:
+                self._analysis.stop()
+                self._stopped = True
+            return True
 
-    def analyze(self, board: chess.Board) -> dict:
-        info = self.engine.analyse(board, chess.engine.Limit(time=0.1))
+    def ping(self) -> None:
+        """Round trip to the engine process; raises if it is dead."""
+        self.engine.ping()
+
+    def kill(self) -> None:
+        """End the process without asking it; searches waiting on it fail at once."""
+        self.engine.close()
+
+    def telemetry(self) -> dict:
         return {
-            "score": info["score"].relative.score(mate_score=10000),
-            "pv": info.get("pv"),
+            "profile": self.profile,
+            "options": self.options,
+            "searches": self.searches,
+            "nodes": self.nodes,
+            "nps": int(self.nodes / self.search_time) if self.search_time else 0,
         }
 
     def quit(self) -> None:
+        log.info("Engine telemetry: %s", self.telemetry())
         self.engine.quit()
+
+    def _record(self, started: float, info: dict) -> None:
+        self.searches += 1
+        self.nodes += info.get("nodes", 0)
+        self.search_time += time.perf_counter() - started
+
+    @staticmethod
+    def _line(info: dict) -> dict:
+        score = info.get("score")
+        return {
+            "score": score.relative.score(mate_score=10000) if score is not None else None,
+            "pv": info.get("pv"),
+            "depth": info.get("depth"),
+        }
+
+
+def open_engine(stockfish_path: Optional[str], profile: Optional[str] = None, instances: int = 1,
+                store: Optional[EvalStore] = None, supervised: bool = True):
+    """
+    Stockfish when its binary can be started, otherwise the built-in
+    FallbackEngine. Stockfish runs under a SupervisedEngine, which restarts
+    it if it hangs or dies, unless `supervised` is False. With a `store`,
+    analysis is read from and saved to it.
+    """
+    engine = None
+    if stockfish_path and os.path.isfile(stockfish_path) and os.access(stockfish_path, os.X_OK):
+        try:
+            if supervised:
+                engine = SupervisedEngine(lambda: ChessEngine(stockfish_path, profile, instances), store)
+            else:
+                engine = ChessEngine(stockfish_path, profile, instances)
+        except (OSError, chess.engine.EngineError) as error:
+            log.warning("Could not start %s: %s", stockfish_path, error)
+    if engine is None:
+        log.warning("Stockfish was not found, using the built-in engine")
+        engine = FallbackEngine(profile, instances)
+    return CachedEngine(engine, store) if store is not None else engine
@@ -0,0 +1,194 @@
+"""
+Finds a Stockfish binary for this machine, and builds the bundled sources
+in stockfish/src when there is none.
+
+Lookup order: the LAZYCHESS_STOCKFISH environment variable, the "stockfish"
+entry of engine_config.json, a binary previously built into stockfish/bin,
+the platform's release binaries in stockfish/, and finally "stockfish" on PATH.
+
+    python engine_locator.py            # print the engine that would be used
+    python engine_locator.py --build    # build the sources for this CPU
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STOCKFISH_DIR = os.path.join(ROOT, "stockfish")
+SOURCE_DIR = os.path.join(STOCKFISH_DIR, "src")
+BUILD_DIR = os.path.join(STOCKFISH_DIR, "bin")
+CONFIG_PATH = os.path.join(ROOT, "engine_config.json")
+ENV_VAR = "LAZYCHESS_STOCKFISH"
+
+log = logging.getLogger(__name__)
+
+# Release file names, best build first
+RELEASE_NAMES = {
+    "Windows": ["stockfish-windows-x86-64-avx2.exe", "stockfish-windows-x86-64-sse41-popcnt.exe",
+                "stockfish-windows-x86-64.exe", "stockfish.exe"],
+    "Linux": ["stockfish-ubuntu-x86-64-avx2", "stockfish-ubuntu-x86-64-sse41-popcnt",
+              "stockfish-ubuntu-x86-64", "stockfish-android-armv8", "stockfish"],
+    "Darwin": ["stockfish-macos-m1-apple-silicon", "stockfish-macos-x86-64-avx2",
+               "stockfish-macos-x86-64", "stockfish"],
+}
+
+
+def is_executable(path: Optional[str]) -> bool:
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def exe_name(name: str, system: Optional[str] = None) -> str:
+    system = system or platform.system()
+    return name + ".exe" if system == "Windows" and not name.endswith(".exe") else name
+
+
+def configured_path() -> Optional[str]:
+    if os.environ.get(ENV_VAR):
+        return os.environ[ENV_VAR]
+    if os.path.exists(CONFIG_PATH):
+        try:
+            with open(CONFIG_PATH) as fh:
+                config = json.load(fh)
+        except (OSError, ValueError) as error:
+            log.warning("Ignoring %s: %s", CONFIG_PATH, error)
+            return None
+        if isinstance(config, dict):
+            return config.get("stockfish")
+        log.warning("Ignoring %s: expected a JSON object", CONFIG_PATH)
+    return None
+
+
+def cpu_flags() -> set[str]:
+    """CPU feature flags, normalized like get_native_properties.sh ("sse4_1" -> "sse41")."""
+    flags = set()
+    system = platform.system()
+    if system == "Linux" and os.path.exists("/proc/cpuinfo"):
+        amd_zen_1_2 = vendor = False
+        with open("/proc/cpuinfo") as fh:
+            for line in fh:
+                if line.startswith(("flags", "Features")):
+                    flags = set(line.split(":", 1)[1].split())
+                elif line.startswith("vendor_id"):
+                    vendor = "AuthenticAMD" in line
+                elif line.startswith("cpu family"):
+                    amd_zen_1_2 = vendor and line.split(":", 1)[1].strip() == "23"
+        if amd_zen_1_2:
+            # pdep/pext are microcoded on Zen 1/2, so the bmi2 build is slower there
+            flags.discard("bmi2")
+    elif system == "Darwin":
+        output = subprocess.run(
+            ["sysctl", "-n", "machdep.cpu.features", "machdep.cpu.leaf7_features"],
+            capture_output=True, text=True,
+        ).stdout
+        flags = set(output.lower().split())
+    elif system == "Windows":
+        import ctypes
+
+        present = ctypes.windll.kernel32.IsProcessorFeaturePresent
+        for flag, feature in (("sse41", 37), ("avx", 39), ("avx2", 40), ("avx512f", 41)):
+            if present(feature):
+                flags.add(flag)
+        if "sse41" in flags:
+            flags.add("popcnt")
+    return {flag.replace("_", "").replace(".", "") for flag in flags}
+
+
+def best_arch(machine: Optional[str] = None, system: Optional[str] = None,
+              flags: Optional[set[str]] = None) -> str:
+    """The Makefile ARCH with the widest instruction set this CPU supports."""
+    machine = (machine or platform.machine()).lower()
+    system = system or platform.system()
+    flags = cpu_flags() if flags is None else flags
+
+    if machine in ("arm64", "aarch64"):
+        if system == "Darwin":
+            return "apple-silicon"
+        return "armv8-dotprod" if "asimddp" in flags else "armv8"
+    if machine not in ("x86_64", "amd64"):
+        return "general-64" if sys.maxsize > 2 ** 32 else "general-32"
+    if {"avx512vnni", "avx512dq", "avx512f", "avx512bw", "avx512vl"} <= flags:
+        return "x86-64-vnni256"
+    if {"avx512f", "avx512bw"} <= flags:
+        return "x86-64-avx512"
+    if "bmi2" in flags:
+        return "x86-64-bmi2"
+    if "avx2" in flags:
+        return "x86-64-avx2"
+    if {"sse41", "popcnt"} <= flags:
+        return "x86-64-sse41-popcnt"
+    return "x86-64"
+
+
+def built_path(arch: str) -> str:
+    return os.path.join(BUILD_DIR, exe_name(f"stockfish-{arch}"))
+
+
+def find_stockfish() -> Optional[str]:
+    """Path of the Stockfish binary to use, or None when there is none."""
+    path = configured_path()
+    if path:
+        if is_executable(path):
+            return path
+        log.warning("Configured engine %s is not an executable file", path)
+
+    if os.path.isdir(BUILD_DIR):
+        arch = best_arch()
+        if is_executable(built_path(arch)):
+            return built_path(arch)
+        for name in sorted(os.listdir(BUILD_DIR)):
+            if is_executable(os.path.join(BUILD_DIR, name)):
+                return os.path.join(BUILD_DIR, name)
+
+    for name in RELEASE_NAMES.get(platform.system(), ["stockfish"]):
+        path = os.path.join(STOCKFISH_DIR, name)
+        if is_executable(path):
+            return path
+
+    return shutil.which("stockfish")
+
+
+def build_stockfish(arch: Optional[str] = None, jobs: Optional[int] = None,
+                    profile: bool = False, force: bool = False) -> str:
+    """
+    Build stockfish/src for `arch` (default: the best one for this CPU) and
+    cache the binary in stockfish/bin. A cached binary is reused unless
+    `force` is set. `profile` runs the slower profile-guided build.
+    """
+    arch = arch or best_arch()
+    target = built_path(arch)
+    if is_executable(target) and not force:
+        return target
+
+    make = shutil.which("make") or shutil.which("mingw32-make")
+    if make is None:
+        raise RuntimeError("Building Stockfish needs make and a C++ compiler.")
+    command = [make, f"-j{jobs or os.cpu_count() or 1}", "profile-build" if profile else "build", f"ARCH={arch}"]
+    result = subprocess.run(command, cwd=SOURCE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed:\n{result.stderr[-2000:]}")
+
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    shutil.copy2(os.path.join(SOURCE_DIR, exe_name("stockfish")), target)
+    subprocess.run([make, "clean"], cwd=SOURCE_DIR, capture_output=True)
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Locate or build the Stockfish engine.")
+    parser.add_argument("--build", action="store_true", help="build stockfish/src for this CPU")
+    parser.add_argument("--arch", help="Makefile ARCH to build instead of the detected one")
+    parser.add_argument("--profile", action="store_true", help="use the profile-guided build")
+    parser.add_argument("--force", action="store_true", help="rebuild even if a cached binary exists")
+    args = parser.parse_args()
+
+    if args.build:
+        print(build_stockfish(args.arch, profile=args.profile, force=args.force))
+    else:
+        print(f"arch: {best_arch()}")
+        print(f"engine: {find_stockfish() or 'not found, the built-in engine will be used'}")
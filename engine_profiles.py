@@ -0,0 +1,97 @@
+"""
+Named engine configurations. Each profile turns the host's CPU count and
+free memory into UCI options (Threads, Hash, MultiPV, Move Overhead):
+
+  bot-blitz      quick bot replies that leave cores free for the UI
+  analysis-deep  most of the machine for a single analysis engine
+  batch          many engines side by side, e.g. the server pool
+"""
+import os
+import platform
+import subprocess
+from dataclasses import dataclass
+from typing import Optional
+
+DEFAULT_PROFILE = "bot-blitz"
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    name: str
+    cpu_share: float  # part of the cores given to all engines of this profile
+    memory_share: float  # part of the free memory given to their hash tables
+    max_threads: int
+    max_hash_mb: int
+    multipv: int
+    move_overhead_ms: int
+
+
+PROFILES = {
+    profile.name: profile
+    for profile in (
+        EngineProfile("bot-blitz", 0.25, 1 / 32, 2, 64, 1, 100),
+        EngineProfile("analysis-deep", 0.75, 1 / 4, 64, 4096, 3, 10),
+        EngineProfile("batch", 1.0, 1 / 8, 1, 256, 1, 10),
+    )
+}
+
+
+def free_memory_mb() -> int:
+    """Memory available to new allocations, or a conservative guess when unknown."""
+    system = platform.system()
+    try:
+        if system == "Linux":
+            with open("/proc/meminfo") as fh:
+                for line in fh:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) // 1024
+        elif system == "Darwin":
+            output = subprocess.run(["sysctl", "-n", "hw.memsize"], capture_output=True, text=True).stdout
+            return int(output) // (1024 * 1024) // 2  # no cheap "available" figure; assume half is free
+        elif system == "Windows":
+            import ctypes
+
+            class MemoryStatus(ctypes.Structure):
+                _fields_ = [("length", ctypes.c_ulong), ("load", ctypes.c_ulong),
+                            ("total_phys", ctypes.c_ulonglong), ("avail_phys", ctypes.c_ulonglong),
+                            ("total_page", ctypes.c_ulonglong), ("avail_page", ctypes.c_ulonglong),
+                            ("total_virtual", ctypes.c_ulonglong), ("avail_virtual", ctypes.c_ulonglong),
+                            ("avail_extended", ctypes.c_ulonglong)]
+
+            status = MemoryStatus()
+            status.length = ctypes.sizeof(MemoryStatus)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return status.avail_phys // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    return 1024
+
+
+def _power_of_two_below(value: float) -> int:
+    result = 1
+    while result * 2 <= value:
+        result *= 2
+    return result
+
+
+def get_profile(name: str) -> EngineProfile:
+    if name not in PROFILES:
+        raise ValueError(f"Unknown engine profile {name!r}, expected one of {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def options_for(name: str, instances: int = 1, cpu_count: Optional[int] = None,
+                free_mb: Optional[int] = None) -> dict:
+    """UCI options for one of `instances` engines running the profile `name`."""
+    profile = get_profile(name)
+    cpu_count = cpu_count or os.cpu_count() or 1
+    free_mb = free_memory_mb() if free_mb is None else free_mb
+
+    threads = int(cpu_count * profile.cpu_share) // instances
+    hash_mb = free_mb * profile.memory_share / instances
+    return {
+        "Threads": max(1, min(profile.max_threads, threads)),
+        "Hash": max(16, min(profile.max_hash_mb, _power_of_two_below(hash_mb))),
+        "MultiPV": profile.multipv,
+        "Move Overhead": profile.move_overhead_ms,
+    }
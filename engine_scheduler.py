@@ -0,0 +1,196 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Optional
+
+import chess
+import chess.engine
+
+
+class Priority(IntEnum):
+    BOT_MOVE = 0
+    VISIBLE_ANALYSIS = 1
+    PREFETCH = 2
+
+
+@dataclass(order=True)
+class EngineJob:
+    priority: Priority
+    seq: int
+    kind: str = field(compare=False)  # "move" or "analyze"
+    board: chess.Board = field(compare=False)
+    limit: Optional[chess.engine.Limit] = field(compare=False)
+    deadline: Optional[float] = field(compare=False)  # time.monotonic() value
+    future: Future = field(compare=False)
+    queued_at: float = field(compare=False)
+    started_at: Optional[float] = field(default=None, compare=False)
+    options: Optional[dict] = field(default=None, compare=False)  # UCI options for this search only
+
+
+class EngineScheduler:
+    """
+    Serializes all work for one engine adapter on a worker thread. Jobs run
+    by priority (bot move > visible analysis > prefetch); a more urgent job
+    stops a running analysis, which is queued again if the engine reports
+    it "stopped" (a search that had already finished keeps its result). Jobs that miss
+    their deadline fail with TimeoutError instead of delaying others.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._queue: list[EngineJob] = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._current: Optional[EngineJob] = None
+        self._preempted = False
+        self._running = True
+        self.stats = {
+            priority: {"submitted": 0, "started": 0, "completed": 0, "preempted": 0, "expired": 0,
+                       "failed": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for priority in Priority
+        }
+        self.max_depth = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit_move(self, board: chess.Board, limit: Optional[chess.engine.Limit] = None,
+                    timeout: Optional[float] = None, options: Optional[dict] = None) -> Future:
+        return self._submit("move", Priority.BOT_MOVE, board, limit, timeout, options)
+
+    def submit_analysis(self, board: chess.Board, priority: Priority = Priority.VISIBLE_ANALYSIS,
+                        limit: Optional[chess.engine.Limit] = None, timeout: Optional[float] = None) -> Future:
+        return self._submit("analyze", priority, board, limit, timeout)
+
+    def _submit(self, kind, priority, board, limit, timeout, options=None) -> Future:
+        now = time.monotonic()
+        job = EngineJob(
+            priority, next(self._seq), kind, board.copy(), limit,
+            now + timeout if timeout is not None else None, Future(), now, options=options,
+        )
+        with self._condition:
+            heapq.heappush(self._queue, job)
+            self.stats[priority]["submitted"] += 1
+            self.max_depth = max(self.max_depth, len(self._queue))
+            current = self._current
+            if (current is not None and current.kind == "analyze"
+                    and priority < current.priority and not self._preempted):
+                self._preempted = self._stop_engine()
+            self._condition.notify()
+        return job.future
+
+    def queue_depth(self) -> dict:
+        with self._condition:
+            depth = {priority.name: 0 for priority in Priority}
+            for job in self._queue:
+                depth[job.priority.name] += 1
+            return depth
+
+    def metrics(self) -> dict:
+        with self._condition:
+            per_priority = {}
+            for priority, stats in self.stats.items():
+                started = stats["started"]
+                per_priority[priority.name] = {
+                    "submitted": stats["submitted"],
+                    "completed": stats["completed"],
+                    "preempted": stats["preempted"],
+                    "expired": stats["expired"],
+                    "failed": stats["failed"],
+                    "mean_wait_ms": 1000 * stats["wait_total"] / started if started else 0.0,
+                    "max_wait_ms": 1000 * stats["wait_max"],
+                }
+            return {"depth": len(self._queue), "max_depth": self.max_depth, "jobs": per_priority}
+
+    def stop(self, timeout: float = 1.0) -> None:
+        with self._condition:
+            self._running = False
+            for job in self._queue:
+                if not job.future.cancel():
+                    job.future.set_exception(RuntimeError("engine scheduler stopped"))
+            self._queue.clear()
+            if self._current is not None and self._current.kind == "analyze":
+                self._stop_engine()
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _stop_engine(self) -> bool:
+        stop = getattr(self.engine, "stop", None)
+        return bool(stop is not None and stop())
+
+    def _next_job(self) -> Optional[EngineJob]:
+        """Pop the most urgent live job, failing any that already expired."""
+        while self._queue:
+            job = heapq.heappop(self._queue)
+            if job.future.cancelled():
+                continue
+            if job.deadline is not None and time.monotonic() >= job.deadline:
+                self.stats[job.priority]["expired"] += 1
+                job.future.set_exception(TimeoutError("engine job expired before it could start"))
+                continue
+            return job
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                job = None
+                while self._running and job is None:
+                    job = self._next_job()
+                    if job is None:
+                        self._condition.wait()
+                if not self._running:
+                    return
+                # A preempted job is already running when it comes back
+                if not job.future.running() and not job.future.set_running_or_notify_cancel():
+                    continue
+                if job.started_at is None:
+                    job.started_at = time.monotonic()
+                    stats = self.stats[job.priority]
+                    stats["started"] += 1
+                    stats["wait_total"] += job.started_at - job.queued_at
+                    stats["wait_max"] = max(stats["wait_max"], job.started_at - job.queued_at)
+                self._current = job
+                self._preempted = False
+
+            limit = self._limit_for(job)
+            try:
+                if job.kind == "move":
+                    extra = {"options": job.options} if job.options else {}
+                    result = self.engine.best_move(job.board, limit, **extra)
+                else:
+                    result = self.engine.analyze(job.board, limit)
+            except Exception as error:
+                with self._condition:
+                    self._current = None
+                    self.stats[job.priority]["failed"] += 1
+                job.future.set_exception(error)
+                continue
+
+            with self._condition:
+                self._current = None
+                if self._preempted and self._running and job.kind == "analyze" and result.get("stopped"):
+                    # Run it again once the more urgent work is done
+                    self.stats[job.priority]["preempted"] += 1
+                    heapq.heappush(self._queue, job)
+                    continue
+                self.stats[job.priority]["completed"] += 1
+            job.future.set_result(result)
+
+    def _limit_for(self, job: EngineJob) -> Optional[chess.engine.Limit]:
+        """Shorten the search so it ends by the job's deadline."""
+        if job.deadline is None:
+            return job.limit
+        remaining = max(0.01, job.deadline - time.monotonic())
+        limit = job.limit or chess.engine.Limit(time=0.1)
+        if limit.time is not None and limit.time <= remaining:
+            return limit
+        return chess.engine.Limit(
+            time=remaining, depth=limit.depth, nodes=limit.nodes, mate=limit.mate,
+            white_clock=limit.white_clock, black_clock=limit.black_clock,
+            white_inc=limit.white_inc, black_inc=limit.black_inc,
+            remaining_moves=limit.remaining_moves,
+        )
@@ -0,0 +1,239 @@
+"""
+Keeps a UCI engine answering. Every request gets a deadline derived from
+its search limit; when the engine misses it, crashes or answers nonsense,
+the request is served from the fallback (a stored evaluation, or the
+built-in engine) and the engine is replaced in the background. Until the
+new process is up and has replayed the last position, every request goes
+to the fallback, so a broken engine costs at most one deadline.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+import chess
+import chess.engine
+
+from fallback_engine import FallbackEngine
+
+log = logging.getLogger(__name__)
+
+
+def call_with_deadline(function: Callable, timeout: float):
+    """Run `function` on its own thread; TimeoutError if it has not returned in `timeout` seconds."""
+    outcome: queue.Queue = queue.Queue(maxsize=1)
+
+    def run() -> None:
+        try:
+            outcome.put((True, function()))
+        except BaseException as error:
+            outcome.put((False, error))
+
+    threading.Thread(target=run, daemon=True).start()
+    try:
+        ok, value = outcome.get(timeout=timeout)
+    except queue.Empty:
+        raise TimeoutError(f"engine did not answer within {timeout:.2f}s") from None
+    if ok:
+        return value
+    raise value
+
+
+class SupervisedEngine:
+    """
+    Engine adapter around the engine built by `factory` (e.g. a ChessEngine).
+    `store` (an EvalStore) is consulted first when analysis has to be served
+    without the engine; otherwise the built-in engine searches briefly.
+    """
+
+    def __init__(self, factory: Callable, store=None, fallback_factory: Callable = FallbackEngine,
+                 grace: float = 1.0, search_timeout: float = 15.0, fallback_time: float = 0.05,
+                 health_interval: Optional[float] = 5.0, max_backoff: float = 5.0):
+        self.factory = factory
+        self.store = store
+        self.fallback_factory = fallback_factory
+        self.grace = grace  # allowed beyond the search limit before the engine counts as hung
+        self.search_timeout = search_timeout  # deadline of searches limited by depth or nodes only
+        self.fallback_time = fallback_time
+        self.max_backoff = max_backoff
+        self.engine = factory()
+        self._fallback = None
+        self._lock = threading.Lock()  # held while a request is with the engine
+        self._state_lock = threading.Lock()
+        self.ready = threading.Event()
+        self.ready.set()
+        self._closed = threading.Event()
+        self.last_position: Optional[chess.Board] = None
+        self.counters = {"requests": 0, "timeouts": 0, "failures": 0, "restarts": 0, "fallbacks": 0}
+        self.worst_latency = 0.0
+        if health_interval:
+            threading.Thread(target=self._watch, args=(health_interval,), daemon=True).start()
+
+    def analyze(self, board: chess.Board, limit: Optional[chess.engine.Limit] = None) -> dict:
+        return self._request("analyze", board, limit, None)
+
+    def best_move(self, board: chess.Board, limit: Optional[chess.engine.Limit] = None,
+                  options: Optional[dict] = None) -> Optional[chess.Move]:
+        return self._request("move", board, limit, options)
+
+    def deadline_for(self, board: chess.Board, limit: Optional[chess.engine.Limit]) -> float:
+        """Seconds a search with `limit` may take before the engine counts as hung."""
+        if limit is None:
+            seconds = 0.1  # ChessEngine's default search
+        elif limit.time is not None:
+            seconds = limit.time
+        else:
+            clock = limit.white_clock if board.turn == chess.WHITE else limit.black_clock
+            seconds = min(clock, self.search_timeout) if clock is not None else self.search_timeout
+        return seconds + self.grace
+
+    def _request(self, kind: str, board: chess.Board, limit, options: Optional[dict]):
+        started = time.monotonic()
+        self.counters["requests"] += 1
+        self.last_position = board.copy()
+        try:
+            if self.ready.is_set():
+                engine = self.engine
+                with self._lock:
+                    try:
+                        return call_with_deadline(self._search(engine, kind, board, limit, options),
+                                                  self.deadline_for(board, limit))
+                    except TimeoutError as error:
+                        self.counters["timeouts"] += 1
+                        log.warning("Engine hung: %s", error)
+                        self._restart(engine)
+                    except (chess.engine.EngineError, chess.engine.EngineTerminatedError, OSError) as error:
+                        self.counters["failures"] += 1
+                        log.warning("Engine failed: %r", error)
+                        self._restart(engine)
+            return self._serve_fallback(kind, board, options)
+        finally:
+            self.worst_latency = max(self.worst_latency, time.monotonic() - started)
+
+    @staticmethod
+    def _search(engine, kind: str, board: chess.Board, limit, options: Optional[dict]) -> Callable:
+        if kind == "analyze":
+            return lambda: engine.analyze(board, limit)
+        if options:
+            return lambda: engine.best_move(board, limit, options=options)
+        return lambda: engine.best_move(board, limit)
+
+    def _serve_fallback(self, kind: str, board: chess.Board, options: Optional[dict]):
+        self.counters["fallbacks"] += 1
+        if kind == "analyze" and self.store is not None:
+            cached = self.store.get(board)
+            if cached is not None:
+                return cached
+        if self._fallback is None:
+            self._fallback = self.fallback_factory()
+        limit = chess.engine.Limit(time=self.fallback_time)
+        if kind == "analyze":
+            return self._fallback.analyze(board, limit)
+        return self._fallback.best_move(board, limit, options)
+
+    def _restart(self, failed) -> None:
+        """Replace `failed` in the background, unless that is already under way."""
+        with self._state_lock:
+            if failed is not self.engine or not self.ready.is_set() or self._closed.is_set():
+                return
+            self.ready.clear()
+        threading.Thread(target=self._replace, args=(failed,), daemon=True).start()
+
+    def _replace(self, failed) -> None:
+        self._dispose(failed)
+        delay = 0.25
+        while not self._closed.is_set():
+            started = time.monotonic()
+            try:
+                engine = self.factory()
+            except Exception as error:
+                log.warning("Engine restart failed: %r", error)
+                if self._closed.wait(delay):
+                    return
+                delay = min(self.max_backoff, delay * 2)
+                continue
+            try:
+                self._replay(engine)
+            except Exception as error:
+                log.warning("Restarted engine did not answer: %r", error)
+                self._dispose(engine)
+                if self._closed.wait(delay):
+                    return
+                delay = min(self.max_backoff, delay * 2)
+                continue
+            with self._state_lock:
+                if self._closed.is_set():
+                    self._dispose(engine)
+                    return
+                self.engine = engine
+                self.counters["restarts"] += 1
+                self.ready.set()
+            log.info("Engine restarted in %.2fs", time.monotonic() - started)
+            return
+
+    def _replay(self, engine) -> None:
+        """Search the last position briefly, which also proves the new engine works."""
+        board = self.last_position.copy() if self.last_position is not None else chess.Board()
+        if board.is_game_over():
+            board = chess.Board()
+        call_with_deadline(lambda: engine.analyze(board, chess.engine.Limit(depth=1)), self.grace * 2)
+
+    def _dispose(self, engine, graceful: bool = False) -> None:
+        """Stop an engine that may not answer anymore; killing it also frees any thread stuck on it."""
+        for name in ("quit", "kill") if graceful else ("kill", "quit"):
+            method = getattr(engine, name, None)
+            if method is None:
+                continue
+            try:
+                call_with_deadline(method, self.grace)
+                return
+            except Exception as error:
+                log.debug("Engine %s failed: %r", name, error)
+
+    def _watch(self, interval: float) -> None:
+        """Ping the idle engine now and then, so a dead process is replaced before it is needed."""
+        while not self._closed.wait(interval):
+            engine = self.engine
+            if not self.ready.is_set() or not hasattr(engine, "ping"):
+                continue
+            if not self._lock.acquire(blocking=False):
+                continue  # busy with a request, which checks it anyway
+            try:
+                call_with_deadline(engine.ping, self.grace)
+            except Exception as error:
+                self.counters["failures"] += 1
+                log.warning("Engine health check failed: %r", error)
+                self._restart(engine)
+            finally:
+                self._lock.release()
+
+    def stop(self) -> bool:
+        if not self.ready.is_set():
+            return False
+        stop = getattr(self.engine, "stop", None)
+        return bool(stop is not None and stop())
+
+    def telemetry(self) -> dict:
+        telemetry = self.engine.telemetry() if hasattr(self.engine, "telemetry") else {}
+        telemetry["supervisor"] = {
+            **self.counters,
+            "ready": self.ready.is_set(),
+            "worst_latency_ms": int(1000 * self.worst_latency),
+        }
+        return telemetry
+
+    def quit(self) -> None:
+        with self._state_lock:
+            self._closed.set()
+            ready = self.ready.is_set()
+            self.ready.clear()
+        if ready:
+            self._dispose(self.engine, graceful=True)
+        if self._fallback is not None:
+            self._fallback.quit()
+
+    def __getattr__(self, name):
+        if name == "engine":
+            raise AttributeError(name)
+        return getattr(self.engine, name)
@@ -0,0 +1,235 @@
+"""
+Evaluations kept on disk in SQLite so that positions analyzed once are not
+searched again by the next session, the other analyzer or a batch tool.
+
+Positions are keyed by their FEN without move counters (board.epd()) and
+also carry their Zobrist hash. Only the deepest evaluation of a position is
+kept, except that one with MultiPV lines replaces one without. Writes are
+buffered and inserted in batches; WAL mode lets several processes read
+while one writes.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import chess
+import chess.polyglot
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "evals.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evals (
+    fen TEXT PRIMARY KEY,
+    zobrist INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    score INTEGER,
+    pv TEXT,
+    lines TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS evals_zobrist ON evals (zobrist);
+CREATE INDEX IF NOT EXISTS evals_depth ON evals (depth, updated);
+"""
+
+UPSERT = """
+INSERT INTO evals (fen, zobrist, depth, score, pv, lines, updated) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (fen) DO UPDATE SET
+    depth = excluded.depth, score = excluded.score, pv = excluded.pv, lines = excluded.lines,
+    updated = excluded.updated
+WHERE excluded.depth >= evals.depth OR (evals.lines IS NULL AND excluded.lines IS NOT NULL)
+"""
+
+
+def position_key(board: chess.Board) -> str:
+    return board.epd()
+
+
+def zobrist_key(board: chess.Board) -> int:
+    # SQLite integers are signed 64-bit
+    key = chess.polyglot.zobrist_hash(board)
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def encode_pv(pv) -> str:
+    return " ".join(move.uci() for move in pv or [])
+
+
+def decode_pv(pv: Optional[str]) -> Optional[list[chess.Move]]:
+    return [chess.Move.from_uci(uci) for uci in pv.split()] if pv else None
+
+
+class EvalStore:
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = 500_000,
+                 batch_size: int = 64, flush_interval: float = 1.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(evals)")}
+        if "lines" not in columns:
+            # Stores written before MultiPV lines were kept
+            self._db.execute("ALTER TABLE evals ADD COLUMN lines TEXT")
+        self._lock = threading.Lock()
+        self._pending: dict[str, tuple] = {}
+        self._flushes = 0
+        self.hits = 0
+        self.misses = 0
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, args=(flush_interval,), daemon=True)
+        self._flusher.start()
+
+    def get(self, board: chess.Board, min_depth: int = 0) -> Optional[dict]:
+        """The stored evaluation of `board` if it was searched at least `min_depth` deep."""
+        fen = position_key(board)
+        with self._lock:
+            row = self._pending.get(fen)
+            if row is None:
+                row = self._db.execute(
+                    "SELECT fen, zobrist, depth, score, pv, lines, updated FROM evals WHERE fen = ?", (fen,)
+                ).fetchone()
+            if row is None or row[2] < min_depth:
+                self.misses += 1
+                return None
+            self.hits += 1
+        _, _, depth, score, pv, lines, _ = row
+        result = {"score": score, "pv": decode_pv(pv), "depth": depth}
+        if lines:
+            result["lines"] = [
+                {"score": score, "pv": decode_pv(pv), "depth": depth} for score, pv, depth in json.loads(lines)
+            ]
+        return result
+
+    def put(self, board: chess.Board, info: dict, depth: int) -> None:
+        """
+        Queue an evaluation (score relative to the side to move) for the next
+        batch, with its MultiPV "lines" if it has them.
+        """
+        if info.get("score") is None or info.get("error"):
+            return
+        fen = position_key(board)
+        lines = info.get("lines")
+        if lines:
+            lines = json.dumps([[line["score"], encode_pv(line["pv"]), line["depth"]] for line in lines])
+        row = (fen, zobrist_key(board), depth, info["score"], encode_pv(info.get("pv")), lines or None, time.time())
+        with self._lock:
+            previous = self._pending.get(fen)
+            if previous is None or previous[2] <= depth or (previous[5] is None and row[5] is not None):
+                self._pending[fen] = row
+            full = len(self._pending) >= self.batch_size
+        if full:
+            try:
+                self.flush()
+            except sqlite3.OperationalError:
+                pass  # still queued, written with a later batch
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            rows = list(self._pending.values())
+            self._pending.clear()
+            try:
+                with self._db:
+                    self._db.executemany(UPSERT, rows)
+            except sqlite3.OperationalError:
+                # Busy or locked by another process: keep the rows for the next batch
+                for row in rows:
+                    self._pending.setdefault(row[0], row)
+                raise
+            self._flushes += 1
+            if self._flushes % 16 == 0:
+                self._prune()
+
+    def prune(self) -> int:
+        with self._lock:
+            return self._prune()
+
+    def _prune(self) -> int:
+        """Drop the shallowest, oldest entries once the store is over max_entries."""
+        count = self._db.execute("SELECT COUNT(*) FROM evals").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        with self._db:
+            self._db.execute(
+                "DELETE FROM evals WHERE fen IN (SELECT fen FROM evals ORDER BY depth, updated LIMIT ?)",
+                (excess,),
+            )
+        return excess
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM evals").fetchone()[0]
+
+    def close(self) -> None:
+        self._closed.set()
+        self._flusher.join(1.0)
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+    def _flush_periodically(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            try:
+                self.flush()
+            except sqlite3.OperationalError:
+                pass  # another process holds the write lock; the rows stay queued
+
+
+class CachedEngine:
+    """
+    Engine adapter that answers analyze() from an EvalStore when the stored
+    search was deep enough, and stores every new result. Everything else is
+    passed on to the wrapped engine. When the engine searches several lines
+    (MultiPV), an entry stored without them counts as a miss.
+    """
+
+    def __init__(self, engine, store: EvalStore, min_depth: Optional[int] = None):
+        self.engine = engine
+        self.store = store
+        self._min_depth = min_depth
+        self.needs_lines = getattr(engine, "multipv", 1) > 1
+
+    @property
+    def min_depth(self) -> int:
+        """Depth the engine's default search reaches on this machine; shallower entries are searched again."""
+        return self._min_depth if self._min_depth is not None else getattr(self.engine, "cache_depth", 1)
+
+    def analyze(self, board: chess.Board, limit=None) -> dict:
+        min_depth = limit.depth if limit is not None and limit.depth else self.min_depth
+        cached = self.store.get(board, min_depth)
+        if cached is not None and (not self.needs_lines or "lines" in cached):
+            return cached
+        info = self.engine.analyze(board, limit)
+        if info.get("depth") and not info.get("stopped"):
+            self.store.put(board, info, info["depth"])
+        return info
+
+    def quit(self) -> None:
+        self.engine.quit()
+        self.store.close()
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or prune the evaluation store.")
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--max-entries", type=int, help="prune down to this many entries")
+    args = parser.parse_args()
+
+    store = EvalStore(args.path)
+    if args.max_entries is not None:
+        store.max_entries = args.max_entries
+        print(f"pruned: {store.prune()}")
+    print(f"entries: {len(store)}")
+    store.close()
@@ -0,0 +1,205 @@
+"""
+A stand-in UCI engine for tests and benchmarks. It speaks enough UCI for
+python-chess and answers deterministically: the best move and score of a
+position come from a script, or else the first legal move in UCI order and
+the material balance. Each search takes a fixed time while streaming info
+lines, and can be told to crash, hang or answer nonsense.
+
+    python fake_uci_engine.py --latency 0.05 --depth 6
+    python fake_uci_engine.py --script engine_script.json
+
+A script is a JSON object with any of: "latency", "depth", "startup_delay",
+"moves" and "scores" (both keyed by FEN or by EPD, without move counters),
+"fail_after" and "fail_mode" ("crash", "hang" or "illegal").
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from typing import Optional
+
+import chess
+
+NAME = "LazyChess stand-in"
+MATERIAL = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 300, chess.ROOK: 500, chess.QUEEN: 900}
+OPTIONS = [
+    "option name Threads type spin default 1 min 1 max 512",
+    "option name Hash type spin default 16 min 1 max 33554432",
+    "option name MultiPV type spin default 1 min 1 max 500",
+    "option name Move Overhead type spin default 10 min 0 max 5000",
+    "option name Skill Level type spin default 20 min 0 max 20",
+    "option name UCI_LimitStrength type check default false",
+    "option name UCI_Elo type spin default 1320 min 1320 max 3190",
+]
+FAIL_MODES = ("crash", "hang", "illegal")
+
+
+class FakeEngine:
+    def __init__(self, latency: float = 0.0, depth: int = 8, moves: Optional[dict] = None,
+                 scores: Optional[dict] = None, fail_after: Optional[int] = None, fail_mode: str = "crash",
+                 startup_delay: float = 0.0, out=sys.stdout):
+        self.latency = latency
+        self.depth = depth
+        self.moves = moves or {}
+        self.scores = scores or {}
+        self.fail_after = fail_after
+        self.fail_mode = fail_mode
+        self.startup_delay = startup_delay
+        self.out = out
+        self.board = chess.Board()
+        self.options: dict[str, str] = {}
+        self.searches = 0
+        self.hung = False
+        self._stop = threading.Event()
+        self._search: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def send(self, line: str) -> None:
+        with self._lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def scripted(self, table: dict, board: chess.Board):
+        return table.get(board.fen(), table.get(board.epd()))
+
+    def best_move(self, board: chess.Board) -> Optional[chess.Move]:
+        uci = self.scripted(self.moves, board)
+        if uci is not None:
+            return chess.Move.from_uci(uci)
+        moves = sorted(board.legal_moves, key=lambda move: move.uci())
+        return moves[0] if moves else None
+
+    def score(self, board: chess.Board) -> int:
+        """Centipawns for the side to move."""
+        score = self.scripted(self.scores, board)
+        if score is not None:
+            return int(score)
+        balance = sum(
+            value * (len(board.pieces(piece_type, chess.WHITE)) - len(board.pieces(piece_type, chess.BLACK)))
+            for piece_type, value in MATERIAL.items()
+        )
+        return balance if board.turn == chess.WHITE else -balance
+
+    def lines(self, board: chess.Board) -> list[chess.Move]:
+        """Moves shown for MultiPV, the best one first."""
+        best = self.best_move(board)
+        others = sorted((move for move in board.legal_moves if move != best), key=lambda move: move.uci())
+        count = int(self.options.get("multipv", 1))
+        return ([best] if best else []) + others[:count - 1]
+
+    def handle(self, line: str) -> bool:
+        """Answer one command; False once the engine should exit."""
+        if self.hung:
+            return True  # a hung engine reads its input and never answers
+        command, _, rest = line.strip().partition(" ")
+        if command == "uci":
+            time.sleep(self.startup_delay)
+            self.send(f"id name {NAME}")
+            self.send("id author LazyChess")
+            for option in OPTIONS:
+                self.send(option)
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            name, _, value = rest.removeprefix("name ").partition(" value ")
+            self.options[name.strip().lower()] = value.strip()
+        elif command == "ucinewgame":
+            self.board = chess.Board()
+        elif command == "position":
+            self.set_position(rest)
+        elif command == "go":
+            self.go(rest.split())
+        elif command == "stop":
+            self._stop.set()
+            self.wait()
+        elif command == "quit":
+            self._stop.set()
+            return False
+        return True
+
+    def set_position(self, args: str) -> None:
+        position, _, moves = args.partition(" moves ")
+        if position.startswith("fen "):
+            self.board = chess.Board(position[4:].strip())
+        else:
+            self.board = chess.Board()
+        for uci in moves.split():
+            self.board.push_uci(uci)
+
+    def go(self, args: list[str]) -> None:
+        self.wait()
+        self.searches += 1
+        if self.fail_after is not None and self.searches >= self.fail_after:
+            if self.fail_mode == "crash":
+                sys.exit(3)
+            if self.fail_mode == "hang":
+                self.hung = True
+                return
+        params = dict(zip(args[::2], args[1::2]))
+        infinite = "infinite" in args or "ponder" in args
+        budget = self.latency
+        if "movetime" in params:
+            budget = min(budget, int(params["movetime"]) / 1000)
+        depth = min(self.depth, int(params["depth"])) if "depth" in params else self.depth
+        self._stop.clear()
+        self._search = threading.Thread(target=self.search, args=(self.board.copy(), budget, depth, infinite),
+                                        daemon=True)
+        self._search.start()
+
+    def search(self, board: chess.Board, budget: float, depth: int, infinite: bool) -> None:
+        started = time.perf_counter()
+        lines = self.lines(board)
+        score = self.score(board)
+        for current in range(1, depth + 1):
+            if self._stop.wait(budget / depth):
+                break
+            elapsed = max(1, int((time.perf_counter() - started) * 1000))
+            nodes = current * 1000
+            for index, move in enumerate(lines):
+                self.send(
+                    f"info depth {current} seldepth {current} multipv {index + 1} score cp {score - 30 * index} "
+                    f"nodes {nodes} nps {nodes * 1000 // elapsed} time {elapsed} pv {move.uci()}"
+                )
+        if infinite:
+            self._stop.wait()
+        if self.fail_after is not None and self.searches >= self.fail_after and self.fail_mode == "illegal":
+            self.send("bestmove a1a1")
+        elif lines:
+            self.send(f"bestmove {lines[0].uci()}")
+        else:
+            self.send("bestmove (none)")
+
+    def wait(self) -> None:
+        if self._search is not None:
+            self._search.join()
+            self._search = None
+
+    def run(self, stdin=sys.stdin) -> None:
+        for line in stdin:
+            if not self.handle(line):
+                break
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Deterministic stand-in UCI engine.")
+    parser.add_argument("--script", help="JSON file with moves, scores, timings and failures")
+    parser.add_argument("--latency", type=float, help="seconds each search takes")
+    parser.add_argument("--depth", type=int, help="deepest info line reported")
+    parser.add_argument("--fail-after", type=int, help="fail on this search (1 = the first)")
+    parser.add_argument("--fail-mode", choices=FAIL_MODES)
+    args = parser.parse_args(argv)
+
+    script = {}
+    if args.script:
+        with open(args.script, encoding="utf-8") as fh:
+            script = json.load(fh)
+    for name in ("latency", "depth", "fail_after", "fail_mode"):
+        if getattr(args, name) is not None:
+            script[name] = getattr(args, name)
+    FakeEngine(**script).run()
+
+
+if __name__ == "__main__":
+    main()
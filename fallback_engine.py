@@ -0,0 +1,413 @@
+"""
+Small in-process engine used when no Stockfish binary is available.
+
+It implements the same adapter interface as engine.ChessEngine (analyze,
+best_move, stop, quit) with an iterative-deepening alpha-beta search,
+a transposition table, quiescence search on captures and move ordering
+by hash move, MVV-LVA, killer moves and the history heuristic.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+import chess
+import chess.engine
+import chess.polyglot
+
+from engine_profiles import options_for
+
+log = logging.getLogger(__name__)
+
+MATE = 10000
+INF = MATE + 1
+MAX_PLY = 64
+
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 320,
+    chess.BISHOP: 330,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 0,
+}
+
+# Piece-square tables from White's point of view, rank 8 first
+PST = {
+    chess.PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    chess.ROOK: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ],
+    chess.QUEEN: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ],
+}
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchStopped(Exception):
+    pass
+
+
+def evaluate(board: chess.Board) -> int:
+    """Material plus piece-square score, relative to the side to move."""
+    score = 0
+    for piece_type, value in PIECE_VALUES.items():
+        table = PST[piece_type]
+        for square in board.pieces(piece_type, chess.WHITE):
+            score += value + table[square ^ 56]
+        for square in board.pieces(piece_type, chess.BLACK):
+            score -= value + table[square]
+    return score if board.turn == chess.WHITE else -score
+
+
+class FallbackEngine:
+    default_time = 0.1
+    cache_depth = 3  # roughly what the default 0.1 s search reaches
+    tt_limit = 200_000
+    entries_per_mb = 5000  # a Python dict entry with its tuple is roughly 200 bytes
+
+    def __init__(self, profile: Optional[str] = None, instances: int = 1):
+        # Only the Hash option applies here; it bounds the transposition table
+        self.profile = profile
+        self.options = options_for(profile, instances) if profile else {}
+        if "Hash" in self.options:
+            self.tt_limit = self.options["Hash"] * self.entries_per_mb
+        self.searches = 0
+        self.total_nodes = 0
+        self.search_time = 0.0
+        self.tt: dict[int, tuple[int, int, int, Optional[chess.Move]]] = {}
+        self.history = [[0] * 64 for _ in range(64)]
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.nodes = 0
+        self.depth = 0  # last fully searched depth
+        self._stop = threading.Event()
+        self.stopped = False  # the last search was cut short by stop()
+        self._deadline: Optional[float] = None
+        self._max_nodes: Optional[int] = None
+        self._path: list[int] = []
+
+    def analyze(self, board: chess.Board, limit: Optional[chess.engine.Limit] = None) -> dict:
+        score, pv = self.search(board, limit)
+        if score is not None and abs(score) >= MATE - MAX_PLY:
+            # Reported like a UCI engine does: MATE minus moves, not plies
+            plies = MATE - abs(score)
+            score = MATE - (plies + 1) // 2 if score > 0 else -MATE + plies // 2
+        result = {"score": score, "pv": pv or None, "depth": self.depth}
+        if self.stopped:
+            result["stopped"] = True
+        return result
+
+    def best_move(self, board: chess.Board, limit: Optional[chess.engine.Limit] = None,
+                  options: Optional[dict] = None) -> Optional[chess.Move]:
+        """Of `options` only "Skill Level" is used; below 20 it caps the search depth."""
+        skill = (options or {}).get("Skill Level", 20)
+        if skill < 20:
+            depth = 1 + skill // 4
+            if limit is None:
+                limit = chess.engine.Limit(time=self.default_time, depth=depth)
+            elif limit.depth is None or limit.depth > depth:
+                limit = chess.engine.Limit(
+                    time=limit.time, nodes=limit.nodes, depth=depth,
+                    white_clock=limit.white_clock, black_clock=limit.black_clock,
+                    white_inc=limit.white_inc, black_inc=limit.black_inc,
+                )
+        _, pv = self.search(board, limit)
+        return pv[0] if pv else None
+
+    def stop(self) -> bool:
+        """Cut the search short; one that is still being set up stops as soon as it starts."""
+        self._stop.set()
+        return True
+
+    def telemetry(self) -> dict:
+        return {
+            "profile": self.profile,
+            "options": self.options,
+            "searches": self.searches,
+            "nodes": self.total_nodes,
+            "nps": int(self.total_nodes / self.search_time) if self.search_time else 0,
+        }
+
+    def quit(self) -> None:
+        log.info("Engine telemetry: %s", self.telemetry())
+        self.tt.clear()
+
+    def search(self, board: chess.Board, limit: Optional[chess.engine.Limit] = None) -> tuple[Optional[int], list[chess.Move]]:
+        """Iterative deepening; returns the score and PV of the last finished depth."""
+        self._stop.clear()  # a stop that came after the previous search ended is not for this one
+        board = board.copy()
+        self.stopped = False
+        self._configure(board, limit)
+        max_depth = limit.depth if limit is not None and limit.depth else MAX_PLY
+        if len(self.tt) > self.tt_limit:
+            self.tt.clear()
+        self.history = [[0] * 64 for _ in range(64)]
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+
+        score, pv = None, []
+        self.depth = 0
+        if board.is_game_over():
+            return (-MATE if board.is_checkmate() else 0), []
+
+        try:
+            for depth in range(1, max_depth + 1):
+                try:
+                    score = self._negamax(board, depth, -INF, INF, 0)
+                except SearchStopped:
+                    break
+                pv = self._principal_variation(board, depth)
+                self.depth = depth
+                if abs(score) >= MATE - MAX_PLY or self._out_of_time(0.5):
+                    break
+        finally:
+            self.stopped = self._stop.is_set()
+            self._stop.clear()
+            self.searches += 1
+            self.total_nodes += self.nodes
+            self.search_time += time.monotonic() - self._started
+
+        if not pv:
+            # Stopped before the first iteration finished; any legal move beats none
+            pv = [self._ordered_moves(board, 0, None)[0]]
+        return score, pv
+
+    def _configure(self, board: chess.Board, limit: Optional[chess.engine.Limit]) -> None:
+        self.nodes = 0
+        self._path = self._game_keys(board)
+        self._max_nodes = None
+        budget: Optional[float] = self.default_time
+        if limit is not None:
+            budget = limit.time
+            clock = limit.white_clock if board.turn == chess.WHITE else limit.black_clock
+            if clock is not None:
+                inc = (limit.white_inc if board.turn == chess.WHITE else limit.black_inc) or 0
+                clock_budget = clock / 30 + inc / 2
+                budget = clock_budget if budget is None else min(budget, clock_budget)
+            self._max_nodes = limit.nodes
+            if budget is None and limit.depth is None and limit.nodes is None:
+                budget = self.default_time
+        self._started = time.monotonic()
+        self._deadline = self._started + budget if budget is not None else None
+
+    def _out_of_time(self, fraction: float = 1.0) -> bool:
+        if self._deadline is None:
+            return False
+        return time.monotonic() - self._started >= (self._deadline - self._started) * fraction
+
+    @staticmethod
+    def _game_keys(board: chess.Board) -> list[int]:
+        """Positions of the game since the last capture or pawn move, so repeating them scores as a draw."""
+        history = board.copy()
+        keys = []
+        for _ in range(min(board.halfmove_clock, len(board.move_stack))):
+            history.pop()
+            keys.append(chess.polyglot.zobrist_hash(history))
+        return keys
+
+    def _check_limits(self) -> None:
+        if self._stop.is_set() or self._out_of_time():
+            raise SearchStopped
+        if self._max_nodes is not None and self.nodes >= self._max_nodes:
+            raise SearchStopped
+
+    def _negamax(self, board: chess.Board, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.nodes & 1023 == 0 or self.nodes == self._max_nodes:
+            self._check_limits()
+
+        key = chess.polyglot.zobrist_hash(board)
+        if ply > 0:
+            if key in self._path or board.halfmove_clock >= 100 or board.is_insufficient_material():
+                return 0
+
+        hash_move = None
+        entry = self.tt.get(key)
+        if entry is not None:
+            entry_depth, entry_score, flag, hash_move = entry
+            if ply > 0 and entry_depth >= depth:
+                entry_score = self._score_from_tt(entry_score, ply)
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER and entry_score >= beta:
+                    return entry_score
+                if flag == UPPER and entry_score <= alpha:
+                    return entry_score
+
+        in_check = board.is_check()
+        if depth <= 0 and not in_check:
+            return self._quiesce(board, alpha, beta, ply)
+
+        moves = self._ordered_moves(board, ply, hash_move)
+        if not moves:
+            return -MATE + ply if in_check else 0
+
+        alpha_orig = alpha
+        best_score, best_move = -INF, None
+        self._path.append(key)
+        try:
+            for move in moves:
+                capture = board.is_capture(move)
+                board.push(move)
+                try:
+                    score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    board.pop()
+
+                if score > best_score:
+                    best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                if alpha >= beta:
+                    if not capture:
+                        self._remember_quiet_cutoff(move, depth, ply)
+                    break
+        finally:
+            self._path.pop()
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt[key] = (depth, self._score_to_tt(best_score, ply), flag, best_move)
+        return best_score
+
+    def _quiesce(self, board: chess.Board, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.nodes & 1023 == 0 or self.nodes == self._max_nodes:
+            self._check_limits()
+
+        stand_pat = evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        captures = sorted(board.generate_legal_captures(), key=lambda m: self._mvv_lva(board, m), reverse=True)
+        for move in captures:
+            board.push(move)
+            try:
+                score = -self._quiesce(board, -beta, -alpha, ply + 1)
+            finally:
+                board.pop()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def _mvv_lva(self, board: chess.Board, move: chess.Move) -> int:
+        victim = board.piece_type_at(move.to_square)
+        if victim is None:
+            victim = chess.PAWN  # en passant
+        attacker = board.piece_type_at(move.from_square)
+        return PIECE_VALUES[victim] * 10 - PIECE_VALUES[attacker] // 10
+
+    def _ordered_moves(self, board: chess.Board, ply: int, hash_move: Optional[chess.Move]) -> list[chess.Move]:
+        killers = self.killers[min(ply, MAX_PLY)]
+
+        def order(move: chess.Move) -> int:
+            if move == hash_move:
+                return 10_000_000
+            if board.is_capture(move):
+                return 1_000_000 + self._mvv_lva(board, move)
+            if move.promotion:
+                return 900_000 + PIECE_VALUES[move.promotion]
+            if move == killers[0]:
+                return 800_000
+            if move == killers[1]:
+                return 700_000
+            return self.history[move.from_square][move.to_square]
+
+        return sorted(board.legal_moves, key=order, reverse=True)
+
+    def _remember_quiet_cutoff(self, move: chess.Move, depth: int, ply: int) -> None:
+        killers = self.killers[min(ply, MAX_PLY)]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move.from_square][move.to_square] += depth * depth
+
+    def _principal_variation(self, board: chess.Board, depth: int) -> list[chess.Move]:
+        pv = []
+        seen = set()
+        board = board.copy(stack=False)
+        while len(pv) < depth:
+            key = chess.polyglot.zobrist_hash(board)
+            entry = self.tt.get(key)
+            if entry is None or entry[3] is None or key in seen or not board.is_legal(entry[3]):
+                break
+            seen.add(key)
+            pv.append(entry[3])
+            board.push(entry[3])
+        return pv
+
+    @staticmethod
+    def _score_to_tt(score: int, ply: int) -> int:
+        if score >= MATE - MAX_PLY:
+            return score + ply
+        if score <= -MATE + MAX_PLY:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_tt(score: int, ply: int) -> int:
+        if score >= MATE - MAX_PLY:
+            return score - ply
+        if score <= -MATE + MAX_PLY:
+            return score + ply
+        return score
@@ -0,0 +1,306 @@
+"""
+Compact on-disk archive of many games. Moves take two bytes each (the same
+from/to/promotion code as the position index); headers, comments and NAGs
+go in a side table next to them. Games are grouped into zlib-compressed
+blocks, and a block index at the end of the file lets a reader jump to any
+game without decompressing the blocks before it.
+
+Only the mainline is kept: variations are dropped, everything else in a
+PGN survives the round trip.
+
+    python game_archive.py pack games.pgn games.lca
+    python game_archive.py unpack games.lca games.pgn
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from typing import Iterator, Union
+
+import chess
+import chess.pgn
+
+from position_index import encode_move, decode_move
+
+MAGIC = b"LCARC1"
+FILE_HEADER = struct.Struct("<6sH")  # magic, format version
+BLOCK = struct.Struct("<4sIII")  # marker, games, raw size, compressed size
+INDEX_ENTRY = struct.Struct("<QII")  # block offset, first game, games
+TRAILER = struct.Struct("<Q4s")  # index offset, marker
+BLOCK_MARK, INDEX_MARK, TRAILER_MARK = b"BLK0", b"IDX0", b"LCIX"
+VERSION = 1
+
+# Every 15-bit move code decoded once, so reading is a list lookup per move
+_MOVES = [decode_move(code) for code in range(1 << 15)]
+
+
+@dataclass
+class ArchivedGame:
+    headers: dict[str, str]
+    moves: list[chess.Move]
+    comment: str = ""  # before the first move
+    notes: dict[int, tuple[str, list[int]]] = field(default_factory=dict)  # move index -> comment, NAGs
+
+    @classmethod
+    def from_pgn(cls, game: chess.pgn.Game) -> "ArchivedGame":
+        moves, notes = [], {}
+        for index, node in enumerate(game.mainline()):
+            moves.append(node.move)
+            if node.comment or node.nags:
+                notes[index] = (node.comment, sorted(node.nags))
+        return cls(dict(game.headers), moves, game.comment, notes)
+
+    def to_pgn(self) -> chess.pgn.Game:
+        game = chess.pgn.Game(self.headers)
+        game.comment = self.comment
+        node = game
+        for index, move in enumerate(self.moves):
+            node = node.add_variation(move)
+            if index in self.notes:
+                node.comment, nags = self.notes[index]
+                node.nags.update(nags)
+        return game
+
+    def board(self) -> chess.Board:
+        """The starting position."""
+        fen = self.headers.get("FEN")
+        return chess.Board(fen, chess960=self.headers.get("Variant", "").lower() == "chess960") if fen \
+            else chess.Board()
+
+    def positions(self) -> Iterator[chess.Board]:
+        """Every position of the game, the start included. The same board is yielded each time."""
+        board = self.board()
+        yield board
+        for move in self.moves:
+            board.push(move)
+            yield board
+
+
+def _pack_block(games: list[ArchivedGame]) -> bytes:
+    side = json.dumps(
+        [[game.headers, game.comment, {str(k): v for k, v in game.notes.items()}] for game in games],
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode("utf-8")
+    lengths = array("I", (len(game.moves) for game in games))
+    codes = array("H", (encode_move(move) for game in games for move in game.moves))
+    if sys.byteorder == "big":
+        lengths.byteswap()
+        codes.byteswap()
+    return struct.pack("<I", len(side)) + side + lengths.tobytes() + codes.tobytes()
+
+
+def _unpack_block(raw: bytes, count: int) -> list[ArchivedGame]:
+    side_size = struct.unpack_from("<I", raw)[0]
+    side = json.loads(raw[4:4 + side_size])
+    start = 4 + side_size
+    lengths = array("I", raw[start:start + 4 * count])
+    codes = array("H", raw[start + 4 * count:])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+        codes.byteswap()
+    games, position = [], 0
+    for (headers, comment, notes), length in zip(side, lengths):
+        moves = [_MOVES[code] for code in codes[position:position + length]]
+        position += length
+        games.append(ArchivedGame(headers, moves, comment, {int(k): (v[0], v[1]) for k, v in notes.items()}))
+    return games
+
+
+def _read_block(fh, offset: int) -> list[ArchivedGame]:
+    fh.seek(offset)
+    _, games, _, compressed = BLOCK.unpack(fh.read(BLOCK.size))
+    return _unpack_block(zlib.decompress(fh.read(compressed)), games)
+
+
+def _read_index(fh) -> tuple[list[tuple[int, int, int]], int]:
+    """
+    Block index and the offset where the next block would go. Uses the index
+    written on close, or scans the block headers if the file was not closed.
+    """
+    size = fh.seek(0, os.SEEK_END)
+    if size >= FILE_HEADER.size + TRAILER.size:
+        fh.seek(size - TRAILER.size)
+        index_offset, mark = TRAILER.unpack(fh.read(TRAILER.size))
+        if mark == TRAILER_MARK:
+            fh.seek(index_offset)
+            marker, count = struct.unpack("<4sI", fh.read(8))
+            if marker == INDEX_MARK:
+                data = fh.read(count * INDEX_ENTRY.size)
+                return list(INDEX_ENTRY.iter_unpack(data)), index_offset
+
+    blocks, offset, first = [], FILE_HEADER.size, 0
+    while offset + BLOCK.size <= size:
+        fh.seek(offset)
+        marker, games, _, compressed = BLOCK.unpack(fh.read(BLOCK.size))
+        if marker != BLOCK_MARK or offset + BLOCK.size + compressed > size:
+            break  # index or a block cut short by a crash
+        blocks.append((offset, first, games))
+        first += games
+        offset += BLOCK.size + compressed
+    return blocks, offset
+
+
+class ArchiveWriter:
+    """
+    Appends games to an archive, a block at a time. Opening an existing
+    archive continues it; the block index is rewritten on close. A last
+    block with room left is rewritten with the next games, so saving one
+    game at a time still fills whole blocks. A crash during that rewrite
+    can lose the games of the last block, never those before it.
+    """
+
+    def __init__(self, path: str, block_games: int = 256, level: int = 6):
+        self.path = path
+        self.block_games = block_games
+        self.level = level
+        self._pending: list[ArchivedGame] = []
+        self._tail: list[ArchivedGame] = []  # games of the last block while it has room
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._fh = open(path, "r+b")
+            magic, _ = FILE_HEADER.unpack(self._fh.read(FILE_HEADER.size))
+            if magic != MAGIC:
+                self._fh.close()
+                raise ValueError(f"{path} is not a game archive")
+            self._blocks, end = _read_index(self._fh)
+            if self._blocks and self._blocks[-1][2] < block_games:
+                self._tail = _read_block(self._fh, self._blocks[-1][0])
+            self._fh.seek(end)
+            self._fh.truncate()
+        else:
+            self._fh = open(path, "wb")
+            self._fh.write(FILE_HEADER.pack(MAGIC, VERSION))
+            self._blocks = []
+        self.games = sum(games for _, _, games in self._blocks)
+
+    def write(self, game: Union[ArchivedGame, chess.pgn.Game]) -> None:
+        if isinstance(game, chess.pgn.Game):
+            game = ArchivedGame.from_pgn(game)
+        self._pending.append(game)
+        if len(self._pending) >= self.block_games:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the queued games, merged into the last block if it has room."""
+        if not self._pending:
+            return
+        games = self._tail + self._pending
+        self._pending = []
+        if self._tail:
+            offset, self.games, _ = self._blocks.pop()
+            self._fh.seek(offset)
+        for start in range(0, len(games), self.block_games):
+            chunk = games[start:start + self.block_games]
+            raw = _pack_block(chunk)
+            compressed = zlib.compress(raw, self.level)
+            offset = self._fh.tell()
+            self._fh.write(BLOCK.pack(BLOCK_MARK, len(chunk), len(raw), len(compressed)))
+            self._fh.write(compressed)
+            self._blocks.append((offset, self.games, len(chunk)))
+            self.games += len(chunk)
+        self._fh.truncate()
+        self._fh.flush()
+        self._tail = chunk if len(chunk) < self.block_games else []
+
+    def close(self) -> None:
+        self.flush()
+        index_offset = self._fh.tell()
+        self._fh.write(struct.pack("<4sI", INDEX_MARK, len(self._blocks)))
+        for entry in self._blocks:
+            self._fh.write(INDEX_ENTRY.pack(*entry))
+        self._fh.write(TRAILER.pack(index_offset, TRAILER_MARK))
+        self._fh.close()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class GameArchive:
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "rb")
+        magic, self.version = FILE_HEADER.unpack(self._fh.read(FILE_HEADER.size))
+        if magic != MAGIC:
+            self._fh.close()
+            raise ValueError(f"{path} is not a game archive")
+        self.blocks, _ = _read_index(self._fh)
+        self._cached: tuple[int, list[ArchivedGame]] = (-1, [])
+
+    def __len__(self) -> int:
+        return sum(games for _, _, games in self.blocks)
+
+    def _block(self, number: int) -> list[ArchivedGame]:
+        if self._cached[0] != number:
+            self._cached = (number, _read_block(self._fh, self.blocks[number][0]))
+        return self._cached[1]
+
+    def __getitem__(self, number: int) -> ArchivedGame:
+        if number < 0:
+            number += len(self)
+        for block, (_, first, games) in enumerate(self.blocks):
+            if first <= number < first + games:
+                return self._block(block)[number - first]
+        raise IndexError(number)
+
+    def __iter__(self) -> Iterator[ArchivedGame]:
+        for block in range(len(self.blocks)):
+            yield from self._block(block)
+
+    def positions(self) -> Iterator[chess.Board]:
+        """Every position of every game, in order."""
+        for game in self:
+            yield from game.positions()
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def __enter__(self) -> "GameArchive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def pgn_to_archive(pgn_path: str, archive_path: str) -> int:
+    """Pack every game of a PGN file; returns how many were written."""
+    count = 0
+    with open(pgn_path, encoding="utf-8", errors="replace") as fh, ArchiveWriter(archive_path) as writer:
+        while (game := chess.pgn.read_game(fh)) is not None:
+            writer.write(game)
+            count += 1
+    return count
+
+
+def archive_to_pgn(archive_path: str, pgn_path: str) -> int:
+    count = 0
+    with GameArchive(archive_path) as archive, open(pgn_path, "w", encoding="utf-8") as fh:
+        for game in archive:
+            print(game.to_pgn(), file=fh, end="\n\n")
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert between PGN and the compact game archive.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="append the games of a PGN to an archive")
+    pack.add_argument("pgn")
+    pack.add_argument("archive")
+    unpack = commands.add_parser("unpack", help="write an archive back out as PGN")
+    unpack.add_argument("archive")
+    unpack.add_argument("pgn")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        count = pgn_to_archive(args.pgn, args.archive)
+        print(f"{args.archive}: {count} games packed, {os.path.getsize(args.archive)} bytes "
+              f"(PGN {os.path.getsize(args.pgn)} bytes)")
+    else:
+        count = archive_to_pgn(args.archive, args.pgn)
+        print(f"{args.pgn}: {count} games")
@@ -0,0 +1,226 @@
+"""
+Game review that spends engine time where it matters. A shallow pass scores
+every position, then only the critical moves (big evaluation drops and
+only-move positions) are searched again deeper, within a fixed engine-time
+budget per game. Moves are classified as inaccuracy, mistake or blunder
+and written back to the PGN as NAGs with the engine's evaluation.
+
+    python game_review.py saved_game.pgn -o reviewed.pgn --budget 20
+"""
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import chess
+import chess.engine
+import chess.pgn
+
+from ply_table import PlyTable
+
+try:
+    from batch_eval import evaluate_boards
+except ImportError:  # numpy is optional
+    evaluate_boards = None
+
+SCORE_CAP = 1000  # mate and crushing scores count as this many centipawns
+MATE_SCORE = 10000  # engines report a mate in n moves as MATE_SCORE - n
+MAX_MATE = 500  # scores this close to MATE_SCORE are mates
+ONLY_MOVE_GAP = 150  # best line this much better than the second: the move was forced
+DECISIVE = 2 * SCORE_CAP  # static material edge beyond which the shallow search is skipped
+
+# (minimum loss in centipawns, name, NAG), most severe first
+CLASSES = [
+    (300, "blunder", chess.pgn.NAG_BLUNDER),
+    (100, "mistake", chess.pgn.NAG_MISTAKE),
+    (50, "inaccuracy", chess.pgn.NAG_DUBIOUS_MOVE),
+]
+
+
+@dataclass
+class MoveReview:
+    ply: int  # position after the move
+    san: str
+    loss: int = 0  # centipawns the mover gave away
+    classification: Optional[str] = None
+    nag: Optional[int] = None
+    best_move: Optional[chess.Move] = None
+    only_move: bool = False
+    deep: bool = False  # re-searched in the second pass
+
+
+@dataclass
+class ReviewResult:
+    moves: list[MoveReview]
+    scores: list[Optional[int]]  # White's point of view, one per position
+    engine_time: float
+    deep_plies: int
+    summary: dict = field(default_factory=dict)
+
+
+def _is_quiet(board: chess.Board) -> bool:
+    """Neither side can check or capture, and the game goes on: material alone tells the story."""
+    if board.is_check() or board.is_game_over():
+        return False
+    opponent = board.copy(stack=False)
+    opponent.push(chess.Move.null())
+    return not any(
+        position.is_capture(move) or position.gives_check(move)
+        for position in (board, opponent) for move in position.legal_moves
+    )
+
+
+def _capped(score: Optional[int]) -> int:
+    return max(-SCORE_CAP, min(SCORE_CAP, score or 0))
+
+
+class GameReviewer:
+    def __init__(self, engine, budget: float = 10.0, shallow_depth: Optional[int] = None,
+                 deep_depth: Optional[int] = None, shallow_share: float = 0.3):
+        self.engine = engine
+        self.budget = budget
+        base = getattr(engine, "cache_depth", 6)
+        self.shallow_depth = shallow_depth or max(1, base * 2 // 3)
+        self.deep_depth = deep_depth or base + base // 2
+        self.shallow_share = shallow_share
+        self.engine_time = 0.0
+        self.skipped = 0  # positions settled by the static evaluation alone
+
+    def review(self, plies: PlyTable) -> ReviewResult:
+        self.engine_time = 0.0
+        count = len(plies)
+        infos = []
+        boards = [plies.board_at(ply) for ply in range(count)]
+        static = evaluate_boards(boards) if evaluate_boards is not None else [0] * count
+        shallow_time = self.budget * self.shallow_share / count
+        self.skipped = 0
+        for board, static_score in zip(boards, static):
+            if abs(static_score) >= DECISIVE and _is_quiet(board):
+                # Far beyond the score cap with nothing forcing on the board: a search would agree
+                score = int(static_score) if board.turn == chess.WHITE else -int(static_score)
+                infos.append({"score": score, "pv": None})
+                self.skipped += 1
+            else:
+                infos.append(self._analyze(board, self.shallow_depth, shallow_time))
+
+        moves = [MoveReview(ply, plies[ply].san) for ply in range(1, count)]
+        for review in moves:
+            self._judge(review, plies, infos)
+
+        # Worst moves first, so an exhausted budget leaves only the quiet ones shallow
+        critical = sorted(
+            (review for review in moves if review.loss >= CLASSES[-1][0] or review.only_move),
+            key=lambda review: review.loss, reverse=True,
+        )
+        deep_plies = 0
+        searched = set()  # adjacent critical moves share a position, which is searched once
+        for index, review in enumerate(critical):
+            remaining = self.budget - self.engine_time
+            if remaining <= 0:
+                break
+            deep_time = remaining / (len(critical) - index) / 2  # two positions per move
+            for ply in (review.ply - 1, review.ply):
+                if ply not in searched:
+                    infos[ply] = self._analyze(plies.board_at(ply), self.deep_depth, deep_time)
+                    searched.add(ply)
+            review.deep = True
+            deep_plies += 1
+            self._judge(review, plies, infos)
+
+        scores = [self._white_score(plies, ply, info) for ply, info in enumerate(infos)]
+        summary = {}
+        for color in ("white", "black"):
+            side = [review for review in moves if (review.ply % 2 == 1) == (color == "white")]
+            summary[color] = {name: sum(review.classification == name for review in side) for _, name, _ in CLASSES}
+        return ReviewResult(moves, scores, self.engine_time, deep_plies, summary)
+
+    def _analyze(self, board: chess.Board, depth: int, seconds: float) -> dict:
+        if board.is_game_over():
+            return {"score": -MATE_SCORE if board.is_checkmate() else 0, "pv": None}
+        started = time.perf_counter()
+        try:
+            return self.engine.analyze(board, chess.engine.Limit(depth=depth, time=max(0.01, seconds)))
+        finally:
+            self.engine_time += time.perf_counter() - started
+
+    @staticmethod
+    def _white_score(plies: PlyTable, ply: int, info: dict) -> Optional[int]:
+        score = info.get("score")
+        if score is None:
+            return None
+        return score if plies[ply].fen.split()[1] == "w" else -score
+
+    @staticmethod
+    def _judge(review: MoveReview, plies: PlyTable, infos: list[dict]) -> None:
+        before, after = infos[review.ply - 1], infos[review.ply]
+        # Both scores are relative to the side to move, so the mover's loss is their sum
+        review.loss = max(0, _capped(before.get("score")) + _capped(after.get("score")))
+        pv = before.get("pv")
+        review.best_move = pv[0] if pv else None
+        lines = before.get("lines") or []
+        review.only_move = (
+            len(lines) > 1 and lines[0]["score"] is not None and lines[1]["score"] is not None
+            and lines[0]["score"] - lines[1]["score"] >= ONLY_MOVE_GAP
+        )
+        review.classification = review.nag = None
+        if review.best_move == plies[review.ply].move:
+            return
+        for threshold, name, nag in CLASSES:
+            if review.loss >= threshold:
+                review.classification, review.nag = name, nag
+                break
+
+
+def _engine_score(score: int) -> chess.engine.Score:
+    if abs(score) >= MATE_SCORE - MAX_MATE:
+        moves = MATE_SCORE - abs(score)
+        return chess.engine.Mate(moves if score > 0 else -moves)
+    return chess.engine.Cp(score)
+
+
+def annotate(game: chess.pgn.Game, result: ReviewResult) -> chess.pgn.Game:
+    """Add NAGs, evaluations and better moves to the mainline of `game`."""
+    nodes = list(game.mainline())
+    for review, node in zip(result.moves, nodes):
+        score = result.scores[review.ply]
+        if score is not None:
+            node.set_eval(chess.engine.PovScore(_engine_score(score), chess.WHITE))
+        if review.nag is not None:
+            node.nags.add(review.nag)
+            if review.best_move is not None:
+                best = node.parent.board().san(review.best_move)
+                node.comment = f"{node.comment} {review.classification.capitalize()}. {best} was best.".strip()
+    return game
+
+
+def review_pgn(path: str, output: str, engine, budget: float) -> ReviewResult:
+    with open(path) as fh:
+        game = chess.pgn.read_game(fh)
+    if game is None:
+        raise ValueError(f"No game in {path}")
+    result = GameReviewer(engine, budget).review(PlyTable.from_game(game))
+    with open(output, "w") as fh:
+        print(annotate(game, result), file=fh, end="\n\n")
+    return result
+
+
+if __name__ == "__main__":
+    from engine import open_engine
+    from engine_locator import find_stockfish
+    from eval_store import EvalStore
+
+    parser = argparse.ArgumentParser(description="Review a game and annotate its PGN.")
+    parser.add_argument("pgn")
+    parser.add_argument("-o", "--output", help="annotated PGN (default: <name>.reviewed.pgn)")
+    parser.add_argument("--budget", type=float, default=10.0, help="engine seconds for the whole game")
+    args = parser.parse_args()
+
+    engine = open_engine(find_stockfish(), "analysis-deep", store=EvalStore())
+    try:
+        output = args.output or args.pgn.rsplit(".", 1)[0] + ".reviewed.pgn"
+        result = review_pgn(args.pgn, output, engine, args.budget)
+    finally:
+        engine.quit()
+    print(f"{output}: {result.deep_plies} critical moves re-searched in {result.engine_time:.1f}s")
+    for color, counts in result.summary.items():
+        print(f"{color}: " + ", ".join(f"{count} {name}" for name, count in counts.items()))
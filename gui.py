@@ -5,20 +5,28 @@ import chess.pgn
 from PIL import Image, ImageTk
 import os
 
-from engine import ChessEngine
+from analysis_worker import AnalysisWorker
+from engine import open_engine
+from eval_store import EvalStore
+from engine_locator import find_stockfish
 from move_history import MoveHistory
 from navigation import Navigation
+from ply_table import PlyTable
 
 class ChessAnalyzerApp:
+    poll_interval = 50  # ms between checks for finished background analysis
+
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title("Chess Analyzer with Stockfish")
 
-        self.engine = ChessEngine("stockfish/stockfish-windows-x86-64-avx2.exe")
+        self.engine = open_engine(find_stockfish(), "analysis-deep", store=EvalStore())
+        self.worker = AnalysisWorker(self.engine)
         self.board = chess.Board()
         self.selected_square = None
         self.piece_images = self.load_piece_images()
-        self.move_stack = []
+        self.plies = PlyTable()
+        self.ply = 0
         self.setup_gui()
         self.cumulative_score = 0  # Initialize cumulative score
 
@@ -26,6 +34,8 @@ class ChessAnalyzerApp:
         if os.path.exists("saved_game.pgn"):
             self.load_pgn_from_path("saved_game.pgn")
 
+        self.root.after(self.poll_interval, self.poll_analysis)
+
     def setup_gui(self):
         self.frame = tk.Frame(self.root)
         self.frame.pack(padx=10, pady=10)
@@ -51,29 +61,33 @@ class ChessAnalyzerApp:
 
         self.board_canvas.bind("<Button-1>", self.on_board_click)
 
-        self.navigation = Navigation(self.frame, self.next_move, self.prev_move)
+        self.navigation = Navigation(
+            self.frame,
+            self.next_move,
+            self.prev_move,
+            on_first=self.first_move,
+            on_last=self.last_move,
+            on_scrub=self.jump_to_ply,
+        )
         self.navigation.frame.grid(row=9, column=1, columnspan=4, pady=5)
 
-        self.move_history = MoveHistory(self.frame)
+        self.move_history = MoveHistory(self.frame, on_select=self.jump_to_ply)
         self.move_history.frame.grid(row=0, column=3, rowspan=8, padx=5, pady=5)
 
+        self.draw_board_squares()
         self.refresh_board()
 
     def load_pgn_from_path(self, path: str):
         with open(path) as f:
             game = chess.pgn.read_game(f)
             if game:
-                self.board = game.board()
-                self.move_stack = list(game.mainline_moves())
+                self.plies = PlyTable.from_game(game)
             else:
                 messagebox.showerror("Error", "Failed to load PGN file.")
                 return
 
         self.analysis_area.delete(1.0, tk.END)
-        self.refresh_board()
-        self.analyze_current_position()
-        self.move_history.update(self.move_stack)
-        self.update_analysis_bar()
+        self.show_ply(0)
 
     def load_pgn(self):
         file_path = filedialog.askopenfilename(
@@ -84,13 +98,10 @@ class ChessAnalyzerApp:
         self.load_pgn_from_path(file_path)
 
     def reset_board(self):
-        self.board.reset()
-        self.move_stack = []
+        self.plies = PlyTable()
         self.analysis_area.delete(1.0, tk.END)
         self.cumulative_score = 0  # Reset cumulative score
-        self.refresh_board()
-        self.move_history.update(self.move_stack)
-        self.update_analysis_bar()
+        self.show_ply(0)
 
     def on_board_click(self, event):
         x, y = event.x, event.y
@@ -104,36 +115,94 @@ class ChessAnalyzerApp:
         else:
             move = chess.Move(self.selected_square, square)
             if move in self.board.legal_moves:
-                self.board.push(move)
                 self.selected_square = None
-                self.refresh_board()
-                self.analyze_current_position()
-                self.move_history.update(self.board.move_stack)
-                self.update_analysis_bar()
+                self.show_ply(self.plies.play(self.ply, move))
             else:
                 self.selected_square = None
 
+    def show_ply(self, ply: int):
+        self.ply = ply
+        self.board = self.plies.board_at(ply)
+        self.refresh_board()
+        self.update_move_history()
+        self.navigation.set_ply(ply, self.plies.last_ply)
+        self.analyze_current_position()
+
+    def jump_to_ply(self, ply: int):
+        ply = self.plies.clamp(ply)
+        if ply != self.ply:
+            self.show_ply(ply)
+
+    def first_move(self):
+        self.jump_to_ply(0)
+
+    def last_move(self):
+        self.jump_to_ply(self.plies.last_ply)
+
     def analyze_current_position(self):
-        analysis = self.engine.analyze(self.board)
+        analysis = self.plies[self.ply].analysis
+        if analysis is not None:
+            self.show_analysis(self.board, analysis)
+            self.update_analysis_bar(analysis)
+            return
+        # The search runs on the worker thread; a newer request replaces
+        # any position that has not been picked up yet.
+        self.worker.submit(self.board)
+
+    def poll_analysis(self):
+        result = self.worker.poll()
+        if result is not None:
+            board, analysis = result
+            entry = self.plies[self.ply]
+            if board.fen() == entry.fen:
+                if not analysis.get("error"):
+                    entry.analysis = analysis
+                self.show_analysis(board, analysis)
+                self.update_analysis_bar(analysis)
+        self.root.after(self.poll_interval, self.poll_analysis)
+
+    def show_analysis(self, board: chess.Board, analysis: dict):
         self.analysis_area.delete(1.0, tk.END)
-        if self.board.move_stack:
-            self.analysis_area.insert(tk.END, f"Move: {self.board.peek()}\n")
+        if board.move_stack:
+            self.analysis_area.insert(tk.END, f"Move: {board.peek()}\n")
+        if analysis.get("error"):
+            self.analysis_area.insert(tk.END, f"Engine error: {analysis['error']}\n")
+            return
         self.analysis_area.insert(tk.END, f"Score: {analysis['score']}\n")
         if "pv" in analysis and analysis["pv"]:
             self.analysis_area.insert(tk.END, f"Best Move: {analysis['pv'][0]}\n\n")
 
-    def refresh_board(self):
-        self.board_canvas.delete("all")
+    def draw_board_squares(self):
+        # Squares and one image item per square are created once; moves
+        # only swap the images of squares whose piece changed.
+        self.square_items = {}
+        self.drawn_pieces = {}
         for square in chess.SQUARES:
             col, row = chess.square_file(square), chess.square_rank(square)
             x1, y1 = col * 50, (7 - row) * 50
             x2, y2 = x1 + 50, y1 + 50
             color = "#F0D9B5" if (col + row) % 2 == 0 else "#B58863"
             self.board_canvas.create_rectangle(x1, y1, x2, y2, fill=color)
+            self.square_items[square] = self.board_canvas.create_image(
+                x1, y1, anchor=tk.NW, state=tk.HIDDEN
+            )
+
+    def refresh_board(self):
+        for square, item in self.square_items.items():
             piece = self.board.piece_at(square)
-            if piece:
-                piece_image = self.piece_images[piece.symbol()]
-                self.board_canvas.create_image(x1, y1, anchor=tk.NW, image=piece_image)
+            symbol = piece.symbol() if piece else None
+            if self.drawn_pieces.get(square) == symbol:
+                continue
+            if symbol is None:
+                self.board_canvas.itemconfigure(item, state=tk.HIDDEN)
+            else:
+                self.board_canvas.itemconfigure(
+                    item, image=self.piece_images[symbol], state=tk.NORMAL
+                )
+            self.drawn_pieces[square] = symbol
+
+    def update_move_history(self):
+        self.move_history.update(self.plies.sans, self.ply)
 
     def load_piece_images(self):
         piece_symbols = {
@@ -157,32 +226,22 @@ class ChessAnalyzerApp:
         return piece_images
 
     def on_quit(self):
+        self.worker.stop()
         self.engine.quit()
         self.root.destroy()
 
     def next_move(self):
-        if self.move_stack:
-            move = self.move_stack.pop(0)
-            self.board.push(move)
-            self.refresh_board()
-            self.analyze_current_position()
-            self.move_history.update(self.board.move_stack)
-            self.update_analysis_bar()
+        self.jump_to_ply(self.ply + 1)
 
     def prev_move(self):
-        if self.board.move_stack:
-            move = self.board.pop()
-            self.move_stack.insert(0, move)
-            self.refresh_board()
-            self.analyze_current_position()
-            self.move_history.update(self.board.move_stack)
-            self.update_analysis_bar()
-
-    def update_analysis_bar(self):
-        analysis = self.engine.analyze(self.board)
+        self.jump_to_ply(self.ply - 1)
+
+    def update_analysis_bar(self, analysis: dict):
         score = analysis["score"]
 
-        if isinstance(score, int):
+        if score is None:
+            normalized_score = 0
+        elif isinstance(score, int):
             normalized_score = score / 100
         else:
             normalized_score = score.relative.score()
@@ -202,7 +261,6 @@ class ChessAnalyzerApp:
         self.analysis_bar.create_rectangle(
             0, white_percentage * 4, 20, 400, fill="#000000", outline=""
         )
-        self.analysis_bar.update()
 
 if __name__ == "__main__":
     root = tk.Tk()
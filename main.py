@@ -1,24 +1,39 @@
+import argparse
+import logging
+import os
+from typing import Optional
+
 import pygame as pg
 
 from core.game import Game, MenuState
 from core.event_holder import EventHolder
+from core.profiler import Profiler
 from core import common_resources as cr
 from analyzer_pygame import run_analyzer
+from engine_profiles import PROFILES
+from difficulty import DEFAULT_DIFFICULTY, TIERS
 
-def main_loop():
+def main_loop(event_holder: Optional[EventHolder] = None, fps: int = 60, engine_profile: Optional[str] = None,
+              difficulty: str = DEFAULT_DIFFICULTY, profiler: Optional[Profiler] = None) -> Optional[Game]:
+    """Menu and games until the window is closed; returns the last game played."""
     pg.init()
-    cr.screen = pg.display.set_mode([1000, 720])
-    cr.event_holder = EventHolder()
+    cr.screen = pg.display.set_mode([1000, 720], pg.RESIZABLE)
+    cr.event_holder = event_holder if event_holder is not None else EventHolder()
+    cr.event_holder.restrict_event_queue()
+    if profiler is not None:
+        cr.profiler = profiler
 
-    fps = 60
+    game = None
     while not cr.event_holder.should_quit:
-        menu = MenuState()
+        menu = MenuState(engine_profile, difficulty)
         result = menu.run()
+        engine_profile = menu.engine_profile
+        difficulty = menu.difficulty
         if cr.event_holder.should_quit or result is None:
             break
-        mode, color, limit = result
+        mode, color, limit, increment = result
         if mode == "analyzer":
-            run_analyzer()
+            run_analyzer(engine_profile or "analysis-deep")
             continue
         ai_color = "black" if color == "white" else "white"
         game = Game(
@@ -26,17 +41,60 @@ def main_loop():
             ai_active=(mode == "bot"),
             timed_play=limit is not None,
             time_limit=limit,
+            increment=increment,
+            engine_profile=engine_profile or "bot-blitz",
+            difficulty=difficulty,
         )
         clock = pg.time.Clock()
         while not cr.event_holder.should_quit and not game.return_to_menu:
             cr.event_holder.get_events()
+            cr.profiler.check(cr.event_holder.pressed_keys)
             game.check_events()
             game.render()
+            cr.profiler.draw(cr.screen)
             pg.display.update()
             clock.tick(fps)
+        game.close()
 
+    cr.profiler.stop()
     pg.quit()
+    return game
+
+
+def run_replay(path: str) -> dict:
+    """Replay a recording headless and as fast as possible, returning frame timings and the moves played."""
+    from core.input_recording import ReplayEventHolder
+
+    os.environ["SDL_VIDEODRIVER"] = "dummy"  # a replay never opens a window, whatever the shell set
+    holder = ReplayEventHolder(path)
+    game = main_loop(holder, fps=0)
+    return {**holder.report(), "moves": " ".join(game.moves_sequence) if game is not None else ""}
+
 
 # Додаємо запуск
 if __name__ == "__main__":
-    main_loop()
+    parser = argparse.ArgumentParser(description="LazyChess")
+    parser.add_argument("--record", metavar="PATH", help="record the input of this session")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recording and report frame timings")
+    parser.add_argument("--profile", choices=PROFILES, help="engine profile (default: bot-blitz for games, analysis-deep for the analyzer)")
+    parser.add_argument("--difficulty", default=DEFAULT_DIFFICULTY, choices=TIERS, help="bot strength")
+    parser.add_argument("--profile-for", type=float, metavar="SECONDS",
+                        help="record a CPU and memory profile from startup (F9 toggles one at any time)")
+    parser.add_argument("--profile-dir", default="profiles", help="where profiles are written")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.replay:
+        for name, value in run_replay(args.replay).items():
+            print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+    else:
+        profiler = Profiler(args.profile_dir)
+        if args.profile_for:
+            profiler.start(args.profile_for)
+        if args.record:
+            from core.input_recording import InputRecorder
+
+            with InputRecorder(args.record) as recorder:
+                main_loop(recorder, engine_profile=args.profile, difficulty=args.difficulty, profiler=profiler)
+        else:
+            main_loop(engine_profile=args.profile, difficulty=args.difficulty, profiler=profiler)
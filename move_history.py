@@ -1,13 +1,48 @@
 import tkinter as tk
 
 class MoveHistory:
-    def __init__(self, parent: tk.Widget):
+    highlight_color = "#B58863"
+
+    def __init__(self, parent: tk.Widget, on_select=None):
         self.frame = tk.Frame(parent)
         self.frame.grid(row=0, column=2, rowspan=8, padx=10, pady=5)
         self.history_area = tk.Listbox(self.frame, width=30)
         self.history_area.pack(fill=tk.BOTH, expand=True)
+        self.on_select = on_select
+        self.history_area.bind("<<ListboxSelect>>", self._select)
+        self.entries: list[str] = []
+        self.current = None
+
+    def update(self, moves, current_ply=None):
+        """
+        Show ``moves`` (SAN strings) and highlight ``current_ply`` (number of
+        moves played). Only the rows after the first difference are rewritten.
+        """
+        entries = list(moves)
+        common = 0
+        for old, new in zip(self.entries, entries):
+            if old != new:
+                break
+            common += 1
+
+        if common < len(self.entries):
+            self.history_area.delete(common, tk.END)
+        if common < len(entries):
+            self.history_area.insert(tk.END, *entries[common:])
+        self.entries = entries
+        self.highlight(current_ply)
+
+    def highlight(self, current_ply):
+        if self.current is not None and self.current < len(self.entries):
+            self.history_area.itemconfig(self.current, background="")
+        self.current = None
+        if current_ply and current_ply <= len(self.entries):
+            index = current_ply - 1
+            self.history_area.itemconfig(index, background=self.highlight_color)
+            self.history_area.see(index)
+            self.current = index
 
-    def update(self, move_stack):
-        self.history_area.delete(0, tk.END)
-        for move in move_stack:
-            self.history_area.insert(tk.END, move.uci())
+    def _select(self, event):
+        selection = self.history_area.curselection()
+        if selection and self.on_select is not None:
+            self.on_select(selection[0] + 1)
@@ -1,12 +1,33 @@
 import tkinter as tk
 
 class Navigation:
-    def __init__(self, parent: tk.Widget, on_next, on_prev):
+    def __init__(self, parent: tk.Widget, on_next, on_prev, on_first=None, on_last=None, on_scrub=None):
         self.frame = tk.Frame(parent)
         self.frame.grid(row=8, column=0, columnspan=2, pady=5)
 
+        self.first_button = tk.Button(self.frame, text="<<", command=on_first)
+        self.first_button.grid(row=0, column=0, padx=5)
+
         self.prev_button = tk.Button(self.frame, text="Previous Move", command=on_prev)
-        self.prev_button.grid(row=0, column=0, padx=5)
+        self.prev_button.grid(row=0, column=1, padx=5)
 
         self.next_button = tk.Button(self.frame, text="Next Move", command=on_next)
-        self.next_button.grid(row=0, column=1, padx=5)
+        self.next_button.grid(row=0, column=2, padx=5)
+
+        self.last_button = tk.Button(self.frame, text=">>", command=on_last)
+        self.last_button.grid(row=0, column=3, padx=5)
+
+        self.on_scrub = on_scrub
+        self.slider = tk.Scale(
+            self.frame, from_=0, to=0, orient=tk.HORIZONTAL, length=300,
+            showvalue=True, command=self._scrub,
+        )
+        self.slider.grid(row=1, column=0, columnspan=4, pady=5)
+
+    def set_ply(self, ply: int, last_ply: int):
+        self.slider.configure(to=last_ply)
+        self.slider.set(ply)
+
+    def _scrub(self, value):
+        if self.on_scrub is not None:
+            self.on_scrub(int(value))
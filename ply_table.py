@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import chess
+import chess.pgn
+
+
+@dataclass
+class PlyEntry:
+    fen: str
+    move: Optional[chess.Move] = None  # move that led to this position
+    san: Optional[str] = None
+    analysis: Optional[dict] = None  # cached engine result for this position
+
+
+class PlyTable:
+    """
+    Every position of a game, precomputed once so any ply can be shown
+    without replaying the moves before it. Entry 0 is the start position.
+    """
+
+    def __init__(self, board: Optional[chess.Board] = None, moves: Iterable[chess.Move] = ()):
+        board = chess.Board() if board is None else board.copy(stack=False)
+        self.entries = [PlyEntry(board.fen())]
+        for move in moves:
+            self._push(board, move)
+
+    @classmethod
+    def from_game(cls, game: chess.pgn.Game) -> "PlyTable":
+        return cls(game.board(), game.mainline_moves())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, ply: int) -> PlyEntry:
+        return self.entries[ply]
+
+    @property
+    def last_ply(self) -> int:
+        return len(self.entries) - 1
+
+    @property
+    def moves(self) -> list[chess.Move]:
+        return [entry.move for entry in self.entries[1:]]
+
+    @property
+    def sans(self) -> list[str]:
+        return [entry.san for entry in self.entries[1:]]
+
+    def clamp(self, ply: int) -> int:
+        return max(0, min(ply, self.last_ply))
+
+    def white_score(self, ply: int) -> Optional[int]:
+        """Cached score of ``ply`` in centipawns from White's point of view."""
+        entry = self.entries[ply]
+        if entry.analysis is None or entry.analysis.get("score") is None:
+            return None
+        score = entry.analysis["score"]
+        return score if entry.fen.split()[1] == "w" else -score
+
+    def board_at(self, ply: int) -> chess.Board:
+        """Return the position after ``ply`` moves, with its last move on the stack."""
+        entry = self.entries[ply]
+        if entry.move is None:
+            return chess.Board(entry.fen)
+        board = chess.Board(self.entries[ply - 1].fen)
+        board.push(entry.move)
+        return board
+
+    def play(self, ply: int, move: chess.Move) -> int:
+        """
+        Play ``move`` from ``ply``. Following the game line keeps the table;
+        anything else replaces the rest of the line. Returns the new ply.
+        """
+        if ply < self.last_ply and self.entries[ply + 1].move == move:
+            return ply + 1
+        del self.entries[ply + 1:]
+        self._push(chess.Board(self.entries[ply].fen), move)
+        return ply + 1
+
+    def _push(self, board: chess.Board, move: chess.Move) -> None:
+        san = board.san(move)
+        board.push(move)
+        self.entries.append(PlyEntry(board.fen(), move, san))
@@ -0,0 +1,235 @@
+"""
+Which games of a PGN collection reached a position, and what was played
+from it. One streaming pass over the PGN writes <pgn>.idx: a table of game
+offsets followed by fixed-size records sorted by Zobrist key. The index is
+memory-mapped and searched by bisection, so a lookup reads a few pages
+however large the collection is.
+
+    python position_index.py games.pgn          # build or refresh the index
+"""
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import chess
+import chess.pgn
+import chess.polyglot
+
+MAGIC = b"LCIDX1"
+HEADER = struct.Struct("<6sQQQQ")  # magic, pgn size, pgn mtime_ns, games, records
+GAME = struct.Struct("<QB")  # byte offset in the PGN, result code
+RECORD = struct.Struct("<QIHH")  # zobrist key, game number, ply, next move
+NO_MOVE = 0xFFFF
+RESULTS = {"1-0": 0, "0-1": 1, "1/2-1/2": 2}
+UNKNOWN_RESULT = 3
+
+
+def encode_move(move: Optional[chess.Move]) -> int:
+    if move is None:
+        return NO_MOVE
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def decode_move(code: int) -> Optional[chess.Move]:
+    if code == NO_MOVE:
+        return None
+    return chess.Move(code & 63, code >> 6 & 63, code >> 12 or None)
+
+
+@dataclass
+class MoveStat:
+    move: chess.Move
+    san: str
+    games: int = 0
+    white_wins: int = 0
+    draws: int = 0
+    black_wins: int = 0
+
+    def score(self, turn: chess.Color) -> float:
+        """Points per game for the side that played the move, 0..1."""
+        decided = self.white_wins + self.draws + self.black_wins
+        if not decided:
+            return 0.5
+        wins = self.white_wins if turn == chess.WHITE else self.black_wins
+        return (wins + self.draws / 2) / decided
+
+
+def _spill(records: list[tuple]) -> str:
+    records.sort()
+    fd, path = tempfile.mkstemp(suffix=".idxpart")
+    with os.fdopen(fd, "wb") as fh:
+        for record in records:
+            fh.write(RECORD.pack(*record))
+    records.clear()
+    return path
+
+
+def _read_records(path: str) -> Iterator[tuple]:
+    with open(path, "rb") as fh:
+        while chunk := fh.read(RECORD.size * 4096):
+            yield from RECORD.iter_unpack(chunk)
+
+
+class PositionIndex:
+    def __init__(self, index_path: str, pgn_path: Optional[str] = None):
+        self.path = index_path
+        self.pgn_path = pgn_path or index_path.removesuffix(".idx")
+        self._file = open(index_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # an empty file cannot be mapped
+            self._file.close()
+            raise ValueError(f"{index_path} is not a position index") from None
+        try:
+            magic, self.pgn_size, self.pgn_mtime, self.game_count, self.record_count = HEADER.unpack_from(self._map)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{index_path} is not a position index")
+        self._games_start = HEADER.size
+        self._records_start = self._games_start + self.game_count * GAME.size
+
+    @classmethod
+    def open_for(cls, pgn_path: str, max_ply: Optional[int] = None) -> "PositionIndex":
+        """The index of `pgn_path`, built first if it is missing, unreadable or older than the PGN."""
+        index_path = pgn_path + ".idx"
+        if os.path.exists(index_path):
+            try:
+                index = cls(index_path, pgn_path)
+            except (OSError, ValueError):
+                index = None
+            if index is not None:
+                stat = os.stat(pgn_path)
+                if (index.pgn_size, index.pgn_mtime) == (stat.st_size, stat.st_mtime_ns):
+                    return index
+                index.close()
+        return cls.build(pgn_path, index_path, max_ply)
+
+    @classmethod
+    def build(cls, pgn_path: str, index_path: Optional[str] = None, max_ply: Optional[int] = None,
+              chunk_records: int = 500_000) -> "PositionIndex":
+        """
+        Index every position of every game (up to `max_ply`). Records are
+        sorted in chunks of `chunk_records` on disk and merged, so memory use
+        does not grow with the collection.
+        """
+        index_path = index_path or pgn_path + ".idx"
+        games = bytearray()
+        records: list[tuple] = []
+        parts: list[str] = []
+        try:
+            with open(pgn_path, encoding="utf-8", errors="replace") as fh:
+                game_number = 0
+                while True:
+                    offset = fh.tell()
+                    game = chess.pgn.read_game(fh)
+                    if game is None:
+                        break
+                    games += GAME.pack(offset, RESULTS.get(game.headers.get("Result"), UNKNOWN_RESULT))
+                    board = game.board()
+                    moves = list(game.mainline_moves())
+                    last = len(moves) if max_ply is None else min(len(moves), max_ply)
+                    for ply in range(last + 1):
+                        move = moves[ply] if ply < len(moves) else None
+                        records.append((chess.polyglot.zobrist_hash(board), game_number, ply, encode_move(move)))
+                        if move is not None:
+                            board.push(move)
+                    if len(records) >= chunk_records:
+                        parts.append(_spill(records))
+                    game_number += 1
+
+            records.sort()
+            stat = os.stat(pgn_path)
+            count = len(records) + sum(os.path.getsize(part) // RECORD.size for part in parts)
+            with open(index_path + ".tmp", "wb") as out:
+                out.write(HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, game_number, count))
+                out.write(games)
+                for record in heapq.merge(records, *(_read_records(part) for part in parts)):
+                    out.write(RECORD.pack(*record))
+            os.replace(index_path + ".tmp", index_path)
+        finally:
+            for part in parts:
+                os.remove(part)
+        return cls(index_path, pgn_path)
+
+    def _key_at(self, position: int) -> int:
+        return struct.unpack_from("<Q", self._map, self._records_start + position * RECORD.size)[0]
+
+    def _range(self, key: int) -> tuple[int, int]:
+        """First and one-past-last record with `key`, by binary search."""
+        low, high = 0, self.record_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        start, high = low, self.record_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) <= key:
+                low = middle + 1
+            else:
+                high = middle
+        return start, low
+
+    def _records(self, board: chess.Board) -> Iterator[tuple]:
+        start, end = self._range(chess.polyglot.zobrist_hash(board))
+        begin = self._records_start + start * RECORD.size
+        return RECORD.iter_unpack(self._map[begin:self._records_start + end * RECORD.size])
+
+    def game(self, number: int) -> tuple[int, int]:
+        """Byte offset and result code of game `number`."""
+        return GAME.unpack_from(self._map, self._games_start + number * GAME.size)
+
+    def lookup(self, board: chess.Board) -> list[tuple[int, int]]:
+        """(game number, ply) of every time `board` occurred."""
+        return [(game, ply) for _, game, ply, _ in self._records(board)]
+
+    def stats(self, board: chess.Board) -> list[MoveStat]:
+        """Moves played from `board`, most popular first."""
+        stats: dict[int, MoveStat] = {}
+        for _, game, _, code in self._records(board):
+            move = decode_move(code)
+            if move is None or not board.is_legal(move):
+                continue  # game ended here, or a Zobrist collision
+            stat = stats.get(code)
+            if stat is None:
+                stat = stats[code] = MoveStat(move, board.san(move))
+            stat.games += 1
+            result = self.game(game)[1]
+            if result == 0:
+                stat.white_wins += 1
+            elif result == 1:
+                stat.black_wins += 1
+            elif result == 2:
+                stat.draws += 1
+        return sorted(stats.values(), key=lambda stat: stat.games, reverse=True)
+
+    def read_game(self, number: int) -> chess.pgn.Game:
+        with open(self.pgn_path, encoding="utf-8", errors="replace") as fh:
+            fh.seek(self.game(number)[0])
+            return chess.pgn.read_game(fh)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the position index of a PGN collection.")
+    parser.add_argument("pgn")
+    parser.add_argument("--max-ply", type=int, help="only index the first plies of each game")
+    args = parser.parse_args()
+
+    index = PositionIndex.open_for(args.pgn, args.max_ply)
+    print(f"{index.path}: {index.game_count} games, {index.record_count} positions")
+    for stat in index.stats(chess.Board())[:5]:
+        print(f"{stat.san:8} {stat.games:8} {stat.score(chess.WHITE):.0%}")
+    index.close()
@@ -0,0 +1,369 @@
+"""
+Headless multi-session game server.
+
+Every TCP connection on localhost is one human-vs-bot game. Messages are
+JSON objects, one per line:
+
+    {"type": "new", "color": "white", "time_limit": 180, "increment": 2}
+    {"type": "move", "uci": "e2e4"}
+    {"type": "state"}
+    {"type": "metrics"}
+
+With --archive, every game played is appended to a compact game archive
+(see game_archive.py) when it is replaced by a new one or the connection
+closes.
+
+Bot replies are computed on a bounded pool of engines shared by all
+sessions. Waiting requests are served round-robin by session, so one busy
+game cannot starve the others.
+
+    python server.py --port 8765 --engines 2
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import chess
+import chess.engine
+
+from core.game_core import GameCore
+from engine_profiles import PROFILES
+from game_archive import ArchiveWriter
+
+log = logging.getLogger(__name__)
+
+ENGINE_FAILED = "Aborted: the engine failed"
+
+
+class LatencyStats:
+    def __init__(self, keep: int = 1000):
+        self.samples = collections.deque(maxlen=keep)
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"count": 0}
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * sum(ordered) / len(ordered),
+            "p50_ms": 1000 * ordered[len(ordered) // 2],
+            "p95_ms": 1000 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max_ms": 1000 * ordered[-1],
+        }
+
+
+class EnginePool:
+    """
+    A fixed number of engines shared by all sessions. Each engine runs its
+    searches on its own thread; requests wait in per-session queues and
+    are handed out round-robin by session.
+    """
+
+    def __init__(self, engine_factory: Callable, size: int = 2, limit: Optional[chess.engine.Limit] = None):
+        self.engine_factory = engine_factory
+        self.size = size
+        self.limit = limit
+        self.engines = []
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="engine")
+        self._idle: Optional[asyncio.Queue] = None
+        self._pending: "collections.OrderedDict[int, collections.deque]" = collections.OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running = set()
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._idle = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        for _ in range(self.size):
+            engine = await loop.run_in_executor(self._executor, self.engine_factory)
+            self.engines.append(engine)
+            self._idle.put_nowait(engine)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        for task in list(self._running):
+            task.cancel()
+        loop = asyncio.get_running_loop()
+        for engine in self.engines:
+            await loop.run_in_executor(self._executor, engine.quit)
+        self.engines.clear()
+        self._executor.shutdown(wait=False)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(requests) for requests in self._pending.values())
+
+    async def best_move(self, session_id: int, board: chess.Board) -> tuple[Optional[chess.Move], float, float]:
+        """Return the engine move with its queue wait and search time in seconds."""
+        future = asyncio.get_running_loop().create_future()
+        requests = self._pending.setdefault(session_id, collections.deque())
+        requests.append((board.copy(), future, time.perf_counter()))
+        self._wakeup.set()
+        return await future
+
+    async def _dispatch(self) -> None:
+        while True:
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            engine = await self._idle.get()
+
+            job = None
+            while self._pending and job is None:
+                session_id, requests = self._pending.popitem(last=False)
+                board, future, queued_at = requests.popleft()
+                if requests:
+                    self._pending[session_id] = requests  # back of the line
+                if not future.done():
+                    job = (board, future, queued_at)
+
+            if job is None:
+                self._idle.put_nowait(engine)
+                continue
+            task = asyncio.create_task(self._search(engine, *job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _search(self, engine, board: chess.Board, future: asyncio.Future, queued_at: float) -> None:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            move = await loop.run_in_executor(self._executor, engine.best_move, board, self.limit)
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+        else:
+            if not future.done():
+                future.set_result((move, started - queued_at, time.perf_counter() - started))
+        finally:
+            self._idle.put_nowait(engine)
+
+
+class Session:
+    def __init__(self, session_id: int, pool: EnginePool, archive: Optional[ArchiveWriter] = None):
+        self.id = session_id
+        self.pool = pool
+        self.archive = archive
+        self.game = GameCore(ai_color="black")
+        self.bot_latency = LatencyStats()
+        self.queue_wait = LatencyStats()
+        self.engine_time = LatencyStats()
+
+    def state(self, **extra) -> dict:
+        white, black = self.game.get_current_clocks()
+        state = {
+            "type": "state",
+            "session": self.id,
+            "fen": self.game.board.fen(),
+            "moves": self.game.moves_sequence,
+            "turn": self.game.turn,
+            "clocks": [white, black],
+            "outcome": self.game.outcome_message,
+        }
+        state.update(extra)
+        return state
+
+    def metrics(self) -> dict:
+        return {
+            "bot_latency": self.bot_latency.summary(),
+            "queue_wait": self.queue_wait.summary(),
+            "engine_time": self.engine_time.summary(),
+        }
+
+    async def handle(self, message: dict) -> dict:
+        kind = message.get("type")
+        if kind == "new":
+            return await self.new_game(message.get("color", "white"), message.get("time_limit"),
+                                       message.get("increment", 0))
+        if kind == "move":
+            return await self.human_move(str(message.get("uci", "")))
+        if kind == "state":
+            self.game.check_time_loss()
+            return self.state()
+        if kind == "metrics":
+            return {"type": "metrics", "session": self.id, **self.metrics()}
+        return error(f"Unknown message type: {kind}")
+
+    async def new_game(self, color: str, time_limit: Optional[int], increment: float = 0) -> dict:
+        if color not in ("white", "black"):
+            return error(f"Unknown colour: {color}")
+        if time_limit is not None and not (is_seconds(time_limit) and time_limit > 0):
+            return error(f"Invalid time limit: {time_limit!r}")
+        if not (is_seconds(increment) and increment >= 0):
+            return error(f"Invalid increment: {increment!r}")
+        ai_color = "black" if color == "white" else "white"
+        self.archive_game()
+        self.game = GameCore(ai_color=ai_color, timed_play=time_limit is not None, time_limit=time_limit,
+                             increment=increment)
+        bot_move = await self.bot_move()
+        return self.state(bot_move=bot_move)
+
+    async def human_move(self, uci: str) -> dict:
+        self.game.check_time_loss()
+        if self.game.outcome_message:
+            return error("Game is over", state=self.state())
+        if self.game.turn == self.game.ai_color:
+            return error("Not your turn", state=self.state())
+        try:
+            if self.game.is_promotion(uci) and len(uci) == 4:
+                uci += "q"
+            legal = self.game.move(uci)
+        except ValueError:
+            legal = False
+        if not legal:
+            return error(f"Illegal move: {uci}", state=self.state())
+        bot_move = await self.bot_move()
+        return self.state(bot_move=bot_move)
+
+    async def bot_move(self) -> Optional[str]:
+        if self.game.outcome_message or self.game.turn != self.game.ai_color:
+            return None
+        started = time.perf_counter()
+        try:
+            move, waited, searched = await self.pool.best_move(self.id, self.game.board)
+        except Exception:
+            # Nobody else will move for the bot: end the game so the client can start a new one
+            self.game.outcome_message = ENGINE_FAILED
+            raise
+        self.bot_latency.add(time.perf_counter() - started)
+        self.queue_wait.add(waited)
+        self.engine_time.add(searched)
+        if move is None or not self.game.move(move.uci()):
+            return None
+        return move.uci()
+
+    def archive_game(self) -> None:
+        if self.archive is None or not self.game.moves_sequence:
+            return
+        game = self.game.pgn_game()
+        game.headers["Event"] = "LazyChess server"
+        game.headers["Round"] = str(self.id)
+        game.headers["White"] = "LazyChess" if self.game.ai_color == "white" else "Player"
+        game.headers["Black"] = "LazyChess" if self.game.ai_color == "black" else "Player"
+        self.archive.write(game)
+        self.archive.flush()  # on disk as soon as the game is over
+
+
+def error(message: str, **extra) -> dict:
+    return {"type": "error", "message": message, **extra}
+
+
+def is_seconds(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class GameServer:
+    def __init__(self, pool: EnginePool, host: str = "127.0.0.1", port: int = 8765,
+                 archive: Optional[ArchiveWriter] = None):
+        self.pool = pool
+        self.archive = archive
+        self.host = host
+        self.port = port
+        self.sessions: dict[int, Session] = {}
+        self._ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        await self.pool.start()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        log.info("Listening on %s:%s with %s engine(s)", self.host, self.port, self.pool.size)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        # Connections still open archive their games on the way out
+        for task in self._clients:
+            task.cancel()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        await self.pool.stop()
+        if self.archive is not None:
+            self.archive.close()
+
+    def metrics(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "queue_depth": self.pool.queue_depth,
+            "engines": [engine.telemetry() for engine in self.pool.engines if hasattr(engine, "telemetry")],
+            "per_session": {sid: session.metrics() for sid, session in self.sessions.items()},
+        }
+
+    async def reply(self, session: Session, message) -> dict:
+        if not isinstance(message, dict):
+            return error("Expected a JSON object")
+        if message.get("type") == "server_metrics":
+            return {"type": "server_metrics", **self.metrics()}
+        try:
+            return await session.handle(message)
+        except Exception as exc:
+            log.exception("Session %s failed on %r", session.id, message.get("type"))
+            return error(f"Server error: {exc}")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = Session(next(self._ids), self.pool, self.archive)
+        self.sessions[session.id] = session
+        self._clients.add(asyncio.current_task())
+        log.info("Session %s connected", session.id)
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    reply = error("Invalid JSON")
+                else:
+                    reply = await self.reply(session, message)
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._clients.discard(asyncio.current_task())
+            session.archive_game()
+            del self.sessions[session.id]
+            writer.close()
+            log.info("Session %s closed: %s", session.id, session.metrics()["bot_latency"])
+
+
+async def serve(host: str, port: int, engines: int, movetime: float, profile: str = "batch",
+                archive: Optional[str] = None) -> None:
+    from engine import open_engine
+    from engine_locator import find_stockfish
+
+    stockfish_path = find_stockfish()
+    pool = EnginePool(lambda: open_engine(stockfish_path, profile, engines), size=engines, limit=chess.engine.Limit(time=movetime))
+    server = GameServer(pool, host, port, ArchiveWriter(archive) if archive else None)
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the multi-session LazyChess server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--engines", type=int, default=2, help="size of the shared engine pool")
+    parser.add_argument("--movetime", type=float, default=0.1, help="bot search time per move in seconds")
+    parser.add_argument("--profile", default="batch", choices=PROFILES, help="engine profile for the pool")
+    parser.add_argument("--archive", help="append finished games to this game archive")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(serve(args.host, args.port, args.engines, args.movetime, args.profile, args.archive))
@@ -0,0 +1,75 @@
+import itertools
+import json
+import os
+import sys
+
+import pytest
+
+import core.common_resources as cr
+from engine_locator import ENV_VAR
+
+FAKE_ENGINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fake_uci_engine.py")
+
+
+@pytest.fixture
+def fake_engine(tmp_path):
+    """
+    Фабрика: make(**script) повертає шлях до виконуваного файлу, що запускає
+    fake_uci_engine.py з цим сценарієм (див. його docstring): скрипт sh,
+    а на Windows - .cmd.
+    """
+    numbers = itertools.count()
+
+    def make(**script):
+        number = next(numbers)
+        script_path = tmp_path / f"engine_{number}.json"
+        script_path.write_text(json.dumps(script))
+        command = f'"{sys.executable}" "{FAKE_ENGINE}" --script "{script_path}"'
+        if sys.platform == "win32":
+            wrapper = tmp_path / f"engine_{number}.cmd"
+            wrapper.write_text(f"@{command}\n")
+        else:
+            wrapper = tmp_path / f"engine_{number}"
+            wrapper.write_text(f"#!/bin/sh\nexec {command}\n")
+            wrapper.chmod(0o755)
+        return str(wrapper)
+
+    return make
+
+
+@pytest.fixture
+def fake_stockfish(fake_engine, monkeypatch):
+    """Фабрика, що ще й підставляє двигун замість Stockfish для Game і аналізаторів."""
+
+    def install(**script):
+        path = fake_engine(**script)
+        monkeypatch.setattr(cr, "StockfishPath", path)
+        monkeypatch.setenv(ENV_VAR, path)
+        return path
+
+    return install
+
+
+@pytest.fixture
+def isolated_store(tmp_path, monkeypatch):
+    """EvalStore аналізаторів пише в тимчасову теку, а не поруч із кодом."""
+    import analyzer_pygame
+    from eval_store import EvalStore
+
+    path = str(tmp_path / "evals.sqlite")
+    monkeypatch.setattr(analyzer_pygame, "EvalStore", lambda: EvalStore(path))
+    return path
+
+
+@pytest.fixture
+def tk_root():
+    """Прихований корінь Tk; без дисплея тест пропускається."""
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display for Tk")
+    root.withdraw()
+    yield root
+    root.destroy()
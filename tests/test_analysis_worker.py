@@ -0,0 +1,74 @@
+import threading
+import time
+
+import chess
+from analysis_worker import AnalysisWorker
+
+
+class SlowEngine:
+    def __init__(self):
+        self.analyzed = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def analyze(self, board):
+        self.started.set()
+        self.release.wait(1)
+        self.analyzed.append(board.fen())
+        return {"score": len(board.move_stack), "pv": None}
+
+
+def wait_for_result(worker, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        result = worker.poll()
+        if result is not None:
+            return result
+        time.sleep(0.01)
+    return None
+
+
+def test_only_latest_position_is_analyzed():
+    engine = SlowEngine()
+    worker = AnalysisWorker(engine)
+    board = chess.Board()
+    worker.submit(board)
+    assert engine.started.wait(1)  # перша позиція вже в роботі
+
+    # Швидке перегортання ходів — проміжні позиції мають бути відкинуті
+    for move in ["e2e4", "e7e5", "g1f3"]:
+        board.push_uci(move)
+        worker.submit(board)
+    engine.release.set()
+
+    result = wait_for_result(worker)
+    worker.stop()
+
+    assert result is not None
+    assert result[0].fen() == board.fen()
+    assert result[1]["score"] == 3
+    assert len(engine.analyzed) == 2
+
+
+def test_background_jobs_yield_to_foreground():
+    engine = SlowEngine()
+    worker = AnalysisWorker(engine)
+    boards = []
+    board = chess.Board()
+    for move in ["e2e4", "e7e5"]:
+        board.push_uci(move)
+        boards.append(board.copy())
+
+    worker.submit_background(enumerate(boards))
+    worker.submit(chess.Board())
+    engine.release.set()
+
+    assert wait_for_result(worker) is not None
+    deadline = time.time() + 2
+    finished = []
+    while len(finished) < 2 and time.time() < deadline:
+        finished += worker.poll_background()
+        time.sleep(0.01)
+    worker.stop()
+
+    assert sorted(key for key, _, _ in finished) == [0, 1]
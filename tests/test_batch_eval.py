@@ -0,0 +1,48 @@
+import io
+
+import chess
+import chess.pgn
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from batch_eval import evaluate_boards, to_planes, triage_order
+from fallback_engine import FallbackEngine
+from game_review import GameReviewer
+from ply_table import PlyTable
+
+
+def test_planes_and_symmetry():
+    board = chess.Board()
+    planes = to_planes([board])
+    assert planes.shape == (1, 12, 64)
+    assert planes[0, 0].sum() == 8 and planes[0, 0, chess.E2] == 1  # білі пішаки
+    assert planes[0, 11, chess.E8] == 1  # чорний король
+    # Дзеркальна позиція має протилежну оцінку
+    position = chess.Board("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+    assert evaluate_boards([position])[0] == -evaluate_boards([position.mirror()])[0]
+    assert evaluate_boards([board])[0] == 0
+
+
+def test_material_dominates():
+    up_a_queen = chess.Board("rnb1kbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+    scores = evaluate_boards([chess.Board(), up_a_queen])
+    assert scores.dtype == np.int32 and scores[1] - scores[0] > 800
+
+
+def test_triage_puts_capture_first():
+    board = chess.Board()
+    boards = [board.copy()]
+    for uci in ["e2e4", "d7d5", "e4d5", "g8f6"]:
+        board.push_uci(uci)
+        boards.append(board.copy())
+    assert triage_order(boards)[0] == 3
+
+
+def test_review_skips_decided_positions():
+    # Три ферзі за пішаками: ні шахів, ні взять, тож пошук нічого не змінить
+    pgn = "[FEN \"k7/8/8/8/8/8/PPP5/QQQ1K3 w - - 0 1\"]\n\n1. Kf1 Kb8 2. Kg1 *"
+    game = chess.pgn.read_game(io.StringIO(pgn))
+    reviewer = GameReviewer(FallbackEngine(), budget=1.0)
+    reviewer.review(PlyTable.from_game(game))
+    assert reviewer.skipped >= 1
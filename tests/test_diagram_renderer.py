@@ -0,0 +1,42 @@
+import os
+
+import chess
+import pygame as pg
+
+import diagram_renderer
+from diagram_renderer import DiagramRenderer, render_diagram
+
+FENS = [
+    chess.STARTING_FEN,
+    "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1",
+    "8/8/8/4k3/8/8/8/4K2R w K - 0 1",
+]
+
+
+def test_render_diagram_draws_board_and_pieces():
+    surface = render_diagram(chess.Board().board_fen(), size=128)
+    assert surface.get_size() == (128, 128)
+    # На a1 стоїть тура, на a4 порожньо — пікселі різні
+    assert surface.get_at((10, 118)) != surface.get_at((10, 70))
+
+
+def test_repeated_positions_come_from_the_cache(tmp_path):
+    renderer = DiagramRenderer(str(tmp_path), size=64, workers=1)
+    # Однакове розташування фігур з іншими правами рокіровки — той самий малюнок
+    same = chess.STARTING_FEN.replace("KQkq", "-")
+    paths = renderer.render_many(FENS + [FENS[0], same])
+    assert renderer.rendered == 3
+    assert paths[0] == paths[3] == paths[4]
+    assert pg.image.load(paths[2]).get_size() == (64, 64)
+
+    renderer.render_many(FENS)
+    assert renderer.rendered == 0
+    assert renderer.render(FENS[1], highlight="e2e4") != paths[1]
+
+
+def test_parallel_rendering(tmp_path, monkeypatch):
+    monkeypatch.setattr(diagram_renderer, "PARALLEL_THRESHOLD", 2)
+    renderer = DiagramRenderer(str(tmp_path), size=48, workers=2)
+    paths = renderer.render_many(FENS)
+    assert renderer.rendered == 3
+    assert all(os.path.exists(path) for path in paths)
@@ -0,0 +1,28 @@
+import time
+
+import pygame as pg
+
+import core.common_resources as cr
+from core.game import Game
+from difficulty import TIERS, get_difficulty
+
+
+def test_limit_never_exceeds_tier_latency():
+    for tier in TIERS.values():
+        assert tier.limit().time <= tier.max_latency
+    club = get_difficulty("club")
+    assert club.options() == {"Skill Level": 10, "UCI_LimitStrength": True, "UCI_Elo": 1900}
+
+
+def test_bot_replies_within_tier_latency():
+    pg.init()
+    cr.screen = pg.display.set_mode((800, 600))
+    game = Game(ai_color="white", ai_active=True, difficulty="beginner")
+    try:
+        started = time.monotonic()
+        while not game.ai_make_move():
+            assert time.monotonic() - started < game.difficulty.max_latency + 0.5
+            time.sleep(0.01)
+        assert len(game.moves_sequence) == 1
+    finally:
+        game.close()
@@ -0,0 +1,219 @@
+import threading
+import time
+
+import chess
+import chess.engine
+import pygame as pg
+import pytest
+
+import core.common_resources as cr
+from engine import ChessEngine, open_engine
+
+AFTER_E4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq -"
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_analyze_returns_scripted_line(fake_engine):
+    engine = ChessEngine(fake_engine(depth=5, moves={chess.STARTING_FEN: "d2d4"}, scores={chess.STARTING_FEN: 35}))
+    try:
+        info = engine.analyze(chess.Board())
+        assert info == {"score": 35, "pv": [chess.Move.from_uci("d2d4")], "depth": 5}
+        engine.multipv = 3
+        lines = engine.analyze(chess.Board())["lines"]
+        assert [line["score"] for line in lines] == [35, 5, -25]
+        assert engine.best_move(chess.Board()) == chess.Move.from_uci("d2d4")
+        assert engine.telemetry()["nodes"] == 3 * 5000
+    finally:
+        engine.quit()
+
+
+def test_stop_cuts_a_long_search_short(fake_engine):
+    engine = ChessEngine(fake_engine(latency=30, depth=3))
+    try:
+        threading.Timer(0.2, engine.stop).start()
+        started = time.perf_counter()
+        engine.analyze(chess.Board(), chess.engine.Limit(time=30))
+        assert time.perf_counter() - started < 5
+    finally:
+        engine.quit()
+
+
+def test_stop_before_the_search_opens_is_not_lost(fake_engine):
+    engine = ChessEngine(fake_engine(latency=30, depth=3))
+    open_analysis = engine.engine.analysis
+
+    def analysis(*args, **kwargs):
+        engine.stop()  # планувальник зупиняє аналіз, поки той ще відкривається
+        return open_analysis(*args, **kwargs)
+
+    engine.engine.analysis = analysis
+    try:
+        started = time.perf_counter()
+        info = engine.analyze(chess.Board(), chess.engine.Limit(time=30))
+        assert time.perf_counter() - started < 5
+        assert info["stopped"]
+    finally:
+        engine.quit()
+
+
+def test_late_stop_does_not_cut_the_next_search(fake_engine):
+    engine = ChessEngine(fake_engine(latency=0.2, depth=4))
+    try:
+        engine.analyze(chess.Board(), chess.engine.Limit(depth=1))
+        # Зупинка прийшла вже після кінця пошуку
+        engine.stop()
+        info = engine.analyze(chess.Board(), chess.engine.Limit(time=5))
+        assert info["depth"] == 4 and "stopped" not in info
+    finally:
+        engine.quit()
+
+
+def test_bot_move_preempts_analysis_submitted_just_before(fake_engine):
+    from engine_scheduler import EngineScheduler, Priority
+
+    engine = ChessEngine(fake_engine(latency=30, depth=3))
+    scheduler = EngineScheduler(engine)
+    try:
+        board = chess.Board()
+        prefetch = scheduler.submit_analysis(board, Priority.PREFETCH, chess.engine.Limit(time=30))
+        started = time.perf_counter()
+        assert scheduler.submit_move(board, chess.engine.Limit(time=0.05)).result(timeout=10) in board.legal_moves
+        assert time.perf_counter() - started < 5
+        prefetch.cancel()
+    finally:
+        scheduler.stop()
+        engine.quit()
+
+
+def test_cache_threshold_follows_the_depth_reached(fake_engine, tmp_path):
+    from eval_store import CachedEngine, EvalStore
+
+    # Повільна машина: типовий пошук доходить лише до глибини 5
+    engine = ChessEngine(fake_engine(depth=5))
+    cached = CachedEngine(engine, EvalStore(str(tmp_path / "evals.sqlite")))
+    try:
+        assert cached.min_depth == ChessEngine.default_cache_depth
+        first = cached.analyze(chess.Board())
+        assert cached.min_depth == 5
+        assert cached.analyze(chess.Board()) == first
+        assert engine.searches == 1
+    finally:
+        cached.quit()
+
+
+def test_crash_and_illegal_answers_surface_as_errors(fake_engine):
+    engine = ChessEngine(fake_engine(fail_after=2))
+    try:
+        engine.analyze(chess.Board())
+        with pytest.raises(chess.engine.EngineTerminatedError):
+            engine.analyze(chess.Board())
+    finally:
+        engine.kill()
+
+    engine = open_engine(fake_engine(fail_after=1, fail_mode="illegal"), supervised=False)
+    assert isinstance(engine, ChessEngine)
+    try:
+        with pytest.raises(chess.engine.EngineError):
+            engine.best_move(chess.Board())
+    finally:
+        engine.quit()
+
+
+def test_bot_plays_the_engine_move(fake_stockfish):
+    from core.game import Game
+
+    fake_stockfish(latency=0.05, moves={AFTER_E4: "c7c5"})
+    pg.init()
+    cr.screen = pg.display.set_mode((800, 600))
+    game = Game(ai_color="black", ai_active=True)
+    try:
+        assert isinstance(game.engine.engine, ChessEngine)
+        game.move("e2e4")
+        wait_for(game.ai_make_move)
+        assert game.moves_sequence == ["e2e4", "c7c5"]
+    finally:
+        game.close()
+
+
+def test_pygame_analyzer_shows_engine_score(fake_stockfish, isolated_store):
+    from analyzer_pygame import PygameAnalyzer
+
+    fake_stockfish(scores={AFTER_E4: -20})
+    pg.init()
+    cr.screen = pg.display.set_mode((800, 600))
+    analyzer = PygameAnalyzer()
+    try:
+        analyzer.plies.play(0, chess.Move.from_uci("e2e4"))
+        analyzer.show_ply(1)
+        wait_for(lambda: analyzer.poll_analysis() or analyzer.plies[1].analysis is not None)
+        assert analyzer.plies[1].analysis["score"] == -20
+        assert analyzer.analysis_text.startswith("Score: -20")
+    finally:
+        analyzer.worker.stop()
+        analyzer.engine.quit()
+
+
+class RecordingWorker:
+    """Замість AnalysisWorker: лише запам'ятовує надіслані позиції."""
+
+    def __init__(self):
+        self.background = []
+
+    def submit(self, board):
+        pass
+
+    def clear_background(self):
+        self.background.clear()
+
+    def submit_background(self, jobs):
+        self.background.extend(ply for ply, board in jobs)
+
+    def stop(self):
+        pass
+
+
+def test_pygame_analyzer_queues_side_line_moves(fake_stockfish, isolated_store):
+    from analyzer_pygame import PygameAnalyzer
+
+    fake_stockfish()
+    pg.init()
+    cr.screen = pg.display.set_mode((800, 600))
+    analyzer = PygameAnalyzer()
+    analyzer.worker.stop()
+    analyzer.worker = RecordingWorker()
+    try:
+        analyzer.handle_click(analyzer.board_map["e2"].center)
+        analyzer.handle_click(analyzer.board_map["e4"].center)
+        assert analyzer.ply == 1
+        # Новий хід потрапляє у фонову чергу для шкали оцінок
+        assert 1 in analyzer.worker.background
+    finally:
+        analyzer.engine.quit()
+
+
+def test_tk_analyzer_shows_engine_score(fake_stockfish, tmp_path, monkeypatch):
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display for Tk")
+    import gui
+    from eval_store import EvalStore
+
+    monkeypatch.setattr(gui, "EvalStore", lambda: EvalStore(str(tmp_path / "evals.sqlite")))
+    fake_stockfish(latency=0.02)
+    app = gui.ChessAnalyzerApp(root)
+    try:
+        app.analyze_current_position()
+        # Стартова або збережена позиція — оцінка однаково від двигуна
+        wait_for(lambda: root.update() or app.plies[app.ply].analysis is not None)
+        assert app.plies[app.ply].analysis["depth"] == 8
+    finally:
+        app.on_quit()
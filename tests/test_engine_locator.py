@@ -0,0 +1,41 @@
+import os
+
+import engine_locator
+from engine_locator import best_arch, find_stockfish
+
+
+def test_best_arch_prefers_widest_instruction_set():
+    assert best_arch("x86_64", "Linux", {"sse41", "popcnt", "avx2", "bmi2"}) == "x86-64-bmi2"
+    assert best_arch("x86_64", "Linux", {"sse41", "popcnt", "avx2"}) == "x86-64-avx2"
+    assert best_arch("AMD64", "Windows", {"sse41", "popcnt"}) == "x86-64-sse41-popcnt"
+    assert best_arch("x86_64", "Linux", set()) == "x86-64"
+    assert best_arch("arm64", "Darwin", set()) == "apple-silicon"
+    assert best_arch("aarch64", "Linux", {"asimddp"}) == "armv8-dotprod"
+
+
+def test_env_var_overrides_other_locations(tmp_path, monkeypatch):
+    binary = tmp_path / "my-stockfish"
+    binary.write_text("")
+    os.chmod(binary, 0o755)
+    monkeypatch.setenv(engine_locator.ENV_VAR, str(binary))
+    assert find_stockfish() == str(binary)
+
+
+def test_cached_build_is_found(tmp_path, monkeypatch):
+    monkeypatch.delenv(engine_locator.ENV_VAR, raising=False)
+    monkeypatch.setattr(engine_locator, "CONFIG_PATH", str(tmp_path / "missing.json"))
+    monkeypatch.setattr(engine_locator, "BUILD_DIR", str(tmp_path))
+    binary = tmp_path / engine_locator.exe_name(f"stockfish-{best_arch()}")
+    binary.write_text("")
+    os.chmod(binary, 0o755)
+    assert find_stockfish() == str(binary)
+
+
+def test_broken_config_falls_through(tmp_path, monkeypatch):
+    monkeypatch.delenv(engine_locator.ENV_VAR, raising=False)
+    config = tmp_path / "engine_config.json"
+    monkeypatch.setattr(engine_locator, "CONFIG_PATH", str(config))
+    # Зіпсований або не той JSON не заважає шукати двигун далі
+    for content in ("{not json", "[1, 2]"):
+        config.write_text(content)
+        assert engine_locator.configured_path() is None
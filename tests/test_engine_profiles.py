@@ -0,0 +1,32 @@
+import pytest
+
+from engine_profiles import options_for
+from fallback_engine import FallbackEngine
+
+
+def test_profiles_scale_with_host():
+    blitz = options_for("bot-blitz", cpu_count=16, free_mb=16000)
+    deep = options_for("analysis-deep", cpu_count=16, free_mb=16000)
+    assert blitz == {"Threads": 2, "Hash": 64, "MultiPV": 1, "Move Overhead": 100}
+    assert deep == {"Threads": 12, "Hash": 2048, "MultiPV": 3, "Move Overhead": 10}
+
+
+def test_batch_splits_machine_between_instances():
+    options = options_for("batch", instances=4, cpu_count=8, free_mb=8000)
+    assert options["Threads"] == 1
+    assert options["Hash"] == 128  # 8000 / 8 / 4 = 250, округлено вниз до степеня двійки
+
+
+def test_small_host_gets_minimums():
+    assert options_for("analysis-deep", cpu_count=1, free_mb=10) == {"Threads": 1, "Hash": 16, "MultiPV": 3, "Move Overhead": 10}
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        options_for("bullet")
+
+
+def test_fallback_engine_uses_hash_option():
+    engine = FallbackEngine("bot-blitz")
+    assert engine.tt_limit == engine.options["Hash"] * engine.entries_per_mb
+    assert engine.telemetry()["profile"] == "bot-blitz"
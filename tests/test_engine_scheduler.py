@@ -0,0 +1,100 @@
+import threading
+import time
+
+import chess
+from engine_scheduler import EngineScheduler, Priority
+
+
+class StoppableEngine:
+    """Аналіз триває, доки його не зупинять; хід повертається одразу."""
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.calls = []
+
+    def analyze(self, board, limit=None):
+        self.calls.append("analyze")
+        stopped = self.stop_event.wait((limit.time if limit and limit.time else 0.5))
+        self.stop_event.clear()
+        return {"score": 0, "pv": None, "stopped": True} if stopped else {"score": 0, "pv": None}
+
+    def best_move(self, board, limit=None):
+        self.calls.append("move")
+        return next(iter(board.legal_moves))
+
+    def stop(self):
+        self.stop_event.set()
+        return True
+
+
+def test_bot_move_preempts_background_analysis():
+    engine = StoppableEngine()
+    scheduler = EngineScheduler(engine)
+    board = chess.Board()
+
+    prefetch = scheduler.submit_analysis(board, Priority.PREFETCH)
+    time.sleep(0.05)  # аналіз уже виконується
+    started = time.monotonic()
+    move = scheduler.submit_move(board).result(timeout=1)
+    reply_time = time.monotonic() - started
+
+    assert move in board.legal_moves
+    assert reply_time < 0.3
+    assert prefetch.result(timeout=2)["score"] == 0  # перезапущено після ходу
+    assert engine.calls == ["analyze", "move", "analyze"]
+
+    metrics = scheduler.metrics()
+    assert metrics["jobs"]["PREFETCH"]["preempted"] == 1
+    assert metrics["jobs"]["BOT_MOVE"]["completed"] == 1
+    scheduler.stop()
+
+
+def test_jobs_past_deadline_expire():
+    engine = StoppableEngine()
+    scheduler = EngineScheduler(engine)
+    board = chess.Board()
+
+    scheduler.submit_analysis(board, Priority.VISIBLE_ANALYSIS)
+    late = scheduler.submit_analysis(board, Priority.PREFETCH, timeout=0.01)
+    time.sleep(0.05)
+    assert scheduler.queue_depth()["PREFETCH"] == 1
+    engine.stop()
+
+    try:
+        late.result(timeout=1)
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("expected the late job to expire")
+    assert scheduler.metrics()["jobs"]["PREFETCH"]["expired"] == 1
+    scheduler.stop()
+
+
+class LateStopEngine(StoppableEngine):
+    """Хід надходить, коли аналіз уже закінчився, але ще вважається поточним."""
+
+    def __init__(self):
+        super().__init__()
+        self.scheduler = None
+        self.move = None
+
+    def analyze(self, board, limit=None):
+        self.calls.append("analyze")
+        if self.move is None:
+            self.move = self.scheduler.submit_move(board)
+        return {"score": 5, "pv": None}
+
+
+def test_finished_analysis_is_not_run_again():
+    engine = LateStopEngine()
+    scheduler = EngineScheduler(engine)
+    engine.scheduler = scheduler
+    board = chess.Board()
+
+    analysis = scheduler.submit_analysis(board, Priority.PREFETCH)
+    assert analysis.result(timeout=1)["score"] == 5
+    assert engine.move.result(timeout=1) in board.legal_moves
+    # stop() прийшов до вже завершеного пошуку: результат не викидається
+    assert engine.calls == ["analyze", "move"]
+    assert scheduler.metrics()["jobs"]["PREFETCH"]["preempted"] == 0
+    scheduler.stop()
@@ -0,0 +1,90 @@
+import time
+
+import chess
+import chess.engine
+
+from engine import ChessEngine
+from engine_supervisor import SupervisedEngine
+from eval_store import EvalStore
+
+QUICK = chess.engine.Limit(time=0.05)
+
+
+def engines(*paths):
+    """Фабрика: кожен (пере)запуск бере наступний скрипт, останній повторюється."""
+    paths = list(paths)
+
+    def factory():
+        return ChessEngine(paths.pop(0) if len(paths) > 1 else paths[0])
+
+    return factory
+
+
+def wait_ready(engine, timeout=10.0):
+    assert engine.ready.wait(timeout)
+
+
+def test_hung_engine_is_answered_by_fallback_and_replaced(fake_engine):
+    factory = engines(fake_engine(fail_after=1, fail_mode="hang"), fake_engine(moves={chess.STARTING_FEN: "b1c3"}))
+    engine = SupervisedEngine(factory, grace=0.3, health_interval=None)
+    try:
+        started = time.perf_counter()
+        move = engine.best_move(chess.Board(), QUICK)
+        assert time.perf_counter() - started < 1.5
+        assert move in chess.Board().legal_moves
+        assert engine.counters["timeouts"] == 1
+
+        wait_ready(engine)
+        assert engine.best_move(chess.Board(), QUICK) == chess.Move.from_uci("b1c3")
+        assert engine.telemetry()["supervisor"]["restarts"] == 1
+    finally:
+        engine.quit()
+
+
+def test_crash_is_served_from_the_store(fake_engine, tmp_path):
+    store = EvalStore(str(tmp_path / "evals.sqlite"))
+    board = chess.Board()
+    store.put(board, {"score": 42, "pv": [chess.Move.from_uci("e2e4")]}, 20)
+    engine = SupervisedEngine(engines(fake_engine(fail_after=1), fake_engine()), store, health_interval=None)
+    try:
+        assert engine.analyze(board, QUICK)["score"] == 42
+        assert engine.counters["failures"] == 1
+        wait_ready(engine)
+        assert engine.analyze(board, QUICK)["depth"] == 8
+    finally:
+        engine.quit()
+        store.close()
+
+
+def test_failed_restarts_keep_the_fallback_serving(fake_engine):
+    starts = []
+
+    def factory():
+        starts.append(time.perf_counter())
+        if len(starts) > 1:
+            raise OSError("binary is gone")
+        return ChessEngine(fake_engine(fail_after=1))
+
+    engine = SupervisedEngine(factory, health_interval=None, max_backoff=0.1)
+    try:
+        for _ in range(3):
+            assert engine.best_move(chess.Board(), QUICK) in chess.Board().legal_moves
+        time.sleep(0.5)
+        assert len(starts) > 2 and not engine.ready.is_set()
+        assert engine.counters["fallbacks"] == 3
+    finally:
+        engine.quit()
+
+
+def test_health_check_replaces_a_dead_idle_engine(fake_engine):
+    engine = SupervisedEngine(engines(fake_engine()), health_interval=0.1)
+    try:
+        first = engine.engine
+        first.kill()
+        deadline = time.time() + 10
+        while engine.engine is first or not engine.ready.is_set():
+            assert time.time() < deadline
+            time.sleep(0.05)
+        assert engine.counters["restarts"] == 1
+    finally:
+        engine.quit()
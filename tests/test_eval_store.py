@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+
+import chess
+
+from eval_store import CachedEngine, EvalStore
+
+
+class CountingEngine:
+    cache_depth = 5
+
+    def __init__(self):
+        self.calls = 0
+
+    def analyze(self, board, limit=None):
+        self.calls += 1
+        return {"score": 31, "pv": [next(iter(board.legal_moves))], "depth": 8}
+
+    def quit(self):
+        pass
+
+
+def test_read_through_and_persist_across_instances(tmp_path):
+    path = str(tmp_path / "evals.sqlite")
+    engine = CountingEngine()
+    cached = CachedEngine(engine, EvalStore(path))
+    board = chess.Board()
+    first = cached.analyze(board)
+    assert cached.analyze(board) == first
+    assert engine.calls == 1
+    cached.quit()
+
+    # Нова сесія читає з диска; лічильники ходів не входять у ключ
+    store = EvalStore(path)
+    board.halfmove_clock, board.fullmove_number = 7, 30
+    assert store.get(board)["score"] == 31
+    assert store.get(board, min_depth=9) is None
+    store.close()
+
+
+def test_keeps_deepest_and_prunes_shallow(tmp_path):
+    store = EvalStore(str(tmp_path / "evals.sqlite"), max_entries=2)
+    board = chess.Board()
+    store.put(board, {"score": 10, "pv": None}, depth=12)
+    store.put(board, {"score": 99, "pv": None}, depth=4)
+    assert store.get(board) == {"score": 10, "pv": None, "depth": 12}
+    for uci, depth in (("e2e4", 3), ("d2d4", 20)):
+        child = board.copy()
+        child.push_uci(uci)
+        store.put(child, {"score": 0, "pv": None}, depth)
+    store.flush()
+    assert store.prune() == 1
+    after_e4 = board.copy()
+    after_e4.push_uci("e2e4")
+    assert store.get(after_e4) is None
+    store.close()
+
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / "evals.sqlite")
+    stores = [EvalStore(path, batch_size=8) for _ in range(2)]
+
+    def fill(store, first_move):
+        board = chess.Board()
+        board.push_uci(first_move)
+        for move in list(board.legal_moves):
+            child = board.copy()
+            child.push(move)
+            store.put(child, {"score": 1, "pv": None}, depth=5)
+        store.flush()
+
+    threads = [threading.Thread(target=fill, args=(store, uci)) for store, uci in zip(stores, ("e2e4", "d2d4"))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(stores[0]) == 40  # 20 відповідей чорних на кожен хід
+    for store in stores:
+        store.close()
+
+
+class MultiPVEngine(CountingEngine):
+    multipv = 2
+
+    def analyze(self, board, limit=None):
+        self.calls += 1
+        first, second = sorted(board.legal_moves, key=lambda move: move.uci())[:2]
+        lines = [{"score": 40, "pv": [first], "depth": 8}, {"score": -200, "pv": [second], "depth": 8}]
+        return {**lines[0], "lines": lines}
+
+
+def test_multipv_lines_are_stored(tmp_path):
+    path = str(tmp_path / "evals.sqlite")
+    # Сховище старого формату, без стовпця lines
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE evals (fen TEXT PRIMARY KEY, zobrist INTEGER NOT NULL, depth INTEGER NOT NULL, "
+               "score INTEGER, pv TEXT, updated REAL NOT NULL)")
+    db.commit()
+    db.close()
+
+    board = chess.Board()
+    store = EvalStore(path)
+    store.put(board, {"score": 10, "pv": None}, depth=20)
+    engine = MultiPVEngine()
+    cached = CachedEngine(engine, store)
+    # Запис без ліній не годиться для двигуна з MultiPV
+    first = cached.analyze(board)
+    assert engine.calls == 1
+    assert cached.analyze(board) == first
+    assert engine.calls == 1
+    assert [line["score"] for line in first["lines"]] == [40, -200]
+    cached.quit()
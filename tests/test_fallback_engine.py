@@ -0,0 +1,49 @@
+import chess
+import chess.engine
+
+from fallback_engine import FallbackEngine, MATE
+
+
+def test_finds_mate_in_one():
+    # Мат ферзем на f7
+    board = chess.Board("r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w KQkq - 0 1")
+    engine = FallbackEngine()
+    result = engine.analyze(board, chess.engine.Limit(depth=3))
+    assert result["pv"][0] == chess.Move.from_uci("f3f7")
+    assert result["score"] == MATE - 1
+
+
+def test_takes_hanging_queen_within_node_budget():
+    board = chess.Board("4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1")
+    engine = FallbackEngine()
+    assert engine.best_move(board, chess.engine.Limit(nodes=5000)) == chess.Move.from_uci("d2d5")
+    assert engine.nodes <= 5000
+
+
+def test_default_limit_returns_legal_move_quickly():
+    board = chess.Board()
+    move = FallbackEngine().best_move(board)
+    assert move in board.legal_moves
+
+
+def test_stop_during_setup_is_kept():
+    engine = FallbackEngine()
+    configure = engine._configure
+
+    def slow_configure(board, limit):
+        configure(board, limit)
+        engine.stop()  # планувальник зупиняє пошук, поки той готується
+
+    engine._configure = slow_configure
+    result = engine.analyze(chess.Board(), chess.engine.Limit(time=30))
+    assert result["stopped"] and result["pv"]
+
+
+def test_repetition_of_the_game_counts_as_a_draw():
+    # Проти ферзя чорні програють, але Kg8 повторює позицію з партії
+    board = chess.Board("7k/8/8/8/8/Q7/8/K7 b - - 0 1")
+    for uci in ["h8g8", "a3a4", "g8h8", "a4a3"]:
+        board.push_uci(uci)
+    result = FallbackEngine().analyze(board, chess.engine.Limit(depth=2))
+    assert result["score"] == 0
+    assert result["pv"][0] == chess.Move.from_uci("h8g8")
@@ -0,0 +1,91 @@
+import io
+
+import chess.pgn
+
+from core.game_core import GameCore
+from game_archive import ArchiveWriter, GameArchive, archive_to_pgn, pgn_to_archive
+
+PGN = """[Event "Test"]
+[White "A"]
+[Black "B"]
+[Result "0-1"]
+
+{ Start } 1. f3 e5 $1 2. g4 { Blunder } $4 Qh4# 0-1
+
+[Event "Setup"]
+[Result "*"]
+[FEN "8/P7/8/8/8/8/8/k6K w - - 0 1"]
+[SetUp "1"]
+
+1. a8=N *
+"""
+
+
+def read_games(text):
+    fh = io.StringIO(text)
+    games = []
+    while (game := chess.pgn.read_game(fh)) is not None:
+        games.append(game)
+    return games
+
+
+def test_pgn_roundtrip_is_lossless(tmp_path):
+    (tmp_path / "in.pgn").write_text(PGN)
+    assert pgn_to_archive(str(tmp_path / "in.pgn"), str(tmp_path / "games.lca")) == 2
+    archive_to_pgn(str(tmp_path / "games.lca"), str(tmp_path / "out.pgn"))
+    original = [str(game) for game in read_games(PGN)]
+    restored = [str(game) for game in read_games((tmp_path / "out.pgn").read_text())]
+    assert restored == original
+
+
+def test_blocks_append_and_random_access(tmp_path):
+    path = str(tmp_path / "games.lca")
+    game = read_games(PGN)[0]
+    with ArchiveWriter(path, block_games=3) as writer:
+        for _ in range(7):
+            writer.write(game)
+    # Другий запис продовжує той самий архів і дописує неповний останній блок
+    with ArchiveWriter(path, block_games=3) as writer:
+        writer.write(read_games(PGN)[1])
+    with GameArchive(path) as archive:
+        assert len(archive) == 8
+        assert [games for _, _, games in archive.blocks] == [3, 3, 2]
+        assert archive[-1].moves == [chess.Move.from_uci("a7a8n")]
+        assert archive[5].headers["Event"] == "Test"
+        assert sum(1 for _ in archive.positions()) == 7 * 5 + 2
+
+
+def test_unclosed_archive_is_still_readable(tmp_path):
+    path = str(tmp_path / "games.lca")
+    writer = ArchiveWriter(path, block_games=2)
+    for game in read_games(PGN) * 2:
+        writer.write(game)
+    # Без close(): індекс блоків відновлюється скануванням
+    with GameArchive(path) as archive:
+        assert len(archive) == 4
+        assert archive[3].headers["Event"] == "Setup"
+
+
+def test_save_pgn_appends_to_archive(tmp_path):
+    core = GameCore()
+    for uci in ["e2e4", "e7e5"]:
+        core.move(uci)
+    archive = str(tmp_path / "saved.lca")
+    core.save_pgn(str(tmp_path / "saved.pgn"), archive)
+    core.save_pgn(str(tmp_path / "saved.pgn"), archive)
+    with GameArchive(archive) as games:
+        assert len(games) == 2
+        assert len(games.blocks) == 1
+        assert [move.uci() for move in games[0].moves] == ["e2e4", "e7e5"]
+
+
+def test_flushed_games_survive_a_crash(tmp_path):
+    path = str(tmp_path / "games.lca")
+    writer = ArchiveWriter(path, block_games=4)
+    for game in read_games(PGN) * 3:
+        writer.write(game)
+        writer.flush()
+    # Без close(): кожна партія вже на диску, блоки заповнені
+    with GameArchive(path) as archive:
+        assert len(archive) == 6
+        assert [games for _, _, games in archive.blocks] == [4, 2]
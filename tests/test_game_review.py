@@ -0,0 +1,110 @@
+import io
+
+import chess
+import chess.pgn
+
+from eval_store import CachedEngine, EvalStore
+from fallback_engine import FallbackEngine
+from game_review import GameReviewer, annotate
+from ply_table import PlyTable
+
+# 2...Qh4?? просто віддає ферзя коневі
+PGN = "1. e4 e5 2. Nf3 Qh4 3. Nxh4 *"
+
+
+class DepthRecorder:
+    """Обгортка, що запам'ятовує глибину кожного запиту."""
+
+    cache_depth = 3
+
+    def __init__(self):
+        self.engine = FallbackEngine()
+        self.depths = []
+
+    def analyze(self, board, limit=None):
+        self.depths.append(limit.depth)
+        return self.engine.analyze(board, limit)
+
+
+def test_blunder_is_researched_and_annotated():
+    game = chess.pgn.read_game(io.StringIO(PGN))
+    engine = DepthRecorder()
+    reviewer = GameReviewer(engine, budget=5.0)
+    result = reviewer.review(PlyTable.from_game(game))
+
+    queen_drop = result.moves[3]
+    assert queen_drop.san == "Qh4"
+    assert queen_drop.classification == "blunder" and queen_drop.deep
+    assert result.summary["black"]["blunder"] == 1
+    # Глибокий пошук лише для критичних ходів
+    assert engine.depths.count(reviewer.deep_depth) == 2 * result.deep_plies
+    assert result.deep_plies < len(result.moves)
+
+    annotated = str(annotate(game, result))
+    assert "Qh4 $4" in annotated and "[%eval" in annotated
+
+
+def test_budget_limits_engine_time():
+    game = chess.pgn.read_game(io.StringIO("1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4. c3 Nf6 5. d4 exd4 *"))
+    result = GameReviewer(FallbackEngine(), budget=0.5).review(PlyTable.from_game(game))
+    assert result.engine_time < 1.0
+
+
+class ForcedLinesEngine:
+    """MultiPV-двигун, у якого кожна позиція має єдиний хороший хід."""
+
+    cache_depth = 3
+    multipv = 2
+
+    def __init__(self):
+        self.depths = []
+
+    def analyze(self, board, limit=None):
+        self.depths.append(limit.depth)
+        first, second = sorted(board.legal_moves, key=lambda move: move.uci())[:2]
+        lines = [{"score": 0, "pv": [first], "depth": limit.depth},
+                 {"score": -500, "pv": [second], "depth": limit.depth}]
+        return {**lines[0], "lines": lines}
+
+    def quit(self):
+        pass
+
+
+def test_only_moves_survive_the_store_and_shared_plies_are_searched_once(tmp_path):
+    game = chess.pgn.read_game(io.StringIO("1. e4 e5 2. Nf3 *"))
+    path = str(tmp_path / "evals.sqlite")
+    engine = ForcedLinesEngine()
+    reviewer = GameReviewer(CachedEngine(engine, EvalStore(path)), budget=5.0)
+    first = reviewer.review(PlyTable.from_game(game))
+    reviewer.engine.quit()
+    assert all(review.only_move and review.deep for review in first.moves)
+    # Сусідні критичні ходи ділять позицію: 4 позиції, а не 6 глибоких пошуків
+    assert engine.depths.count(reviewer.deep_depth) == 4
+
+    # Повторний огляд бере лінії зі сховища і не запускає двигун
+    engine = ForcedLinesEngine()
+    reviewer = GameReviewer(CachedEngine(engine, EvalStore(path)), budget=5.0)
+    second = reviewer.review(PlyTable.from_game(game))
+    reviewer.engine.quit()
+    assert engine.depths == []
+    assert all(review.only_move for review in second.moves)
+
+
+def test_stalemating_a_won_position_is_a_blunder():
+    # 1. Qb6 при великій матеріальній перевазі - пат
+    board = chess.Board("k7/8/8/2Q5/8/7Q/7Q/4K3 w - - 0 1")
+    game = chess.pgn.Game.from_board(board)
+    game.add_variation(chess.Move.from_uci("c5b6"))
+    reviewer = GameReviewer(FallbackEngine(), budget=2.0)
+    result = reviewer.review(PlyTable.from_game(game))
+    assert reviewer.skipped == 0
+    assert result.scores[1] == 0
+    assert result.moves[0].classification == "blunder"
+
+
+def test_mates_are_annotated_as_mates():
+    game = chess.pgn.read_game(io.StringIO("1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0"))
+    result = GameReviewer(FallbackEngine(), budget=2.0).review(PlyTable.from_game(game))
+    annotated = str(annotate(game, result))
+    # Після 3...Nf6 білі матують одним ходом
+    assert "Nf6 $4 { [%eval #1]" in annotated
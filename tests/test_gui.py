@@ -0,0 +1,55 @@
+import chess
+import pytest
+
+pytest.importorskip("PIL")
+
+from gui import ChessAnalyzerApp
+
+
+def board_view(tk_root, images):
+    """Лише дошка застосунку, без двигуна й решти вікна."""
+    import tkinter as tk
+
+    app = ChessAnalyzerApp.__new__(ChessAnalyzerApp)
+    app.board_canvas = tk.Canvas(tk_root, width=400, height=400)
+    app.piece_images = images
+    app.board = chess.Board()
+    app.draw_board_squares()
+    return app
+
+
+def drawn(app):
+    canvas = app.board_canvas
+    return {
+        square: canvas.itemcget(item, "image") if canvas.itemcget(item, "state") != "hidden" else None
+        for square, item in app.square_items.items()
+    }
+
+
+def test_refresh_matches_a_full_redraw(tk_root):
+    import tkinter as tk
+
+    images = {symbol: tk.PhotoImage(master=tk_root, width=1, height=1) for symbol in "PNBRQKpnbrqk"}
+    app = board_view(tk_root, images)
+    items = app.board_canvas.find_all()
+
+    def check():
+        app.refresh_board()
+        fresh = board_view(tk_root, images)
+        fresh.board = app.board.copy()
+        fresh.refresh_board()
+        assert drawn(app) == drawn(fresh)
+
+    # Партія по ходу, повернення назад і інше продовження
+    for uci in ["e2e4", "d7d5", "e4d5", "d8d5", "b1c3"]:
+        app.board.push_uci(uci)
+        check()
+    app.board.pop()
+    app.board.pop()
+    check()
+    app.board.push_uci("g1f3")
+    check()
+    app.board.set_fen("8/8/8/8/8/8/8/K6k w - - 0 1")
+    check()
+    # Нових елементів на полотні не з'являється
+    assert app.board_canvas.find_all() == items
@@ -0,0 +1,56 @@
+import pygame as pg
+
+import core.common_resources as cr
+from core.game import Game
+from core.history_panel import HistoryPanel
+
+
+def make_panel():
+    pg.init()
+    return HistoryPanel(pg.font.Font("assets/fonts/english/lazy.ttf", 20))
+
+
+def test_rows_are_numbered_and_updated_incrementally():
+    panel = make_panel()
+    panel.set_moves(["e2e4", "e7e5", "g1f3"])
+    assert [panel.row_text(i) for i in range(len(panel))] == [("1.", "e4 e5"), ("2.", "Nf3")]
+
+    first = panel.render_row(0)
+    panel.push("Nc6")
+    # Перший рядок лишається в кеші, перемальовується лише останній
+    assert panel.rows[0] is first and panel.rows[1] is None
+    assert panel.row_text(1) == ("2.", "Nf3 Nc6")
+    panel.pop()
+    panel.pop()
+    assert len(panel) == 1 and panel.rows[0] is first
+
+
+def test_only_visible_rows_are_rendered_and_scrolling_clamps():
+    panel = make_panel()
+    panel.set_moves(["g1f3", "g8f6", "f3g1", "f6g8"] * 25)
+    surface = pg.Surface((300, 200))
+    panel.draw(surface, pg.FRect(0, 0, 300, 200))
+    rendered = [index for index, row in enumerate(panel.rows) if row is not None]
+    assert len(rendered) == panel.visible_rows < len(panel)
+    assert rendered[-1] == len(panel) - 1  # нові ходи видно одразу
+
+    panel.scroll_by(-1000)
+    assert panel.scroll == 0 and not panel.follow
+    panel.push("Nf3")
+    assert panel.scroll == 0  # прокручено вгору — вид не стрибає
+    panel.scroll_by(1000)
+    assert panel.scroll == panel.max_scroll and panel.follow
+
+
+def test_game_keeps_history_in_sync():
+    pg.init()
+    cr.screen = pg.display.set_mode((800, 600))
+    game = Game(ai_active=False)
+    for uci in ["e2e4", "e7e5", "g1f3"]:
+        game.move(uci)
+    assert game.history.sans == ["e4", "e5", "Nf3"]
+    game.undo()
+    assert game.history.sans == ["e4", "e5"]
+    game.reset()
+    assert game.history.sans == []
+    game.close()
@@ -0,0 +1,56 @@
+import pygame as pg
+from core.event_holder import Frame
+from core.input_recording import InputRecorder, ReplayEventHolder, load_frames
+from main import run_replay
+
+
+def click_frames(pos, t):
+    down = pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=pos)
+    up = pg.event.Event(pg.MOUSEBUTTONUP, button=1, pos=pos)
+    return [
+        Frame(t, [pg.event.Event(pg.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))], pos, (False, False, False), True),
+        Frame(t + 0.01, [down], pos, (True, False, False), True),
+        Frame(t + 0.02, [up], pos, (False, False, False), True),
+    ]
+
+
+def test_recording_round_trip(tmp_path):
+    path = tmp_path / "session.rec"
+    frames = click_frames((30, 40), 0.0)
+    frames.append(Frame(0.5, [pg.event.Event(pg.KEYDOWN, key=pg.K_u)], (30, 40), (False, False, False), True))
+    # Коліщатко з "природним" напрямком прокрутки
+    wheel = pg.event.Event(pg.MOUSEWHEEL, x=0, y=-2, flipped=True, precise_x=0.0, precise_y=-2.0)
+    frames.append(Frame(0.6, [wheel], (30, 40), (False, False, False), True))
+    with InputRecorder(path) as recorder:
+        for frame in frames:
+            recorder.write_frame(frame)
+
+    loaded = load_frames(path)
+    assert [len(f.events) for f in loaded] == [1, 1, 1, 1, 1]
+    assert loaded[1].events[0].button == 1
+    assert loaded[3].events[0].key == pg.K_u
+    assert loaded[4].events[0].y == -2 and loaded[4].events[0].flipped is True
+
+    holder = ReplayEventHolder(path)
+    holder.get_events()
+    holder.get_events()
+    assert holder.mouse_pos == (30, 40)
+    assert holder.mouse_pressed_keys == [True, False, False]
+
+
+def test_replay_drives_menu_and_game(tmp_path, monkeypatch):
+    path = tmp_path / "session.rec"
+    frames = []
+    # "Play vs Human" у меню, потім хід d2-d4 мишею
+    frames += click_frames((500, 410), 0.0)
+    frames += click_frames((315, 585), 1.0)
+    frames += click_frames((315, 405), 2.0)
+    with InputRecorder(path) as recorder:
+        for frame in frames:
+            recorder.write_frame(frame)
+
+    monkeypatch.setenv("SDL_VIDEODRIVER", "x11")  # відтворення все одно без вікна
+    report = run_replay(str(path))
+    assert report["frames"] == len(frames)
+    assert report["max_ms"] >= report["p50_ms"] > 0
+    assert report["moves"] == "d2d4"
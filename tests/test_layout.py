@@ -0,0 +1,26 @@
+import pygame as pg
+from core.layout import Layout
+from core.sprite import Sprite
+
+
+def test_layout_scales_with_window():
+    small = Layout((500, 400), [4, 4, 120, 120], (128, 128))
+    large = Layout((1000, 800), [4, 4, 120, 120], (128, 128))
+
+    assert small.board_size == 400
+    assert len(small.board_map) == 64
+    assert large.board_map["a8"].topleft == large.board_rect.topleft
+    assert abs(large.tile_w - 2 * small.tile_w) < 1
+    assert small.promotion_panel.center == small.screen_rect.center
+    assert small.bottom_panel.y == 400
+
+
+def test_sprite_scaled_cache_is_bounded():
+    sprite = Sprite("assets/chess_pieces/white_king.png")
+    first = sprite.scaled(40, 40)
+    assert sprite.scaled(40, 40) is first  # повторний розмір береться з кешу
+
+    for size in range(50, 50 + Sprite.cache_size):
+        sprite.scaled(size, size)
+    assert len(sprite.scaled_cache) == Sprite.cache_size
+    assert (40, 40) not in sprite.scaled_cache
@@ -11,3 +11,25 @@ def test_mouse_position_updates():
     event_holder.get_events()
 
     assert event_holder.mouse_pos.x >= 0  # просте, стабільне твердження
+
+
+def test_motion_is_coalesced_and_rect_cached():
+    from core.event_holder import Frame
+
+    event_holder = EventHolder()
+    motions = [pg.event.Event(pg.MOUSEMOTION, pos=(i, i), rel=(1, 1), buttons=(0, 0, 0)) for i in range(50)]
+    event_holder.process_frame(Frame(0.0, motions, (49, 49), (False, False, False), True))
+
+    assert event_holder.mouse_moved
+    assert event_holder.mouse_pos == (49, 49)
+    rect = event_holder.mouse_rect
+    assert event_holder.mouse_rect is rect  # без нових алокацій, поки миша стоїть
+
+    keys = [pg.event.Event(pg.KEYDOWN, key=pg.K_u), pg.event.Event(pg.KEYDOWN, key=pg.K_u)]
+    event_holder.process_frame(Frame(0.1, keys, (60, 60), (False, False, False), True))
+    assert event_holder.held_keys == {pg.K_u}
+    assert event_holder.mouse_rect is rect
+
+    event_holder.process_frame(Frame(0.2, motions[:1], (0, 0), (False, False, False), True))
+    assert event_holder.mouse_rect is not rect
+    assert event_holder.mouse_rect.center == (0, 0)
@@ -0,0 +1,42 @@
+from move_history import MoveHistory
+
+
+def rows(history):
+    return list(history.history_area.get(0, "end"))
+
+
+def redrawn(root, moves, current_ply=None):
+    history = MoveHistory(root)
+    history.update(moves, current_ply)
+    return history
+
+
+def highlighted(history):
+    return [index for index in range(len(history.entries))
+            if history.history_area.itemcget(index, "background")]
+
+
+def test_incremental_updates_match_a_full_redraw(tk_root):
+    moves = ["e4", "e5", "Nf3", "Nc6", "Bb5"]
+    history = MoveHistory(tk_root)
+    for ply in range(1, len(moves) + 1):
+        history.update(moves[:ply], ply)
+    assert rows(history) == rows(redrawn(tk_root, moves, 5)) == moves
+    assert highlighted(history) == [4]
+
+    # Хід назад: рядки лишаються, підсвічено попередній
+    history.update(moves, 4)
+    assert rows(history) == moves and highlighted(history) == [3]
+
+    # Інша гілка після 2...Nc6 замінює хвіст списку
+    line = ["e4", "e5", "Nf3", "Nc6", "Bc4", "Bc5"]
+    history.update(line, 6)
+    expected = redrawn(tk_root, line, 6)
+    assert rows(history) == rows(expected) == line
+    assert highlighted(history) == highlighted(expected) == [5]
+
+    # Скорочення партії прибирає зайві рядки разом із підсвіткою
+    history.update(line[:2], 1)
+    assert rows(history) == line[:2] and highlighted(history) == [0]
+    history.update([], None)
+    assert rows(history) == [] and history.current is None
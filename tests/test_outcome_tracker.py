@@ -0,0 +1,40 @@
+import random
+
+import chess
+
+from core.game_core import GameCore
+from core.outcome_tracker import OutcomeTracker
+
+
+def test_matches_board_outcome_in_random_games():
+    rng = random.Random(7)
+    for _ in range(20):
+        board = chess.Board()
+        tracker = OutcomeTracker(board)
+        while board.outcome() is None and len(board.move_stack) < 400:
+            tracker.push(rng.choice(list(board.legal_moves)))
+            if rng.random() < 0.1:
+                tracker.pop()
+            assert tracker.outcome() == board.outcome()
+
+
+def test_fivefold_repetition_by_counter():
+    game = GameCore()
+    shuffle = ["g1f3", "g8f6", "f3g1", "f6g8"]
+    for uci in shuffle * 4:
+        assert game.outcome_message is None
+        game.move(uci)
+    assert game.outcome_tracker.repetitions() == 5
+    assert game.outcome_message == "Draw"
+
+    game.outcome_message = None
+    game.undo_move()
+    assert game.outcome_tracker.repetitions() == 4
+    assert game.outcome_tracker.outcome() is None
+
+
+def test_checkmate():
+    game = GameCore()
+    for uci in ["f2f3", "e7e5", "g2g4", "d8h4"]:
+        game.move(uci)
+    assert game.outcome_message == "Black wins"
@@ -0,0 +1,36 @@
+import io
+
+import chess
+import chess.pgn
+from ply_table import PlyTable
+
+PGN = "1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 *"
+
+
+def test_random_access_matches_replay():
+    game = chess.pgn.read_game(io.StringIO(PGN))
+    plies = PlyTable.from_game(game)
+
+    assert plies.last_ply == 6
+    assert plies.sans == ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6"]
+
+    board = chess.Board()
+    for ply, move in enumerate(game.mainline_moves(), start=1):
+        board.push(move)
+        jumped = plies.board_at(ply)
+        assert jumped.fen() == board.fen()
+        assert jumped.peek() == move
+    assert plies.board_at(0).fen() == chess.STARTING_FEN
+
+
+def test_play_replaces_rest_of_line():
+    plies = PlyTable(chess.Board(), [chess.Move.from_uci(m) for m in ["e2e4", "e7e5", "g1f3"]])
+
+    # Хід по партії не змінює таблицю
+    assert plies.play(0, chess.Move.from_uci("e2e4")) == 1
+    assert plies.last_ply == 3
+
+    # Відхилення обрізає решту партії
+    assert plies.play(1, chess.Move.from_uci("c7c5")) == 2
+    assert plies.sans == ["e4", "c5"]
+    assert plies.clamp(10) == 2
@@ -0,0 +1,73 @@
+import chess
+
+from position_index import PositionIndex, decode_move, encode_move
+
+PGN = """[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 1-0
+
+[Result "0-1"]
+
+1. e4 c5 2. Nf3 d6 0-1
+
+[Result "1/2-1/2"]
+
+1. d4 d5 2. Nf3 Nf6 1/2-1/2
+
+[Result "1-0"]
+
+1. Nf3 d5 2. d4 Nf6 1-0
+"""
+
+
+def build(tmp_path, **kwargs):
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN)
+    return PositionIndex.build(str(path), **kwargs)
+
+
+def test_move_encoding_roundtrip():
+    for uci in ["e2e4", "a7a8q", "h2h1n"]:
+        move = chess.Move.from_uci(uci)
+        assert decode_move(encode_move(move)) == move
+    assert decode_move(encode_move(None)) is None
+
+
+def test_stats_for_start_position(tmp_path):
+    index = build(tmp_path)
+    stats = index.stats(chess.Board())
+    assert [(stat.san, stat.games) for stat in stats] == [("e4", 2), ("d4", 1), ("Nf3", 1)]
+    assert stats[0].score(chess.WHITE) == 0.5
+    index.close()
+
+
+def test_transpositions_and_game_lookup(tmp_path):
+    # Маленькі частини змушують злиття з диска
+    index = build(tmp_path, chunk_records=3)
+    board = chess.Board()
+    for uci in ["d2d4", "d7d5", "g1f3", "g8f6"]:
+        board.push_uci(uci)
+    assert sorted(index.lookup(board)) == [(2, 4), (3, 4)]
+    assert index.read_game(3).headers["Result"] == "1-0"
+    index.close()
+
+
+def test_open_for_rebuilds_when_pgn_changes(tmp_path):
+    index = build(tmp_path)
+    index.close()
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN + '\n[Result "0-1"]\n\n1. c4 e5 0-1\n')
+    index = PositionIndex.open_for(str(path))
+    assert index.game_count == 5
+    index.close()
+
+
+def test_open_for_rebuilds_unreadable_index(tmp_path):
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN)
+    # Порожній, обрізаний і чужий файли індексу
+    for content in (b"", b"LCIDX1\x00", b"NOTIDX" + bytes(64)):
+        (tmp_path / "games.pgn.idx").write_bytes(content)
+        index = PositionIndex.open_for(str(path))
+        assert index.game_count == 4
+        index.close()
@@ -0,0 +1,43 @@
+import pstats
+import time
+
+import pygame as pg
+
+from core.profiler import Profiler
+
+
+def test_hotkey_toggles_and_writes_reports(tmp_path):
+    profiler = Profiler(str(tmp_path), window=None)
+    profiler.check({Profiler.hotkey})
+    assert profiler.recording
+    data = [list(range(100)) for _ in range(200)]  # щось, що видно в звіті пам'яті
+    profiler.check(set())
+    assert profiler.recording  # без вікна записує, доки не натиснуть знову
+    profiler.check({Profiler.hotkey})
+    assert not profiler.recording and data
+
+    stats_path, memory_path = profiler.last_files
+    assert pstats.Stats(stats_path).total_calls > 0
+    report = open(memory_path).read()
+    assert "allocation sites" in report and "test_profiler.py" in report
+
+
+def test_window_ends_recording_and_indicator_is_drawn(tmp_path):
+    pg.init()
+    profiler = Profiler(str(tmp_path), window=0.05)
+    surface = pg.Surface((100, 40))
+    profiler.start()
+    profiler.draw(surface)
+    assert surface.get_at((14, 14)) == pg.Color(*Profiler.indicator_color)
+    time.sleep(0.06)
+    profiler.check(set())
+    assert not profiler.recording
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_quick_recordings_get_their_own_files(tmp_path):
+    profiler = Profiler(str(tmp_path), window=None)
+    for _ in range(2):
+        profiler.start()
+        profiler.stop()
+    assert len(list(tmp_path.iterdir())) == 4
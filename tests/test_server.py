@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+
+import chess
+from server import ENGINE_FAILED, EnginePool, GameServer
+
+
+class FirstMoveEngine:
+    """Детермінований двигун: перший легальний хід у порядку UCI."""
+
+    def __init__(self):
+        self.searches = 0
+
+    def best_move(self, board, limit=None):
+        time.sleep(0.01)
+        self.searches += 1
+        return min(board.legal_moves, key=lambda m: m.uci())
+
+    def quit(self):
+        pass
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def play_session(port, moves):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    state = await request(reader, writer, {"type": "new", "color": "white"})
+    replies = []
+    for uci in moves:
+        state = await request(reader, writer, {"type": "move", "uci": uci})
+        replies.append(state["bot_move"])
+    metrics = await request(reader, writer, {"type": "metrics"})
+    writer.close()
+    return state, replies, metrics
+
+
+def test_concurrent_sessions_share_engine_pool():
+    async def scenario():
+        pool = EnginePool(FirstMoveEngine, size=2)
+        server = GameServer(pool, port=0)
+        await server.start()
+        try:
+            results = await asyncio.gather(
+                *(play_session(server.port, ["e2e4", "d2d4"]) for _ in range(5))
+            )
+        finally:
+            await server.stop()
+        return results
+
+    results = asyncio.run(scenario())
+
+    for state, replies, metrics in results:
+        assert replies == ["a7a5", "a5a4"]
+        assert state["moves"] == ["e2e4", "a7a5", "d2d4", "a5a4"]
+        assert metrics["bot_latency"]["count"] == 2
+
+
+def test_illegal_move_is_rejected():
+    async def scenario():
+        server = GameServer(EnginePool(FirstMoveEngine, size=1), port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            await request(reader, writer, {"type": "new", "color": "black"})
+            reply = await request(reader, writer, {"type": "move", "uci": "e7e4"})
+            writer.close()
+        finally:
+            await server.stop()
+        return reply
+
+    reply = asyncio.run(scenario())
+    assert reply["type"] == "error"
+    assert reply["state"]["moves"] == ["a2a3"]
+
+
+class BrokenEngine(FirstMoveEngine):
+    def best_move(self, board, limit=None):
+        raise RuntimeError("engine died")
+
+
+def test_bad_messages_get_error_replies():
+    async def scenario():
+        server = GameServer(EnginePool(BrokenEngine, size=1), port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            replies = [
+                await request(reader, writer, [1, 2]),
+                await request(reader, writer, {"type": "new", "color": "white", "time_limit": "300"}),
+                await request(reader, writer, {"type": "new", "color": "white", "increment": -1}),
+                await request(reader, writer, {"type": "new", "color": "black"}),
+                # З'єднання не обривається після помилки двигуна
+                await request(reader, writer, {"type": "state"}),
+            ]
+            writer.close()
+        finally:
+            await server.stop()
+        return replies
+
+    not_object, bad_time, bad_increment, engine_failed, state = asyncio.run(scenario())
+    assert not_object == {"type": "error", "message": "Expected a JSON object"}
+    assert bad_time["type"] == bad_increment["type"] == "error"
+    assert engine_failed["type"] == "error"
+    assert state["type"] == "state"
+
+
+def test_engine_failure_ends_the_game():
+    async def scenario():
+        server = GameServer(EnginePool(BrokenEngine, size=1), port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            replies = [
+                # Бот ходить першим і не може: партія не чекає на нього вічно
+                await request(reader, writer, {"type": "new", "color": "black"}),
+                await request(reader, writer, {"type": "state"}),
+                await request(reader, writer, {"type": "move", "uci": "e7e5"}),
+                await request(reader, writer, {"type": "new", "color": "white"}),
+            ]
+            writer.close()
+        finally:
+            await server.stop()
+        return replies
+
+    failed, state, move, new_game = asyncio.run(scenario())
+    assert failed["type"] == "error" and "engine died" in failed["message"]
+    assert state["outcome"] == ENGINE_FAILED and state["moves"] == []
+    assert move["type"] == "error" and move["message"] == "Game is over"
+    assert new_game["type"] == "state" and new_game["outcome"] is None and new_game["turn"] == "white"
+
+
+def test_open_sessions_are_archived_on_stop(tmp_path):
+    from game_archive import ArchiveWriter, GameArchive
+
+    path = str(tmp_path / "server.lca")
+
+    async def scenario():
+        server = GameServer(EnginePool(FirstMoveEngine, size=1), port=0, archive=ArchiveWriter(path))
+        await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        await request(reader, writer, {"type": "new", "color": "white"})
+        await request(reader, writer, {"type": "move", "uci": "e2e4"})
+        # Сервер зупиняється, поки клієнт ще під'єднаний
+        await server.stop()
+        writer.close()
+
+    asyncio.run(scenario())
+    with GameArchive(path) as archive:
+        assert len(archive) == 1
+        assert [move.uci() for move in archive[0].moves] == ["e2e4", "a7a5"]
@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import Future
+
+import chess
+import pygame as pg
+
+import core.common_resources as cr
+from core.game import Game
+from time_manager import TimeManager
+
+
+def test_clock_limit_keeps_overhead_margin():
+    manager = TimeManager(move_overhead=0.2)
+    limit = manager.limit(chess.WHITE, 60.0, 45.0, increment=2.0, nodes=1000)
+    assert (limit.white_clock, limit.black_clock) == (59.8, 44.8)
+    assert (limit.white_inc, limit.black_inc, limit.nodes) == (2.0, 2.0, 1000)
+    assert limit.time is None and not manager.emergency
+
+
+def test_emergency_mode_near_flag_fall():
+    manager = TimeManager(move_overhead=0.2, emergency_time=3.0)
+    limit = manager.limit(chess.BLACK, 60.0, 1.2)
+    assert manager.emergency
+    assert limit.time == 0.1 and limit.black_clock is None
+    manager.record(0.15)
+    assert manager.metrics()["emergency_moves"] == 1
+
+
+def test_bot_on_short_clock_moves_fast_and_records_time():
+    pg.init()
+    cr.screen = pg.display.set_mode((800, 600))
+    game = Game(ai_color="white", ai_active=True, timed_play=True, time_limit=2)
+    try:
+        started = time.monotonic()
+        while not game.ai_make_move():
+            assert time.monotonic() - started < 1.0
+            time.sleep(0.01)
+        metrics = game.time_manager.metrics()
+        assert metrics["moves"] == 1 and metrics["emergency_moves"] == 1
+        assert game.remaining_time("white") > 1.0
+    finally:
+        game.close()
+
+
+def test_tier_latency_caps_the_clock_and_increment_is_passed():
+    pg.init()
+    cr.screen = pg.display.set_mode((800, 600))
+    game = Game(ai_color="white", ai_active=True, timed_play=True, time_limit=600, increment=5,
+                difficulty="beginner")
+    submitted = {}
+
+    def submit_move(board, limit, timeout=None, options=None):
+        submitted.update(limit=limit, timeout=timeout)
+        return Future()
+
+    game.scheduler.submit_move = submit_move
+    try:
+        game.ai_make_move()
+        # Годинник не подовжує час відповіді рівня
+        assert submitted["timeout"] == game.difficulty.max_latency
+        assert submitted["limit"].white_inc == 5
+    finally:
+        game.close()
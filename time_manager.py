@@ -0,0 +1,55 @@
+"""
+Search limits for a bot playing on the clock. The engine gets its real
+remaining time (wtime/btime and increment) minus a safety margin for the
+time spent outside the search; close to flag fall it switches to quick
+fixed-time moves.
+"""
+from typing import Optional
+
+import chess
+import chess.engine
+
+
+class TimeManager:
+    def __init__(self, move_overhead: float = 0.15, emergency_time: float = 3.0):
+        self.move_overhead = move_overhead  # seconds lost per move to polling, scheduling and drawing
+        self.emergency_time = emergency_time
+        self.used: list[float] = []
+        self.emergency_moves = 0
+        self.emergency = False
+
+    def limit(self, turn: chess.Color, white_remaining: float, black_remaining: float,
+              increment: float = 0.0, nodes: Optional[int] = None) -> chess.engine.Limit:
+        remaining = white_remaining if turn == chess.WHITE else black_remaining
+        self.emergency = remaining - self.move_overhead < self.emergency_time + increment
+        if self.emergency:
+            # Whatever the position, moving now beats losing on time
+            movetime = max(0.01, min(0.1, (remaining - self.move_overhead) / 10))
+            return chess.engine.Limit(time=movetime, nodes=nodes)
+        return chess.engine.Limit(
+            white_clock=max(0.0, white_remaining - self.move_overhead),
+            black_clock=max(0.0, black_remaining - self.move_overhead),
+            white_inc=increment,
+            black_inc=increment,
+            nodes=nodes,
+        )
+
+    def record(self, seconds: float) -> None:
+        """Time the bot's clock ran for one move, from the opponent's move to the bot's."""
+        self.used.append(seconds)
+        if self.emergency:
+            self.emergency_moves += 1
+
+    def metrics(self) -> dict:
+        if not self.used:
+            return {"moves": 0}
+        ordered = sorted(self.used)
+        return {
+            "moves": len(ordered),
+            "total_s": sum(ordered),
+            "mean_s": sum(ordered) / len(ordered),
+            "p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max_s": ordered[-1],
+            "last_s": self.used[-1],
+            "emergency_moves": self.emergency_moves,
+        }